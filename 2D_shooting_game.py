@@ -7,6 +7,7 @@ from player import Player
 game_settings = Settings()
 
 # initialize pygame and the main screen
+pygame.mixer.pre_init(44100, -16, 1, 2048)
 pygame.init()
 # screen = pygame.display.set_mode((game_settings.screen_width, game_settings.screen_height), pygame.FULLSCREEN)
 screen = pygame.display.set_mode((game_settings.screen_width, game_settings.screen_height))
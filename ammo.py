@@ -1,8 +1,11 @@
 import pygame
 from pygame.sprite import Sprite
-import random
+from game_random import game_random
 import math
 from setting import Settings
+from asset_manager import assets
+from object_pool import ObjectPool
+from timing_wheel import timers
 
 
 class PistolAmmo(Sprite):
@@ -10,20 +13,32 @@ class PistolAmmo(Sprite):
 
     def __init__(self, zombie):
         super().__init__()
+        self.reset(zombie)
+
+    def reset(self, zombie):
+        """drop the item near zombie (also used when the item is reused by the pool)"""
         self.ammo_type = self.game_settings.pistol
         self.screen = zombie.screen
-        self.image = pygame.image.load(self.game_settings.ammo_pistol_image_path)
+        self.image = assets.image(self.game_settings.ammo_pistol_image_path)
         self.rect = self.image.get_rect()
-        self.rect.centerx = zombie.rect.centerx + random.randint(-40, 40)
-        self.rect.centery = zombie.rect.centery + random.randint(-40, 40)
+        self.rect.centerx = zombie.rect.centerx + game_random.randint(-40, 40)
+        self.rect.centery = zombie.rect.centery + game_random.randint(-40, 40)
         self.ammo_life = self.game_settings.pistol_ammo_life
-        self.amount = random.randint(self.game_settings.pistol_ammo_min_amount, self.game_settings.pistol_ammo_max_amount)
+        self.expiry = None  # end of the lifetime on the timing wheel, scheduled by drop()
+        self.amount = game_random.randint(self.game_settings.pistol_ammo_min_amount, self.game_settings.pistol_ammo_max_amount)
 
-    def blit_ammo(self):
-        self.screen.blit(self.image, self.rect)
+    def drop(self, group):
+        """add the item to group, it is removed when its lifetime (in steps) is over"""
+        group.add(self)
+        self.expiry = timers.schedule(self.ammo_life, self.expire)
+
+    def expire(self):
+        """end of the lifetime (timing wheel callback)"""
+        self.kill()
+        self.pool.release(self)
 
-    def update(self):
-        self.ammo_life -= 1
+    def blit_ammo(self):
+        return self.screen.blit(self.image, self.rect)
 
 
 class M4Ammo(Sprite):
@@ -31,20 +46,32 @@ class M4Ammo(Sprite):
 
     def __init__(self, zombie):
         super().__init__()
+        self.reset(zombie)
+
+    def reset(self, zombie):
+        """drop the item near zombie (also used when the item is reused by the pool)"""
         self.ammo_type = self.game_settings.m4
         self.screen = zombie.screen
-        self.image = pygame.image.load(self.game_settings.ammo_m4_image_path)
+        self.image = assets.image(self.game_settings.ammo_m4_image_path)
         self.rect = self.image.get_rect()
-        self.rect.centerx = zombie.rect.centerx + random.randint(-40, 40)
-        self.rect.centery = zombie.rect.centery + random.randint(-40, 40)
+        self.rect.centerx = zombie.rect.centerx + game_random.randint(-40, 40)
+        self.rect.centery = zombie.rect.centery + game_random.randint(-40, 40)
         self.ammo_life = self.game_settings.m4_ammo_life
-        self.amount = random.randint(self.game_settings.m4_ammo_min_amount, self.game_settings.m4_ammo_max_amount)
+        self.expiry = None  # end of the lifetime on the timing wheel, scheduled by drop()
+        self.amount = game_random.randint(self.game_settings.m4_ammo_min_amount, self.game_settings.m4_ammo_max_amount)
 
-    def blit_ammo(self):
-        self.screen.blit(self.image, self.rect)
+    def drop(self, group):
+        """add the item to group, it is removed when its lifetime (in steps) is over"""
+        group.add(self)
+        self.expiry = timers.schedule(self.ammo_life, self.expire)
 
-    def update(self):
-        self.ammo_life -= 1
+    def expire(self):
+        """end of the lifetime (timing wheel callback)"""
+        self.kill()
+        self.pool.release(self)
+
+    def blit_ammo(self):
+        return self.screen.blit(self.image, self.rect)
 
 
 class AwpAmmo(Sprite):
@@ -52,17 +79,35 @@ class AwpAmmo(Sprite):
 
     def __init__(self, zombie):
         super().__init__()
+        self.reset(zombie)
+
+    def reset(self, zombie):
+        """drop the item near zombie (also used when the item is reused by the pool)"""
         self.ammo_type = self.game_settings.awp
         self.screen = zombie.screen
-        self.image = pygame.image.load(self.game_settings.ammo_awp_image_path)
+        self.image = assets.image(self.game_settings.ammo_awp_image_path)
         self.rect = self.image.get_rect()
-        self.rect.centerx = zombie.rect.centerx + random.randint(-40, 40)
-        self.rect.centery = zombie.rect.centery + random.randint(-40, 40)
+        self.rect.centerx = zombie.rect.centerx + game_random.randint(-40, 40)
+        self.rect.centery = zombie.rect.centery + game_random.randint(-40, 40)
         self.ammo_life = self.game_settings.awp_ammo_life
-        self.amount = random.randint(self.game_settings.awp_ammo_min_amount, self.game_settings.awp_ammo_max_amount)
+        self.expiry = None  # end of the lifetime on the timing wheel, scheduled by drop()
+        self.amount = game_random.randint(self.game_settings.awp_ammo_min_amount, self.game_settings.awp_ammo_max_amount)
+
+    def drop(self, group):
+        """add the item to group, it is removed when its lifetime (in steps) is over"""
+        group.add(self)
+        self.expiry = timers.schedule(self.ammo_life, self.expire)
+
+    def expire(self):
+        """end of the lifetime (timing wheel callback)"""
+        self.kill()
+        self.pool.release(self)
 
     def blit_ammo(self):
-        self.screen.blit(self.image, self.rect)
+        return self.screen.blit(self.image, self.rect)
+
 
-    def update(self):
-        self.ammo_life -= 1
\ No newline at end of file
+# pools of reusable items
+PistolAmmo.pool = ObjectPool(PistolAmmo)
+M4Ammo.pool = ObjectPool(M4Ammo)
+AwpAmmo.pool = ObjectPool(AwpAmmo)
@@ -0,0 +1,63 @@
+class AnimationClip:
+    """
+    An immutable animation shared by every entity that plays it.
+
+    A clip only stores each unique frame once, together with the number of ticks it is held.
+    Frames are usually surfaces, but can be any value (e.g. the angle offsets of the zombie attack sweep).
+
+    Attributes (self.):
+        :frames: unique frames, in display order
+        :holds: number of ticks each frame is displayed
+        :frame_at: tick -> index in self.frames, precomputed so lookups are O(1)
+        :length: total number of ticks of the clip
+    """
+
+    def __init__(self, frames, holds=None):
+        self.frames = tuple(frames)
+        if holds is None:
+            holds = [1] * len(self.frames)
+        self.holds = tuple(holds)
+
+        self.frame_at = tuple(i for i in range(len(self.frames)) for j in range(self.holds[i]))
+        self.length = len(self.frame_at)
+
+    @classmethod
+    def from_paths(cls, paths, hold, assets):
+        """
+        Build a clip from image paths, every frame held the same number of ticks
+        (images are loaded through the shared asset manager)
+        """
+        return cls([assets.image(path) for path in paths], [hold] * len(paths))
+
+
+class AnimationCursor:
+    """
+    The playback position of one entity in a shared AnimationClip.
+    Starting an animation only resets two references, no frame list is copied.
+    """
+    __slots__ = ('clip', 'tick')
+
+    def __init__(self, clip=None):
+        self.clip = clip
+        self.tick = 0
+
+    def play(self, clip):
+        """(re)start playing clip from its first frame"""
+        self.clip = clip
+        self.tick = 0
+
+    def stop(self):
+        self.clip = None
+        self.tick = 0
+
+    @property
+    def playing(self):
+        """True until every tick of the clip has been played"""
+        return self.clip is not None and self.tick < self.clip.length
+
+    def frame(self):
+        """current frame of the clip"""
+        return self.clip.frames[self.clip.frame_at[self.tick]]
+
+    def advance(self, ticks=1):
+        self.tick += ticks
@@ -0,0 +1,153 @@
+import pygame
+from trace_export import tracer
+
+
+class AssetManager:
+    """
+    A class to decode every image, sound and font file once and share the result.
+
+    Sprites used to call pygame.image.load() in their constructors, so every spawned
+    zombie, bullet or item decoded its png again. Instead, all classes ask the manager,
+    which keeps one surface (converted to the display format) and one Sound per path.
+
+    Attributes (self.):
+        :images: path -> shared Surface
+        :sounds: path -> shared pygame.mixer.Sound
+        :fonts: (path, size) -> shared pygame.font.Font
+        :sizes: path -> bytes held by the decoded asset
+        :hits: number of requests served from the cache
+        :misses: number of requests that had to decode a file
+        :muted: no sound is loaded or played (headless runs)
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.sounds = {}
+        self.fonts = {}
+        self.sizes = {}
+
+        # images decoded before the display existed, they still need convert_alpha()
+        self.unconverted = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.muted = False
+
+    def image(self, path):
+        """
+        Return the shared surface of the image at path.
+        The surface is converted to the display's pixel format as soon as a display mode is set,
+        so blitting it does not need a per-frame format conversion.
+        """
+        surface = self.images.get(path)
+        if surface is None:
+            self.misses += 1
+            with tracer.span(path, 'asset'):
+                surface = pygame.image.load(path)
+            self.unconverted.add(path)
+        else:
+            self.hits += 1
+
+        if path in self.unconverted and pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+            self.unconverted.discard(path)
+
+        self.images[path] = surface
+        self.sizes[path] = surface.get_pitch() * surface.get_height()
+        return surface
+
+    def sound(self, path):
+        """
+        Return the shared Sound of the audio file at path.
+        One Sound can be played on several channels at once, so sharing it is safe.
+        Return None if sound is muted or the mixer is not initialized (it is only played on a channel())
+        """
+        if self.muted or not pygame.mixer.get_init():
+            return None
+
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        with tracer.span(path, 'asset'):
+            sound = pygame.mixer.Sound(path)
+        self.sounds[path] = sound
+        self.sizes[path] = len(sound.get_raw())
+        return sound
+
+    def font(self, path, size):
+        """
+        Return the shared Font of the font file at path (None for pygame's default font) in size points.
+        A Font parses its file when it is created, menus used to create one for every line of text drawn.
+        """
+        key = (path, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        with tracer.span('%s %d' % (path, size), 'asset'):
+            font = pygame.font.Font(path, size)
+        self.fonts[key] = font
+        return font
+
+    def channel(self, channel_id):
+        """
+        Return the mixer channel channel_id,
+        or a SilentChannel if sound is muted or the mixer is not initialized
+        """
+        if self.muted or not pygame.mixer.get_init():
+            return SilentChannel()
+        return pygame.mixer.Channel(channel_id)
+
+    def mute(self):
+        """stop loading and playing sounds, objects created afterwards get silent channels"""
+        self.muted = True
+
+    def resident_bytes(self):
+        """total number of bytes held by decoded images and sounds"""
+        return sum(self.sizes.values())
+
+    def stats(self):
+        """
+        Cache statistics, e.g. for printing or drawing in a debug overlay
+        :return: dictionary of counters
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'images': len(self.images),
+            'sounds': len(self.sounds),
+            'fonts': len(self.fonts),
+            'bytes': self.resident_bytes(),
+        }
+
+    def clear(self):
+        """drop every cached asset and reset the counters"""
+        self.images.clear()
+        self.sounds.clear()
+        self.fonts.clear()
+        self.sizes.clear()
+        self.unconverted.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SilentChannel:
+    """Stand-in for pygame.mixer.Channel when no sound is played, every call does nothing"""
+
+    def play(self, sound, *args):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_busy(self):
+        return False
+
+
+# the asset manager shared by every module of the game
+assets = AssetManager()
@@ -0,0 +1,109 @@
+"""
+Benchmark of the bullet-zombie collision check: the old nested loop against the spatial hash broad-phase,
+and the swept (continuous) test of the bullets' paths.
+
+Only rects are simulated (no images or sounds), so no display is needed.
+Run: python benchmark_collision.py [number of bullets]
+"""
+import sys
+import time
+import math
+import random
+import pygame
+from pygame.sprite import Sprite, Group
+from setting import Settings
+from spatial_hash import SpatialHash
+from game_functions import swept_bullet_targets
+
+
+class Body(Sprite):
+    """a sprite with only a rect, stands for a zombie or a bullet"""
+
+    def __init__(self, x, y, width, height):
+        super().__init__()
+        self.rect = pygame.Rect(0, 0, width, height)
+        self.rect.center = (x, y)
+        self.hp = 100
+        self.spawn_id = id(self)  # used by the swept test when the body is a zombie
+
+        # used by the swept test when the body is a bullet
+        self.game_settings = Settings()
+        self.previous_center = self.rect.center
+        self.hit_zombies = set()
+
+
+def center_distance(rect_a, rect_b):
+    return math.sqrt(pow((rect_a.centerx - rect_b.centerx), 2) + pow((rect_a.centery - rect_b.centery), 2))
+
+
+def old_path(zombies, bullets, max_distance):
+    """the original shoot_zombie() loop: group copies and every zombie against every bullet"""
+    hits = 0
+    for zombie in zombies.copy().sprites():
+        for bullet in bullets.copy().sprites():
+            if zombie.rect.colliderect(bullet.rect) and center_distance(bullet.rect, zombie.rect) <= max_distance:
+                hits += 1
+    return hits
+
+
+def new_path(zombies, bullets, max_distance, grid):
+    """rebuild the grid, then only test zombies sharing a cell with a bullet"""
+    hits = 0
+    grid.build(zombies)
+    for bullet in bullets.sprites():
+        for zombie in grid.query(bullet.rect):
+            if zombie.rect.colliderect(bullet.rect) and center_distance(bullet.rect, zombie.rect) <= max_distance:
+                hits += 1
+    return hits
+
+
+def swept_path(zombies, bullets, grid):
+    """rebuild the grid, then test the path each bullet moved along"""
+    hits = 0
+    grid.build(zombies)
+    for bullet in bullets.sprites():
+        hits += len(swept_bullet_targets(bullet, grid))
+    return hits
+
+
+def frame_cost(function, args, repeat):
+    """average time of one call, in ms"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def run(bullet_count=30, zombie_counts=(10, 100, 500, 1000, 2000, 5000)):
+    game_settings = Settings()
+    width, height = game_settings.screen_width, game_settings.screen_height
+    max_distance = game_settings.bullet_awp_damage_distance
+    grid = SpatialHash(game_settings.collision_cell_size)
+    random.seed(0)
+
+    bullets = Group([Body(random.randint(0, width), random.randint(0, height), 60, 60) for i in range(bullet_count)])
+    for bullet in bullets:
+        # moved by the m4 bullet speed during the last frame
+        angle = random.uniform(0, 2 * math.pi)
+        bullet.previous_center = (bullet.rect.centerx - math.cos(angle) * game_settings.bullet_m4_speed,
+                                  bullet.rect.centery - math.sin(angle) * game_settings.bullet_m4_speed)
+
+    print('bullets: %d, cell size: %d' % (bullet_count, game_settings.collision_cell_size))
+    print('%8s %12s %12s %9s %12s' % ('zombies', 'old (ms)', 'new (ms)', 'speedup', 'swept (ms)'))
+    for zombie_count in zombie_counts:
+        zombies = Group([Body(random.randint(0, width), random.randint(0, height), 150, 130) for i in range(zombie_count)])
+        repeat = max(3, 3000 // zombie_count)
+
+        old_ms, old_hits = frame_cost(old_path, (zombies, bullets, max_distance), repeat)
+        new_ms, new_hits = frame_cost(new_path, (zombies, bullets, max_distance, grid), repeat)
+        swept_ms, swept_hits = frame_cost(swept_path, (zombies, bullets, grid), repeat)
+        assert old_hits == new_hits, 'broad-phase missed a collision'
+
+        print('%8d %12.3f %12.3f %8.1fx %12.3f' % (zombie_count, old_ms, new_ms, old_ms / new_ms, swept_ms))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,282 @@
+"""
+Benchmark of the phases of the game loop (check_events, spawn_zombies, shoot_zombie, attack_player,
+player_get_item, the group updates, update_screen and display.flip) in scripted scenarios:
+a fixed number of zombies (kept topped up) while the player holds m4 fire on the nearest zombie.
+A replay file (see headless.py) can also be used as a scenario.
+
+Runs without display or sound (SDL dummy drivers), the frames are still drawn on the dummy screen.
+Results are written as JSON with percentiles of the time of each phase, and can be compared with
+a baseline: the exit code is 1 if a phase got slower than the threshold.
+
+Run --no-lod to update every zombie fully every step (see zombie_lod.py) and compare with a run with
+the level of detail, the results of a scenario include how many zombie updates the level of detail saved.
+Likewise, run --full-flip to redraw the whole screen every frame instead of the dirty rects (see dirty_rects.py),
+the results include the pixels blitted per frame. With dirty rects, the opening of a 10 zombie scenario is
+also run as a check: the exit code is 1 if it flips the whole screen in more than half of its frames.
+
+Run: python benchmark_game.py [--scenarios=zombies_10,zombies_100] [--steps=300] [--engine] [--no-lod] [--full-flip]
+                              [--replay=FILE] [--output=results.json] [--baseline=baseline.json] [--threshold=0.25]
+"""
+import os
+import sys
+import json
+import platform
+import pygame
+from setting import Settings
+from headless import init_headless, autopilot
+from phase_timer import phase_timer
+from dirty_rects import dirty_renderer
+from replay import ReplayReader
+from zombie import Zombie
+from zombie_engine import EngineZombie
+import game_functions as gf
+
+# scenario name -> number of zombies on the map
+SCENARIOS = {
+    'zombies_10': 10,
+    'zombies_100': 100,
+    'zombies_1000': 1000,
+    'zombies_5000': 5000,
+}
+
+# phases of a frame, in the order of the game loop ('frame' is their sum)
+PHASES = ('check_events', 'input', 'spawn_zombies', 'shoot_zombie', 'attack_player', 'player_get_item', 'update',
+          'update_screen', 'display_flip')
+
+# a phase is only reported as a regression if it is slower by more than this many ms (timer noise)
+NOISE_FLOOR_MS = 0.05
+
+# scenario, steps and warmup of the full flip check: a few zombies and the player firing only change a small
+# part of the screen (later in the scenario the corpses pile up and full flips get cheaper), at most
+# MAX_FULL_FLIP_FRACTION of its frames may flip the whole screen
+FULL_FLIP_CHECK = ('zombies_10', 60, 30)
+MAX_FULL_FLIP_FRACTION = 0.5
+
+
+def percentile(sorted_values, fraction):
+    """nearest-rank percentile of a sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """:return: statistics (ms) of a list of durations (ms)"""
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else 0.0,
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': values[-1] if values else 0.0,
+    }
+
+
+def fill_zombies(world, count):
+    """spawn zombies (at the usual spawn places) until there are count zombies"""
+    while len(world.zombies) < count:
+        if world.zombie_engine is None:
+            zombie = Zombie.pool.acquire(world.game_settings, world.screen, world.player)
+        else:
+            zombie = EngineZombie.pool.acquire(world.game_settings, world.screen, world.player, world.zombie_engine)
+        world.zombies.add(zombie)
+
+
+def measure(world, steps, warmup, zombie_count=None, controller=None):
+    """
+    Run frames of one simulation step each, like run_game, and time every phase
+    :return: phase -> list of durations (ms), one per measured frame
+    """
+    samples = {phase: [] for phase in PHASES + ('frame',)}
+    current = {}
+
+    def record(phase, start, end):
+        current[phase] = current.get(phase, 0.0) + (end - start) * 1000
+
+    phase_timer.add_listener(record)
+    dirty_renderer.reset_stats()
+    try:
+        for step in range(warmup + steps):
+            if world.replay is not None and world.replay.finished:
+                break
+            if zombie_count is not None:
+                fill_zombies(world, zombie_count)
+            world.player.hp = world.game_settings.max_health_point
+
+            current.clear()
+            phase_timer.start()
+            gf.check_events(world.player, world.bullets, world.game_settings, world.screen, world.username, world.input)
+            phase_timer.mark('check_events')
+            if controller is not None:
+                controller(world)
+                phase_timer.start()  # the scripted player is not part of the game loop
+            gf.simulation_step(world)
+            gf.update_screen(world.background, world.player, world.zombies, world.screen, world.bullets,
+                             world.dead_zombies, world.ammos, world.first_aid_packs, 0.0)
+
+            if step >= warmup:
+                for phase in PHASES:
+                    samples[phase].append(current.get(phase, 0.0))
+                samples['frame'].append(sum(current.values()))
+    finally:
+        phase_timer.remove_listener(record)
+    return samples
+
+
+def run_scenario(name, steps, warmup, engine=False, lod=True):
+    """:return: result dictionary of a zombie count scenario"""
+    game_settings = Settings()
+    game_settings.zombie_engine_enabled = engine
+    game_settings.zombie_lod_enabled = lod
+    game_settings.initial_m4_ammo = 1000000  # sustained fire during the whole scenario
+    zombie_count = SCENARIOS[name]
+
+    screen = init_headless(game_settings)
+    world = gf.GameWorld(screen, game_settings, 'benchmark', seed=0)
+    samples = measure(world, steps, warmup, zombie_count, autopilot)
+    result = {
+        'zombies': zombie_count,
+        'steps': len(samples['frame']),
+        'shots': world.player.shots,
+        'zombie_killed': world.player.zombie_killed,
+        'phases': {phase: summarize(values) for phase, values in samples.items()},
+        'rendering': dirty_renderer.stats(),
+    }
+    if world.zombie_lod is not None:
+        result['lod'] = world.zombie_lod.stats()
+    world.close()
+    return result
+
+
+def run_replay_scenario(path, warmup):
+    """:return: result dictionary of a replay file played as a scenario"""
+    replay = ReplayReader(path)
+    game_settings = Settings()
+    replay.apply_settings(game_settings)
+
+    screen = init_headless(game_settings)
+    world = gf.GameWorld(screen, game_settings, 'benchmark', replay.seed)
+    world.replay = replay
+    samples = measure(world, replay.steps, warmup)
+    result = {
+        'replay': path,
+        'steps': len(samples['frame']),
+        'shots': world.player.shots,
+        'zombie_killed': world.player.zombie_killed,
+        'phases': {phase: summarize(values) for phase, values in samples.items()},
+        'rendering': dirty_renderer.stats(),
+    }
+    world.close()
+    return result
+
+
+def compare(results, baseline, threshold, metric='p50'):
+    """
+    Compare the metric of every phase with the baseline
+    :return: list of (scenario, phase, baseline ms, new ms) of the phases slower by more than threshold (ratio)
+    """
+    regressions = []
+    for name, result in results['scenarios'].items():
+        base_result = baseline.get('scenarios', {}).get(name)
+        if base_result is None:
+            continue
+        for phase, stats in result['phases'].items():
+            base_stats = base_result['phases'].get(phase)
+            if base_stats is None:
+                continue
+            base_value = base_stats[metric]
+            value = stats[metric]
+            if value > base_value * (1 + threshold) and value - base_value > NOISE_FLOOR_MS:
+                regressions.append((name, phase, base_value, value))
+    return regressions
+
+
+def check_full_flips(engine=False, lod=True):
+    """
+    Run the scenario of FULL_FLIP_CHECK with dirty rects
+    :return: rendering stats of the scenario, and whether it flipped the whole screen in at most MAX_FULL_FLIP_FRACTION of its frames
+    """
+    name, steps, warmup = FULL_FLIP_CHECK
+    rendering = run_scenario(name, steps, warmup, engine, lod)['rendering']
+    return rendering, rendering['full_flips'] <= MAX_FULL_FLIP_FRACTION * rendering['frames']
+
+
+def print_results(results, baseline=None, metric='p50'):
+    for name, result in results['scenarios'].items():
+        base_phases = (baseline or {}).get('scenarios', {}).get(name, {}).get('phases', {})
+        print('%s: %d steps, %d shots, %d killed' % (name, result['steps'], result['shots'], result['zombie_killed']))
+        if 'lod' in result:
+            print('    level of detail: %d full zombie updates, %d staggered (%.0f%% headings reused), %d hidden (not rotated)'
+                  % (result['lod']['full'], result['lod']['staggered'], result['lod']['staggered_fraction'] * 100, result['lod']['hidden']))
+        if result['rendering']['frames']:
+            print('    dirty rects: %.0f pixels blitted per frame, %d full flips in %d frames'
+                  % (result['rendering']['mean_blitted'], result['rendering']['full_flips'], result['rendering']['frames']))
+        print('    %-16s %9s %9s %9s %9s %12s' % ('phase', 'p50 (ms)', 'p95', 'p99', 'max', 'vs baseline'))
+        for phase, stats in result['phases'].items():
+            change = ''
+            if phase in base_phases and base_phases[phase][metric] > 0:
+                change = '%+.0f%%' % ((stats[metric] / base_phases[phase][metric] - 1) * 100)
+            print('    %-16s %9.3f %9.3f %9.3f %9.3f %12s' % (phase, stats['p50'], stats['p95'], stats['p99'], stats['max'], change))
+
+
+def run(scenarios, steps=300, warmup=30, engine=False, replay_paths=(), lod=True, dirty_rects=True):
+    """:return: results of all scenarios, as written to the JSON file"""
+    dirty_renderer.enabled = dirty_rects
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'zombie_engine': engine,
+            'zombie_lod': lod,
+            'dirty_rects': dirty_rects,
+        },
+        'steps': steps,
+        'warmup': warmup,
+        'scenarios': {},
+    }
+    for name in scenarios:
+        results['scenarios'][name] = run_scenario(name, steps, warmup, engine, lod)
+    for path in replay_paths:
+        results['scenarios']['replay:' + os.path.basename(path)] = run_replay_scenario(path, warmup)
+    return results
+
+
+if __name__ == '__main__':
+    options = dict(argument[2:].partition('=')[::2] for argument in sys.argv[1:] if argument.startswith('--'))
+    scenarios = options['scenarios'].split(',') if options.get('scenarios') else list(SCENARIOS)
+    replay_paths = options['replay'].split(',') if options.get('replay') else []
+    if 'replay' in options and 'scenarios' not in options:
+        scenarios = []
+
+    results = run(scenarios, int(options.get('steps') or 300), int(options.get('warmup') or 30), 'engine' in options, replay_paths,
+                  'no-lod' not in options, 'full-flip' not in options)
+
+    baseline = None
+    if options.get('baseline'):
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if options.get('output'):
+        with open(options['output'], 'w') as file:
+            json.dump(results, file, indent=2)
+
+    failed = False
+    if results['environment']['dirty_rects']:
+        rendering, passed = check_full_flips(results['environment']['zombie_engine'], results['environment']['zombie_lod'])
+        if not passed:
+            print('TOO MANY FULL FLIPS %s: %d in %d frames' % (FULL_FLIP_CHECK[0], rendering['full_flips'], rendering['frames']))
+            failed = True
+
+    if baseline is not None:
+        threshold = float(options.get('threshold') or 0.25)
+        regressions = compare(results, baseline, threshold)
+        for name, phase, base_value, value in regressions:
+            print('REGRESSION %s %s: %.3f ms -> %.3f ms' % (name, phase, base_value, value))
+        if regressions:
+            failed = True
+    if failed:
+        sys.exit(1)
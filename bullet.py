@@ -2,7 +2,10 @@ import pygame
 from pygame.sprite import Sprite
 import math  # to calculate rotated angle
 import copy
-import random
+from game_random import game_random
+from asset_manager import assets
+from rotation_cache import rotations
+from fixed_timestep import interpolation_offset
 
 
 class BulletM4(Sprite):
@@ -31,15 +34,15 @@ class BulletM4(Sprite):
         self.bullet_type = self.game_settings.m4
 
         # get current rotate angle
-        mouse_position = pygame.mouse.get_pos()
+        mouse_position = player.mouse_position
         self.angle = math.atan2(mouse_position[1] - (player.updated_rect[1] + player.rect.width / 2),
                                 mouse_position[0] - (player.updated_rect[0] + player.rect.height / 2))
 
         self.angle_got = copy.copy(player.angle)
 
         # load bullet image and make rotated image
-        self.image = pygame.image.load(self.game_settings.bullet_m4_image_path)
-        self.rotated_image = pygame.transform.rotate(self.image, 360 - math.degrees(self.angle))
+        self.image = assets.image(self.game_settings.bullet_m4_image_path)
+        self.rotated_image = rotations.rotate(self.image, 360 - math.degrees(self.angle))
 
         # create a rect
         self.rect = self.rotated_image.get_rect()
@@ -52,8 +55,13 @@ class BulletM4(Sprite):
         # bullet travel distance count
         self.traveled_distance = 0
 
+        # center before the last move, the path in between is used for swept collision
+        # spawn ids of the zombies already hit are recorded so they are not hit twice by one bullet
+        self.previous_center = self.rect.center
+        self.hit_zombies = set()
+
         # bullet damage
-        self.damage = random.randint(self.game_settings.bullet_m4_min_damage,
+        self.damage = game_random.randint(self.game_settings.bullet_m4_min_damage,
                                      self.game_settings.bullet_m4_max_damage)
         self.original_damage = self.damage
 
@@ -66,17 +74,23 @@ class BulletM4(Sprite):
         Update the bullet's position and record the total traveled distance
         This is related to the rotated angle of the bullet
         """
+        self.previous_center = self.rect.center
         self.rect.centerx += math.cos(self.angle) * self.game_settings.bullet_m4_speed
         self.rect.centery += math.sin(self.angle) * self.game_settings.bullet_m4_speed
 
         # update traveled distance
         self.traveled_distance += self.game_settings.bullet_m4_speed
 
-    def blit_bullet(self):
+    def blit_bullet(self, alpha=None):
         """
         Blit the bullet to the screen
+        (at the fraction alpha of its last move if given)
+        :return: Rect of the screen drawn
         """
-        self.screen.blit(self.rotated_image, self.rect)
+        if alpha is None:
+            return self.screen.blit(self.rotated_image, self.rect)
+        else:
+            return self.screen.blit(self.rotated_image, self.rect.move(interpolation_offset(self.previous_center, self.rect.center, alpha)))
 
 
 class BulletPistol(Sprite):
@@ -105,15 +119,15 @@ class BulletPistol(Sprite):
         self.bullet_type = self.game_settings.pistol
 
         # get current rotate angle
-        mouse_position = pygame.mouse.get_pos()
+        mouse_position = player.mouse_position
         self.angle = math.atan2(mouse_position[1] - (player.updated_rect[1] + player.rect.width / 2),
                                 mouse_position[0] - (player.updated_rect[0] + player.rect.height / 2))
 
         self.angle_got = copy.copy(player.angle)
 
         # load bullet image and make rotated image
-        self.image = pygame.image.load(self.game_settings.bullet_pistol_image_path)
-        self.rotated_image = pygame.transform.rotate(self.image, 360 - math.degrees(self.angle))
+        self.image = assets.image(self.game_settings.bullet_pistol_image_path)
+        self.rotated_image = rotations.rotate(self.image, 360 - math.degrees(self.angle))
 
         # create a rect
         self.rect = self.rotated_image.get_rect()
@@ -126,8 +140,13 @@ class BulletPistol(Sprite):
         # bullet travel distance count
         self.traveled_distance = 0
 
+        # center before the last move, the path in between is used for swept collision
+        # spawn ids of the zombies already hit are recorded so they are not hit twice by one bullet
+        self.previous_center = self.rect.center
+        self.hit_zombies = set()
+
         # bullet damage
-        self.damage = random.randint(self.game_settings.bullet_pistol_min_damage,
+        self.damage = game_random.randint(self.game_settings.bullet_pistol_min_damage,
                                      self.game_settings.bullet_pistol_max_damage)
         self.original_damage = self.damage
 
@@ -139,17 +158,23 @@ class BulletPistol(Sprite):
         Update the bullet's position and record the total traveled distance
         This is related to the rotated angle of the bullet
         """
+        self.previous_center = self.rect.center
         self.rect.centerx += math.cos(self.angle) * self.game_settings.bullet_pistol_speed
         self.rect.centery += math.sin(self.angle) * self.game_settings.bullet_pistol_speed
 
         # update traveled distance
         self.traveled_distance += self.game_settings.bullet_pistol_speed
 
-    def blit_bullet(self):
+    def blit_bullet(self, alpha=None):
         """
         Blit the bullet to the screen
+        (at the fraction alpha of its last move if given)
+        :return: Rect of the screen drawn
         """
-        self.screen.blit(self.rotated_image, self.rect)
+        if alpha is None:
+            return self.screen.blit(self.rotated_image, self.rect)
+        else:
+            return self.screen.blit(self.rotated_image, self.rect.move(interpolation_offset(self.previous_center, self.rect.center, alpha)))
 
 
 class BulletAwp(Sprite):
@@ -178,15 +203,15 @@ class BulletAwp(Sprite):
         self.bullet_type = self.game_settings.awp
 
         # get current rotate angle
-        mouse_position = pygame.mouse.get_pos()
+        mouse_position = player.mouse_position
         self.angle = math.atan2(mouse_position[1] - (player.updated_rect[1] + player.rect.width / 2),
                                 mouse_position[0] - (player.updated_rect[0] + player.rect.height / 2))
 
         self.angle_got = copy.copy(player.angle)
 
         # load bullet image and make rotated image
-        self.image = pygame.image.load(self.game_settings.bullet_awp_image_path)
-        self.rotated_image = pygame.transform.rotate(self.image, 360 - math.degrees(self.angle))
+        self.image = assets.image(self.game_settings.bullet_awp_image_path)
+        self.rotated_image = rotations.rotate(self.image, 360 - math.degrees(self.angle))
 
         # create a rect
         self.rect = self.rotated_image.get_rect()
@@ -199,8 +224,13 @@ class BulletAwp(Sprite):
         # bullet travel distance count
         self.traveled_distance = 0
 
+        # center before the last move, the path in between is used for swept collision
+        # spawn ids of the zombies already hit are recorded so they are not hit twice by one bullet
+        self.previous_center = self.rect.center
+        self.hit_zombies = set()
+
         # bullet damage
-        self.damage = random.randint(self.game_settings.bullet_awp_min_damage,
+        self.damage = game_random.randint(self.game_settings.bullet_awp_min_damage,
                                      self.game_settings.bullet_awp_max_damage)
         self.original_damage = self.damage
 
@@ -212,14 +242,20 @@ class BulletAwp(Sprite):
         Update the bullet's position and record the total traveled distance
         This is related to the rotated angle of the bullet
         """
+        self.previous_center = self.rect.center
         self.rect.centerx += math.cos(self.angle) * self.game_settings.bullet_awp_speed
         self.rect.centery += math.sin(self.angle) * self.game_settings.bullet_awp_speed
 
         # update traveled distance
         self.traveled_distance += self.game_settings.bullet_awp_speed
 
-    def blit_bullet(self):
+    def blit_bullet(self, alpha=None):
         """
         Blit the bullet to the screen
+        (at the fraction alpha of its last move if given)
+        :return: Rect of the screen drawn
         """
-        self.screen.blit(self.rotated_image, self.rect)
\ No newline at end of file
+        if alpha is None:
+            return self.screen.blit(self.rotated_image, self.rect)
+        else:
+            return self.screen.blit(self.rotated_image, self.rect.move(interpolation_offset(self.previous_center, self.rect.center, alpha)))
\ No newline at end of file
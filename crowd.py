@@ -0,0 +1,138 @@
+import math
+
+
+class CrowdSeparation:
+    """
+    Separation steering: each zombie is pushed away from the zombies closer than radius,
+    so a wave surrounds the player instead of collapsing into one stack of zombies.
+
+    Neighbours are found with a grid of cell size radius (rebuilt every step from the positions),
+    a zombie only looks at the 3 x 3 cells around it and at most max_neighbours zombies.
+    The work per step is bounded: only budget zombies get their push recomputed (round robin),
+    the others keep their last push, so thousands of zombies cost the same as budget zombies
+    (plus one pass to fill the grid).
+
+    The push of a zombie is added to its move: Zombie.separation for sprite zombies,
+    the push_x / push_y arrays for the zombie engine.
+
+    Attributes (self.):
+        :radius: zombies closer than this (pixels) push each other
+        :strength: maximum length of a push (pixels per step): separation weight * zombie speed
+        :max_neighbours: neighbours taken into account per zombie
+        :budget: number of zombies whose push is recomputed per step
+        :cursor: position of the round robin in the zombie list
+        :last_computed: number of pushes recomputed in the last step
+    """
+
+    def __init__(self, game_settings):
+        self.radius = game_settings.separation_radius
+        self.strength = game_settings.separation_weight * game_settings.zombie_speed
+        self.max_neighbours = game_settings.separation_max_neighbours
+        self.budget = game_settings.separation_budget
+        self.cursor = 0
+        self.last_computed = 0
+        self.row_span = 1 << 16  # larger than the number of rows of any map, negative rows stay in their column
+
+    def update(self, zombies, zombie_engine=None):
+        """recompute the push of the next budget zombies"""
+        if zombie_engine is None:
+            sprites = zombies.sprites()
+            xs = [zombie.rect.centerx for zombie in sprites]
+            ys = [zombie.rect.centery for zombie in sprites]
+            for i, push in self.compute(xs, ys):
+                sprites[i].separation = push
+        else:
+            n = zombie_engine.count
+            xs = zombie_engine.x[:n].tolist()
+            ys = zombie_engine.y[:n].tolist()
+            push_x, push_y = zombie_engine.push_x, zombie_engine.push_y
+            for i, push in self.compute(xs, ys):
+                push_x[i], push_y[i] = push
+
+    def compute(self, xs, ys):
+        """
+        :return: generator of (index, (push x, push y)) for the next budget positions of xs, ys
+        """
+        count = len(xs)
+        if count == 0:
+            self.last_computed = 0
+            return
+
+        # grid of the positions, cell size = radius, a cell is keyed by column * row_span + row
+        radius = self.radius
+        row_span = self.row_span
+        keys = [int(x // radius) * row_span + int(y // radius) for x, y in zip(xs, ys)]
+        cells = {}
+        for i, key in enumerate(keys):
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [i]
+            else:
+                cell.append(i)
+
+        if self.cursor >= count:
+            self.cursor = 0
+        first = self.cursor
+        computed = min(count, self.budget)
+        self.cursor = (first + computed) % count
+        self.last_computed = computed
+
+        radius_squared = radius * radius
+        max_neighbours = self.max_neighbours
+        around = (0, -row_span, row_span, -1, 1, -row_span - 1, row_span - 1, -row_span + 1, row_span + 1)
+        empty = ()
+        for k in range(first, first + computed):
+            i = k % count
+            x, y = xs[i], ys[i]
+            key = keys[i]
+            push_x = push_y = 0.0
+            found = 0
+            for offset in around:
+                for j in cells.get(key + offset, empty):
+                    if j == i:
+                        continue
+                    dx = x - xs[j]
+                    dy = y - ys[j]
+                    distance_squared = dx * dx + dy * dy
+                    if distance_squared >= radius_squared:
+                        continue
+                    if distance_squared == 0:
+                        # same position: split them in a direction given by their order
+                        dx, dy = math.cos(i - j), math.sin(i - j)
+                        distance = 1.0
+                    else:
+                        distance = math.sqrt(distance_squared)
+                    # closer neighbours push harder, 1 when touching, 0 at radius
+                    weight = (1 - distance / radius) / distance
+                    push_x += dx * weight
+                    push_y += dy * weight
+                    found += 1
+                    if found >= max_neighbours:
+                        break
+                if found >= max_neighbours:
+                    break
+
+            length = math.hypot(push_x, push_y)
+            if length > 1:
+                push_x /= length
+                push_y /= length
+            yield i, (push_x * self.strength, push_y * self.strength)
+
+
+if __name__ == '__main__':
+    # time one step of separation for large crowds stacked near the player
+    import time
+    import random
+    from setting import Settings
+
+    game_settings = Settings()
+    separation = CrowdSeparation(game_settings)
+    for zombie_count in (100, 1000, 2000, 5000):
+        xs = [random.gauss(683, 60) for i in range(zombie_count)]
+        ys = [random.gauss(384, 60) for i in range(zombie_count)]
+        repeat = 50
+        start = time.perf_counter()
+        for r in range(repeat):
+            for i, push in separation.compute(xs, ys):
+                pass
+        print('%5d zombies: %.3f ms per step (%d pushes recomputed)' % (zombie_count, (time.perf_counter() - start) * 1000 / repeat, separation.last_computed))
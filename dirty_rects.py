@@ -0,0 +1,148 @@
+import pygame
+from setting import Settings
+
+
+class DirtyRectRenderer:
+    """
+    Dirty rectangle rendering of the game screen: only the parts of the screen that changed are redrawn
+    and sent to the display, instead of blitting the whole background and flipping every frame.
+
+    Each frame, begin_frame() restores the background under the rects drawn in the previous frame
+    (this erases every entity, they are all drawn again), the entities are drawn and their blit methods
+    return the rects they touched, then present() sends the previous and current rects to
+    pygame.display.update(). Two overlapping rects are merged into their union only when the union is
+    not much larger than the two rects (max_merge_waste): the player, its bullets and a zombie next
+    to the HUD strip are not turned into one box covering half the screen. If the rects drawn cover
+    more than full_flip_coverage of the screen (measured on the rects as drawn, before merging), or
+    if there are more than max_rects of them (e.g. thousands of zombies), updating them one by one
+    costs more than a flip: the whole screen is redrawn and flipped instead.
+
+    After the screen was drawn over by something else (pause menu, window exposed), invalidate()
+    makes the next frame a full redraw.
+
+    Attributes (self.):
+        :enabled: dirty rects used, if False update_screen() blits the background and flips every frame
+        :full_flip_coverage: fraction of the screen above which a full flip is used
+        :max_rects: number of rects drawn in a frame above which a full flip is used (merging them would cost too much)
+        :max_merge_waste: two rects are merged if their union is at most this many times their added areas
+        :previous: merged rects drawn in the last frame, restored at the next begin_frame()
+        :previous_area: area of the rects drawn in the last frame, before merging
+        :full_redraw: the next frame redraws the whole screen
+        :blitted: pixels blitted in the last frame (background restored and entities drawn)
+        :updated: pixels sent to the display in the last frame
+        :frames, full_flips, total_blitted: counters of the session
+    """
+
+    def __init__(self, enabled, full_flip_coverage, max_rects, max_merge_waste):
+        self.enabled = enabled
+        self.full_flip_coverage = full_flip_coverage
+        self.max_rects = max_rects
+        self.max_merge_waste = max_merge_waste
+        self.previous = []
+        self.previous_area = 0
+        self.full_redraw = True
+        self.blitted = 0
+        self.updated = 0
+        self.frames = 0
+        self.full_flips = 0
+        self.total_blitted = 0
+
+    def invalidate(self):
+        """the screen no longer shows the last frame: redraw everything in the next frame"""
+        self.full_redraw = True
+
+    @staticmethod
+    def area(rects):
+        return sum(rect.width * rect.height for rect in rects)
+
+    @staticmethod
+    def merge(rects, max_waste):
+        """
+        :return: list of rects covering rects, where two overlapping rects are replaced by their union
+        if its area is at most max_waste times their added areas (the others are kept, even if they overlap)
+        """
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            index = 0
+            while index < len(merged):
+                other = merged[index]
+                union = rect.union(other)
+                if rect.colliderect(other) and union.width * union.height <= max_waste * (rect.width * rect.height + other.width * other.height):
+                    # the union may now overlap rects already checked: check them again
+                    rect = union
+                    del merged[index]
+                    index = 0
+                else:
+                    index += 1
+            merged.append(rect)
+        return merged
+
+    def begin_frame(self, screen, background):
+        """erase the last frame: restore the background under its rects, or everywhere for a full redraw"""
+        screen_rect = screen.get_rect()
+        screen_area = screen_rect.width * screen_rect.height
+        if self.full_redraw or len(self.previous) > self.max_rects or self.previous_area > self.full_flip_coverage * screen_area:
+            self.full_redraw = True
+            screen.blit(background, (0, 0))
+            self.blitted = screen_area
+        else:
+            for rect in self.previous:
+                screen.blit(background, rect, rect)
+            self.blitted = self.area(self.previous)
+
+    def present(self, screen, rects):
+        """
+        Send the frame to the display
+        :param rects: rects drawn in this frame (None for entities that drew nothing)
+        """
+        screen_rect = screen.get_rect()
+        drawn = [rect.clip(screen_rect) for rect in rects if rect is not None]
+        drawn = [rect for rect in drawn if rect]
+        drawn_area = self.area(drawn)
+        self.blitted += drawn_area
+        if len(drawn) > self.max_rects:
+            self.full_redraw = True
+            current = drawn
+        else:
+            current = self.merge(drawn, self.max_merge_waste)
+
+        screen_area = screen_rect.width * screen_rect.height
+        if not self.full_redraw:
+            if drawn_area > self.full_flip_coverage * screen_area:
+                self.full_redraw = True
+            else:
+                dirty = self.merge(self.previous + current, self.max_merge_waste)
+                self.updated = self.area(dirty)
+        if self.full_redraw:
+            pygame.display.flip()
+            self.updated = screen_area
+            self.full_flips += 1
+            self.full_redraw = False
+        else:
+            pygame.display.update(dirty)
+
+        self.previous = current
+        self.previous_area = drawn_area
+        self.frames += 1
+        self.total_blitted += self.blitted
+
+    def reset_stats(self):
+        self.frames = 0
+        self.full_flips = 0
+        self.total_blitted = 0
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'full_flips': self.full_flips,
+            'last_blitted': self.blitted,
+            'last_updated': self.updated,
+            'mean_blitted': self.total_blitted / self.frames if self.frames else 0.0,
+        }
+
+
+# the renderer of the game screen
+_settings = Settings()
+dirty_renderer = DirtyRectRenderer(_settings.dirty_rects_enabled, _settings.dirty_rect_full_flip_coverage,
+                                   _settings.dirty_rect_max_rects, _settings.dirty_rect_max_merge_waste)
@@ -1,8 +1,11 @@
 import pygame
 from pygame.sprite import Sprite
-import random
+from game_random import game_random
 import math
 from setting import Settings
+from asset_manager import assets
+from object_pool import ObjectPool
+from timing_wheel import timers
 
 
 class FirstAidPack(Sprite):
@@ -10,16 +13,32 @@ class FirstAidPack(Sprite):
 
     def __init__(self, zombie):
         super().__init__()
+        self.reset(zombie)
+
+    def reset(self, zombie):
+        """drop the item near zombie (also used when the item is reused by the pool)"""
         self.screen = zombie.screen
-        self.image = pygame.image.load(self.game_settings.first_aid_pack_image_path)
+        self.image = assets.image(self.game_settings.first_aid_pack_image_path)
         self.rect = self.image.get_rect()
-        self.rect.centerx = zombie.rect.centerx + random.randint(-50, 50)
-        self.rect.centery = zombie.rect.centery + random.randint(-50, 50)
+        self.rect.centerx = zombie.rect.centerx + game_random.randint(-50, 50)
+        self.rect.centery = zombie.rect.centery + game_random.randint(-50, 50)
         self.pack_life = self.game_settings.first_aid_pack_life
-        self.heal_amount = random.randint(self.game_settings.first_aid_min_amount, self.game_settings.first_aid_min_amount)
+        self.expiry = None  # end of the lifetime on the timing wheel, scheduled by drop()
+        self.heal_amount = game_random.randint(self.game_settings.first_aid_min_amount, self.game_settings.first_aid_min_amount)
+
+    def drop(self, group):
+        """add the pack to group, it is removed when its lifetime (in steps) is over"""
+        group.add(self)
+        self.expiry = timers.schedule(self.pack_life, self.expire)
+
+    def expire(self):
+        """end of the lifetime (timing wheel callback)"""
+        self.kill()
+        self.pool.release(self)
 
     def blit_pack(self):
-        self.screen.blit(self.image, self.rect)
+        return self.screen.blit(self.image, self.rect)
+
 
-    def update(self):
-        self.pack_life -= 1
+# pool of reusable first aid packs
+FirstAidPack.pool = ObjectPool(FirstAidPack)
@@ -0,0 +1,63 @@
+class FixedTimestep:
+    """
+    Convert the real time between rendered frames into a whole number of fixed simulation steps.
+
+    The simulation always advances by step_ms (e.g. 1/60 s), so movement, lifetimes and speeds
+    measured in steps give the same game speed whatever the rendering frame rate is.
+    Time not consumed by a whole step is kept in the accumulator for the next frame, and its
+    fraction of a step (alpha) is used to interpolate positions when rendering.
+
+    If rendering falls far behind (e.g. after a long pause), at most max_steps steps are run
+    per frame and the rest of the delay is dropped, so the game does not freeze catching up.
+
+    Attributes (self.):
+        :step_ms: duration of one simulation step, in ms
+        :max_steps: maximum number of simulation steps per rendered frame
+        :accumulator: real time (ms) not simulated yet
+        :last_time: time of the previous advance() call
+        :dropped_ms: total time dropped by the catch-up cap
+    """
+
+    def __init__(self, step_ms, max_steps):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.accumulator = 0
+        self.last_time = None
+        self.dropped_ms = 0
+
+    def reset(self, now):
+        """restart counting from now, one step is due immediately"""
+        self.last_time = now
+        self.accumulator = self.step_ms
+
+    def advance(self, now):
+        """
+        Add the time elapsed since the last call
+        :return: number of simulation steps to run before rendering this frame
+        """
+        if self.last_time is None:
+            self.reset(now)
+        else:
+            self.accumulator += now - self.last_time
+            self.last_time = now
+
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            self.dropped_ms += (steps - self.max_steps) * self.step_ms
+            steps = self.max_steps
+            self.accumulator = self.step_ms * steps
+
+        self.accumulator -= steps * self.step_ms
+        return steps
+
+    def alpha(self):
+        """fraction of a step elapsed since the last simulation step, in [0, 1)"""
+        return self.accumulator / self.step_ms
+
+
+def interpolation_offset(previous, current, alpha):
+    """
+    Offset to add to the current position to draw an entity at previous + (current - previous) * alpha
+    :return: (x offset, y offset), rounded to pixels
+    """
+    return round((current[0] - previous[0]) * (alpha - 1)), round((current[1] - previous[1]) * (alpha - 1))
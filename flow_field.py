@@ -0,0 +1,266 @@
+import math
+import time
+import heapq
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only used by the zombie engine
+    np = None
+
+
+class FlowField:
+    """
+    Direction field shared by all zombies to walk to the player around map obstacles.
+
+    The map (the screen, the spawn area and a margin) is divided into square cells. When the player
+    moves into another cell, the field is rebuilt from the player's cell, once for all zombies:
+        1. line of sight: a cell sees the player's cell if the cells between them toward the player
+           see it and are not blocked (propagated ring by ring, no ray casting)
+        2. distance map: Dijkstra from the player's cell over the free cells (8 neighbours,
+           no corner cutting), only needed if the map has obstacles
+        3. each cell without line of sight stores the angle to its closest neighbour (to the player)
+    A zombie then gets its heading in O(1) with angle(x, y): None if it sees the player (it walks
+    straight to the player, as without a field), else the angle stored in its cell.
+    The cost of a rebuild depends on the number of cells, not on the number of zombies.
+
+    Angles use the convention of Zombie.angle: the angle (degrees) of the vector from the target
+    to the zombie, the zombie moves in the opposite direction.
+
+    Attributes (self.):
+        :cell_size: width and height of a cell, in pixels
+        :origin_x, origin_y: map coordinate of the top-left corner of cell (0, 0)
+        :columns, rows: size of the grid
+        :blocked: per cell (index row * columns + column), True if an obstacle covers it
+        :links: per cell, list of (neighbour index, cost, angle to the neighbour) of the moves allowed
+            from the cell, computed once when the obstacles change (None until then)
+        :distance: per cell, path length (in cells) to the player's cell, inf if unreachable
+        :angles: per cell, heading angle, or None if the cell sees the player (or cannot reach them)
+        :goal: (column, row) of the player's cell when the field was built, None before the first build
+        :version: incremented at each rebuild
+        :rebuilds, rebuild_ms: number of rebuilds and time of the last one
+    """
+    neighbours = ((1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+                  (1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)))
+
+    def __init__(self, game_settings, obstacles=None):
+        self.cell_size = game_settings.flow_field_cell_size
+
+        # cover the screen and the spawn area around it
+        margin = 2 * game_settings.spawn_distance + game_settings.flow_field_margin
+        self.origin_x = -margin
+        self.origin_y = -margin
+        self.columns = (game_settings.screen_width + 2 * margin) // self.cell_size + 1
+        self.rows = (game_settings.screen_height + 2 * margin) // self.cell_size + 1
+
+        cell_count = self.columns * self.rows
+        self.blocked = [False] * cell_count
+        self.obstacle_count = 0
+        self.links = None
+        self.distance = [math.inf] * cell_count
+        self.angles = [None] * cell_count
+        self.goal = None
+        self.version = 0
+        self.rebuilds = 0
+        self.rebuild_ms = 0.0
+        self.angle_array = None  # numpy copy of self.angles for the zombie engine (nan: straight to the player)
+        self.angle_array_version = -1
+
+        if obstacles is None:
+            obstacles = game_settings.map_obstacles
+        for rect in obstacles:
+            self.add_obstacle(rect)
+
+    def cell(self, x, y):
+        """:return: (column, row) of the cell containing map coordinate (x, y), may be outside the grid"""
+        return int((x - self.origin_x) // self.cell_size), int((y - self.origin_y) // self.cell_size)
+
+    def add_obstacle(self, rect):
+        """
+        Block every cell overlapped by rect (x, y, width, height), the field is rebuilt at the next update()
+        """
+        x, y, width, height = rect
+        first_column, first_row = self.cell(x, y)
+        last_column, last_row = self.cell(x + width - 1, y + height - 1)
+        for row in range(max(0, first_row), min(self.rows, last_row + 1)):
+            for column in range(max(0, first_column), min(self.columns, last_column + 1)):
+                index = row * self.columns + column
+                if not self.blocked[index]:
+                    self.blocked[index] = True
+                    self.obstacle_count += 1
+        self.links = None
+        self.goal = None
+
+    def update(self, player):
+        """rebuild the field if the player moved into another cell since the last build"""
+        goal = self.cell(player.rect.centerx, player.rect.centery)
+        goal = min(max(goal[0], 0), self.columns - 1), min(max(goal[1], 0), self.rows - 1)
+        if goal != self.goal:
+            self.build(goal)
+
+    def build(self, goal):
+        start = time.perf_counter()
+        self.goal = goal
+        if self.obstacle_count:
+            if self.links is None:
+                self.links = self.compute_links()
+            visible = self.line_of_sight(goal)
+            self.compute_distance(goal)
+            self.compute_angles(visible)
+        # else: every cell sees the player, self.angles stays None everywhere
+        self.version += 1
+        self.rebuilds += 1
+        self.rebuild_ms = (time.perf_counter() - start) * 1000
+
+    def line_of_sight(self, goal):
+        """
+        :return: per cell, True if the cell sees the goal cell. A cell depends on its neighbours
+            toward the goal, which are one ring closer, so the rings are processed from the goal outward
+        """
+        columns = self.columns
+        blocked = self.blocked
+        visible = [False] * len(blocked)
+        goal_column, goal_row = goal
+        visible[goal_row * columns + goal_column] = True
+
+        for ring in range(1, max(columns, self.rows)):
+            for column, row in self.ring_cells(goal, ring):
+                index = row * columns + column
+                if blocked[index]:
+                    continue
+                d_column = column - goal_column
+                d_row = row - goal_row
+                step_column = (d_column < 0) - (d_column > 0)  # one cell toward the goal
+                step_row = (d_row < 0) - (d_row > 0)
+                toward = index + step_row * columns + step_column  # diagonal (or straight) neighbour toward the goal
+
+                if abs(d_column) > abs(d_row):
+                    visible[index] = visible[index + step_column] and (d_row == 0 or visible[toward])
+                elif abs(d_row) > abs(d_column):
+                    visible[index] = visible[index + step_row * columns] and (d_column == 0 or visible[toward])
+                else:
+                    visible[index] = (visible[toward] and not blocked[index + step_column]
+                                      and not blocked[index + step_row * columns])
+        return visible
+
+    def ring_cells(self, center, ring):
+        """:return: generator of the cells of the grid at Chebyshev distance ring from center"""
+        center_column, center_row = center
+        top, bottom = center_row - ring, center_row + ring
+        left, right = max(0, center_column - ring), min(self.columns - 1, center_column + ring)
+        for row in (top, bottom):
+            if 0 <= row < self.rows:
+                for column in range(left, right + 1):
+                    yield column, row
+        for column in (center_column - ring, center_column + ring):
+            if 0 <= column < self.columns:
+                for row in range(max(0, top + 1), min(self.rows - 1, bottom - 1) + 1):
+                    yield column, row
+
+    def compute_links(self):
+        """
+        :return: per cell, the moves to the 8 neighbours as (neighbour index, cost, angle),
+            diagonal moves only between two free orthogonal neighbours (no corner cutting)
+        """
+        columns, rows = self.columns, self.rows
+        blocked = self.blocked
+        links = []
+        for index in range(len(blocked)):
+            row, column = divmod(index, columns)
+            cell_links = []
+            if not blocked[index]:
+                for d_column, d_row, cost in self.neighbours:
+                    next_column = column + d_column
+                    next_row = row + d_row
+                    if not (0 <= next_column < columns and 0 <= next_row < rows):
+                        continue
+                    next_index = next_row * columns + next_column
+                    if blocked[next_index]:
+                        continue
+                    if d_column and d_row and (blocked[index + d_column] or blocked[index + d_row * columns]):
+                        continue
+                    cell_links.append((next_index, cost, math.degrees(math.atan2(-d_row, -d_column))))
+            links.append(cell_links)
+        return links
+
+    def compute_distance(self, goal):
+        """Dijkstra from the goal cell over the links"""
+        links = self.links
+        distance = [math.inf] * len(links)
+        goal_index = goal[1] * self.columns + goal[0]
+        distance[goal_index] = 0.0
+        queue = [(0.0, goal_index)]
+
+        while queue:
+            cell_distance, index = heapq.heappop(queue)
+            if cell_distance > distance[index]:
+                continue
+            for next_index, cost, angle in links[index]:
+                next_distance = cell_distance + cost
+                if next_distance < distance[next_index]:
+                    distance[next_index] = next_distance
+                    heapq.heappush(queue, (next_distance, next_index))
+        self.distance = distance
+
+    def compute_angles(self, visible):
+        """each cell without line of sight heads to its neighbour closest to the goal"""
+        distance = self.distance
+        angles = [None] * len(distance)
+
+        for index, cell_links in enumerate(self.links):
+            if visible[index]:
+                continue  # straight to the player, also for blocked and unreachable cells (no neighbour is closer)
+            best_distance = distance[index]
+            for next_index, cost, angle in cell_links:
+                if distance[next_index] < best_distance:
+                    best_distance = distance[next_index]
+                    angles[index] = angle
+        self.angles = angles
+
+    def angle(self, x, y):
+        """
+        Heading of a zombie at map coordinate (x, y), O(1)
+        :return: angle in degrees (convention of Zombie.angle), or None if the zombie should walk straight to the player
+        """
+        column = int((x - self.origin_x) // self.cell_size)
+        row = int((y - self.origin_y) // self.cell_size)
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return self.angles[row * self.columns + column]
+        return None
+
+    def angles_at(self, x, y):
+        """
+        Vectorized angle() for numpy arrays of coordinates (zombie engine)
+        :return: array of angles in degrees, nan where the zombie should walk straight to the player
+        """
+        if self.angle_array_version != self.version:
+            self.angle_array = np.array([np.nan if angle is None else angle for angle in self.angles])
+            self.angle_array_version = self.version
+
+        column = ((x - self.origin_x) // self.cell_size).astype(np.intp)
+        row = ((y - self.origin_y) // self.cell_size).astype(np.intp)
+        inside = (column >= 0) & (column < self.columns) & (row >= 0) & (row < self.rows)
+        result = np.full(len(x), np.nan)
+        result[inside] = self.angle_array[row[inside] * self.columns + column[inside]]
+        return result
+
+
+if __name__ == '__main__':
+    # time a rebuild of the field on a map with obstacles, and the sampling of many positions
+    import random
+    from setting import Settings
+
+    game_settings = Settings()
+    game_settings.map_obstacles = [(300, 200, 40, 360), (900, 100, 300, 40), (600, 500, 400, 40), (1000, 300, 40, 200)]
+    field = FlowField(game_settings)
+
+    repeat = 50
+    start = time.perf_counter()
+    for i in range(repeat):
+        field.build((i % field.columns, (i * 7) % field.rows))
+    print('%d x %d cells: %.2f ms per rebuild' % (field.columns, field.rows, (time.perf_counter() - start) * 1000 / repeat))
+
+    positions = [(random.uniform(0, game_settings.screen_width), random.uniform(0, game_settings.screen_height)) for i in range(10000)]
+    start = time.perf_counter()
+    for x, y in positions:
+        field.angle(x, y)
+    print('%.3f us per sample' % ((time.perf_counter() - start) * 1000000 / len(positions)))
@@ -0,0 +1,137 @@
+import time
+from collections import deque
+import pygame
+from setting import Settings
+from phase_timer import phase_timer
+from asset_manager import assets
+
+
+class FrameProfiler:
+    """
+    In-game overlay showing where the time of the last frames went (toggled with F3).
+
+    While enabled, the profiler listens to phase_timer and keeps ring buffers of the time spent in each
+    phase of the game loop per frame, and of the frame times (time between two displayed frames).
+    The overlay shows the p50/p95/p99 frame times, a graph of the recent frame times, the average
+    and maximum time of each phase (display.flip included) and the number of entities of each group.
+    The panel is only redrawn every refresh_frames frames, in between the same surface is blitted.
+    When disabled, it is not registered to phase_timer, update_screen() only tests self.enabled.
+
+    Attributes (self.):
+        :enabled: overlay shown and timings recorded
+        :history: number of frames kept in the ring buffers
+        :refresh_frames: the panel is rendered again every refresh_frames frames
+        :phases: phase -> ring buffer of the time (ms) spent in the phase in each frame
+        :frame_times: ring buffer of frame times (ms)
+        :counts: entity count of each group in the last frame
+        :panel: rendered overlay, None until the first refresh
+    """
+    graph_height = 60
+    columns = (10, 170, 250)  # x of the columns of the phase table
+    graph_scale_ms = 50  # frame time at the top of the graph
+    target_frame_ms = 1000 / 60  # line drawn on the graph
+
+    def __init__(self, history, refresh_frames):
+        self.enabled = False
+        self.history = history
+        self.refresh_frames = refresh_frames
+        self.phases = {}
+        self.frame_times = deque(maxlen=history)
+        self.counts = {}
+        self.current = {}
+        self.last_frame_end = None
+        self.frames_until_refresh = 0
+        self.panel = None
+        self.font = None
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def enable(self):
+        self.enabled = True
+        self.phases.clear()
+        self.frame_times.clear()
+        self.current.clear()
+        self.last_frame_end = None
+        self.frames_until_refresh = 0
+        phase_timer.add_listener(self.record_phase)
+
+    def disable(self):
+        self.enabled = False
+        phase_timer.remove_listener(self.record_phase)
+
+    def record_phase(self, phase, start, end):
+        """phase_timer listener, phases running several times in a frame (simulation steps) are summed"""
+        self.current[phase] = self.current.get(phase, 0.0) + (end - start) * 1000
+
+    def end_frame(self, counts):
+        """
+        A frame was displayed: push its timings into the ring buffers
+        :param counts: group name -> number of entities
+        """
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.frame_times.append((now - self.last_frame_end) * 1000)
+        self.last_frame_end = now
+
+        for phase, ms in self.current.items():
+            if phase not in self.phases:
+                self.phases[phase] = deque(maxlen=self.history)
+            self.phases[phase].append(ms)
+        self.current.clear()
+        self.counts = counts
+
+    def draw(self, screen):
+        """blit the overlay, the panel is rebuilt every refresh_frames frames, :return: Rect of the screen drawn"""
+        if self.frames_until_refresh <= 0 or self.panel is None:
+            self.panel = self.render_panel()
+            self.frames_until_refresh = self.refresh_frames
+        self.frames_until_refresh -= 1
+        return screen.blit(self.panel, (10, 10))
+
+    def frame_percentiles(self):
+        """:return: p50, p95, p99 of the frame times in the ring buffer (ms)"""
+        values = sorted(self.frame_times)
+        if not values:
+            return 0.0, 0.0, 0.0
+        return tuple(values[min(len(values) - 1, int(fraction * len(values)))] for fraction in (0.50, 0.95, 0.99))
+
+    def render_panel(self):
+        if self.font is None:
+            self.font = assets.font(None, 20)
+        line_height = self.font.get_linesize()
+        width = max(self.history, 330) + 20
+
+        # each line is a tuple of cells, drawn at self.columns
+        lines = []
+        p50, p95, p99 = self.frame_percentiles()
+        lines.append(('frame  p50 %.1f  p95 %.1f  p99 %.1f ms  (%.0f fps)' % (p50, p95, p99, 1000 / p50 if p50 else 0),))
+        lines.append(('phase', 'avg ms', 'max ms'))
+        for phase, values in self.phases.items():
+            lines.append((phase, '%.2f' % (sum(values) / len(values)), '%.2f' % max(values)))
+        lines.append(('  '.join('%s %d' % (name, count) for name, count in self.counts.items()),))
+
+        height = len(lines) * line_height + self.graph_height + 25
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            for x, cell in zip(self.columns, line):
+                panel.blit(self.font.render(cell, True, (255, 255, 255)), (x, 5 + i * line_height))
+
+        # frame time graph, one column per frame, the line is the 60 fps frame time
+        graph_bottom = height - 10
+        for x, frame_ms in enumerate(self.frame_times):
+            bar = min(self.graph_height, int(frame_ms / self.graph_scale_ms * self.graph_height))
+            colour = (90, 220, 90) if frame_ms <= self.target_frame_ms * 1.2 else (230, 70, 70)
+            pygame.draw.line(panel, colour, (10 + x, graph_bottom), (10 + x, graph_bottom - bar))
+        target_y = graph_bottom - int(self.target_frame_ms / self.graph_scale_ms * self.graph_height)
+        pygame.draw.line(panel, (240, 240, 80), (10, target_y), (10 + self.history, target_y))
+        return panel
+
+
+# the profiler overlay of the game screen
+_settings = Settings()
+frame_profiler = FrameProfiler(_settings.profiler_history_frames, _settings.profiler_refresh_frames)
@@ -0,0 +1,30 @@
+class GameClock:
+    """
+    Time seen by the game logic, in ms.
+
+    The clock does not follow the wall clock: it only moves when a simulation step runs
+    (simulation_step() advances it by one step), so the spawn interval, fire rates and attack
+    interval count simulated time. A session runs the same way whether it is rendered at 60 fps,
+    slowed down by a hitch or simulated as fast as possible without a window.
+
+    Attributes (self.):
+        :time: simulated time since reset(), in ms
+    """
+
+    def __init__(self):
+        self.time = 0
+
+    def reset(self, time=0):
+        """start a new session at time (ms)"""
+        self.time = time
+
+    def advance(self, ms):
+        self.time += ms
+
+    def get_ticks(self):
+        """simulated time in whole ms, used in place of pygame.time.get_ticks()"""
+        return int(self.time)
+
+
+# the clock shared by every module of the game logic
+game_clock = GameClock()
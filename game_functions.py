@@ -1,13 +1,29 @@
-from pygame.sprite import Group  # for grouping multiple objects based on pygame.sprite
-from player import Player
 from zombie import *
 from ammo import *
 from first_aid_pack import *
-from player_resources import PlayerResources
+from spatial_hash import SpatialHash
+from projectile_pool import ProjectilePool
+from game_world import GameWorld
+from fixed_timestep import FixedTimestep
+from game_clock import game_clock
+from timing_wheel import timers
+from game_random import game_random
+from phase_timer import phase_timer
+from frame_profiler import frame_profiler
+from dirty_rects import dirty_renderer
+from trace_export import tracer, traced, trace_file_name
+from job_scheduler import scheduler, PRIORITY_SAVE, PRIORITY_WARMUP
+from rotation_cache import rotations
+from asset_manager import assets
+from text_cache import texts
+from menu import MenuLoop
+from replay import ReplayRecorder, MOVE_UP, MOVE_LEFT, MOVE_DOWN, MOVE_RIGHT, KEY_DOWN, MOUSE_DOWN, MOUSE_UP
 from userinfo import User
-from user_registration import *
+from user_registration import ask_new_player_name, ask_player_to_load
 import pickle
+import sys
 import os
+import time
 
 
 def run_game(screen, game_settings, username):
@@ -18,71 +34,134 @@ def run_game(screen, game_settings, username):
         -run the main game loop
         -deal with after-exiting tasks
 
-    :return: Null
-    """
+    The simulation advances in fixed steps of 1 / game_settings.simulation_rate second: each rendered
+    frame runs as many steps as the real time elapsed requires (at most max_simulation_steps),
+    then draws the objects interpolated between their last two positions.
+    If game_settings.render_enabled is False, one step is run per loop iteration without waiting.
 
-    # create objects that will displayed on game main screen
-    background = pygame.image.load(game_settings.background_path).convert_alpha()
+    If game_settings.replay_record_path is set, the session is recorded to this replay file.
+    After each frame, the background jobs (job_scheduler) run in the time left in the frame budget.
 
-    # create Group() objects to store game objects shown on screen
-    bullets = Group()
-    zombies = Group()
-    last_spawn_time = pygame.time.get_ticks()  # record zombie spawn time
-    dead_zombies = Group()
-    ammos = Group()
-    first_aid_packs = Group()
+    :return: Null
+    """
 
-    # player object
-    player_resources = PlayerResources(game_settings)
-    player = Player(screen, game_settings, bullets, player_resources)
+    # create every object of the game session
+    world = GameWorld(screen, game_settings, username, game_settings.session_seed)
+    if game_settings.replay_record_path is not None:
+        world.recorder = ReplayRecorder(game_settings.replay_record_path, world)
 
-    # controls game fps
+    # controls rendering fps and simulation steps
     clock = pygame.time.Clock()
+    timestep = FixedTimestep(1000 / game_settings.simulation_rate, game_settings.max_simulation_steps)
 
-    # start the main loop of the game
-    while True:
-        # FPS
-        clock.tick(game_settings.FPS)
-
-        # check event
-        check_events(player, bullets, game_settings, screen, username)
-
-        # generate zombies
-        last_spawn_time = spawn_zombies(zombies, player, game_settings, screen, last_spawn_time)
-
-        # delete zombies and bullets when zombie is shot by bullet
-        shoot_zombie(zombies, bullets, dead_zombies, player, ammos, first_aid_packs)
-
-        # zombie attack player
-        attack_player(zombies, player)
-
-        # player get item
-        player_get_item(player, ammos, first_aid_packs)
-
-        # update game objects
-        player.update()  # player's rotation and position
-        zombies.update()  # zombie's rotation and position
-        dead_zombies.update()  # decrease remaining frames of corpse display
-        bullets.update()  # bullets' rotation and position
-        ammos.update()  # decrease remaining frames of ammos
-        first_aid_packs.update()  # decrease remaining frames of first-aid-pack
+    # rotate the zombie images in the spare time of the first frames instead of when zombies first turn
+    if game_settings.render_enabled:
+        zombie_images = [assets.image(game_settings.zombie_image_path), assets.image(game_settings.zombie_attack_image_path)]
+        scheduler.add(rotations.prewarm_job(zombie_images), PRIORITY_WARMUP, 'rotation warmup')
 
-        # update screen
-        update_screen(background, player, zombies, screen, bullets, dead_zombies, ammos, first_aid_packs)
+    # start the main loop of the game
+    try:
+        while True:
+            frame_begin = time.perf_counter()  # the frame is traced as one complete span, F4 may toggle the trace during it
+            if game_settings.render_enabled:
+                # FPS
+                tracer.begin('clock.tick')
+                clock.tick(game_settings.FPS)
+                tracer.end('clock.tick')
+                steps = timestep.advance(pygame.time.get_ticks())
+            else:
+                steps = 1
+            frame_start = time.perf_counter()
+            phase_timer.start()
+
+            # check event
+            if check_events(world.player, world.bullets, game_settings, screen, username, world.input):
+                # the game was paused: the time spent in the menus is not simulated in the next frame
+                timestep.reset(pygame.time.get_ticks())
+            phase_timer.mark('check_events')
+
+            # advance the simulation
+            for step in range(steps):
+                tracer.begin('simulation_step')
+                simulation_step(world)
+                tracer.end('simulation_step')
+                if world.player.hp <= 0:
+                    break
+
+            # update screen
+            if game_settings.render_enabled:
+                alpha = timestep.alpha() if game_settings.interpolate_rendering else None
+                update_screen(world.background, world.player, world.zombies, screen, world.bullets, world.dead_zombies,
+                              world.ammos, world.first_aid_packs, alpha)
+
+            # background jobs, while the frame is under budget
+            scheduler.run(frame_start)
+            phase_timer.mark('jobs')
+            tracer.complete('frame', frame_begin)
+
+            # if player is dead, break the main game loop
+            if world.player.hp <= 0:
+                break
+    finally:
+        # the replay is also completed if the game is quit
+        if world.recorder is not None:
+            world.recorder.close(world)
+        # finish the saves before returning to the menus
+        scheduler.run_all()
+        world.close()
 
-        # if player is dead, break the main game loop
-        if player.hp <= 0:
-            break
 
-        # check how many zombies player killed, increase difficulty
-        if player.zombie_killed > 120:
-            game_settings.spawn_time = 500
-        elif player.zombie_killed > 75:
-            game_settings.spawn_time = 1000
-        elif player.zombie_killed > 25:
-            game_settings.spawn_time = 1500
-        elif player.zombie_killed > 10:
-            game_settings.spawn_time = 2500
+def simulation_step(world):
+    """
+    Advance the game by one fixed step: spawn (the difficulty follows the waves of the spawn director),
+    collisions and movement of every object
+    :param world: GameWorld of the running game
+    """
+    player = world.player
+    zombies = world.zombies
+
+    # simulated time of this step, expired timers: corpses, ammos and packs are removed, reloads complete
+    game_clock.advance(world.step_ms)
+    timers.advance()
+
+    # input given since the last step
+    snapshot = world.next_input()
+    if snapshot is not None:
+        apply_input(player, snapshot)
+    phase_timer.mark('input')
+
+    # generate zombies (waves of the spawn director)
+    world.director.update(zombies, player, world.screen, world.zombie_engine)
+    phase_timer.mark('spawn_zombies')
+
+    # delete zombies and bullets when zombie is shot by bullet
+    world.zombie_grid.build(zombies)
+    shoot_zombie(zombies, world.bullets, world.dead_zombies, player, world.ammos, world.first_aid_packs, world.zombie_grid)
+    phase_timer.mark('shoot_zombie')
+
+    # zombie attack player
+    attack_player(zombies, player, world.zombie_grid)
+    phase_timer.mark('attack_player')
+
+    # player get item
+    world.item_grid.build(world.ammos, world.first_aid_packs)
+    player_get_item(player, world.ammos, world.first_aid_packs, world.item_grid)
+    phase_timer.mark('player_get_item')
+
+    # update game objects
+    player.update()  # player's rotation and position
+    if world.flow_field is not None:
+        world.flow_field.update(player)  # rebuilt only if the player moved into another cell
+    if world.crowd is not None:
+        world.crowd.update(zombies, world.zombie_engine)  # push of the zombies away from their neighbours
+    if world.zombie_engine is None:
+        if world.zombie_lod is not None:
+            world.zombie_lod.begin_step(player)
+        zombies.update(world.flow_field, world.zombie_lod)  # zombie's rotation and position
+    else:
+        world.zombie_engine.update(player, world.flow_field)  # position of all zombies at once
+    world.bullets.update()  # bullets' position (the pool also removes bullets out of screen)
+    phase_timer.mark('update')
 
 
 def check_keydown_events(event, player):
@@ -147,7 +226,7 @@ def is_mouse_in_player(player):
     """
     Check if the mouse is very close to player
     """
-    mouse_position = pygame.mouse.get_pos()
+    mouse_position = player.mouse_position
 
     if mouse_position[0] >= player.updated_rect.left and mouse_position[0] <= player.updated_rect.right and \
             mouse_position[1] >= player.updated_rect.top and mouse_position[1] <= player.updated_rect.bottom:
@@ -183,10 +262,40 @@ def check_mouseup(event, player):
         player.auto_reload_flag = True
 
 
-def check_events(player, bullets, game_settings, screen, username):
+def check_events(player, bullets, game_settings, screen, username, player_input=None):
     """
     Check the broad category and call corresponding methods to do the specific work
+
+    Parameter:
+        player_input: if given (InputState), the mouse position, keyboard and mouse button events are
+                      stored in it and applied by the next simulation step (apply_input()) instead of now
+    :return: True if the game was paused (the pause menu, and the save and settings menus, were shown)
     """
+    paused = False
+    if player_input is not None:
+        player_input.mouse_position = pygame.mouse.get_pos()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sys.exit()
+
+            # Implementation of a pause function:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                pause_game(screen, game_settings, player, username)
+                dirty_renderer.invalidate()  # the menus drew over the game screen
+                paused = True
+            elif event.type == pygame.VIDEOEXPOSE:
+                dirty_renderer.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.toggle()  # display only, not a game input
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                tracer.toggle(trace_file_name())
+            else:
+                player_input.handle_event(event)
+        return paused
+
+    # aim at the mouse
+    player.mouse_position = pygame.mouse.get_pos()
+
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
@@ -197,6 +306,14 @@ def check_events(player, bullets, game_settings, screen, username):
             # Implementation of a pause function:
             if event.key == pygame.K_ESCAPE:
                 pause_game(screen, game_settings, player, username)
+                dirty_renderer.invalidate()  # the menus drew over the game screen
+                paused = True
+
+            # profiler overlay and trace recording
+            if event.key == pygame.K_F3:
+                frame_profiler.toggle()
+            if event.key == pygame.K_F4:
+                tracer.toggle(trace_file_name())
 
         if event.type == pygame.KEYUP:
             check_keyup_events(event, player)
@@ -207,157 +324,380 @@ def check_events(player, bullets, game_settings, screen, username):
         if event.type == pygame.MOUSEBUTTONUP:
             check_mouseup(event, player)
 
+        if event.type == pygame.VIDEOEXPOSE:
+            dirty_renderer.invalidate()
+    return paused
 
-def spawn_zombies(zombies, player, game_settings, screen, last_spawn_time):
-    # if time interval is less than spawn time, do nothing
-    if pygame.time.get_ticks() - last_spawn_time < game_settings.spawn_time:
-        return last_spawn_time
 
-    # if time interval is larger than spawn time, create a new zombie in zombies
-    new_zombie = Zombie(game_settings, screen, player)
-    zombies.add(new_zombie)
+def apply_input(player, snapshot):
+    """
+    Give the input of one simulation step (InputSnapshot) to the player:
+    aiming point, movement keys held, then the key and mouse button presses in order
+    """
+    player.mouse_position = (snapshot.mouse_x, snapshot.mouse_y)
+    player.moving_up = bool(snapshot.keys & MOVE_UP)
+    player.moving_left = bool(snapshot.keys & MOVE_LEFT)
+    player.moving_down = bool(snapshot.keys & MOVE_DOWN)
+    player.moving_right = bool(snapshot.keys & MOVE_RIGHT)
+
+    for kind, code in snapshot.actions:
+        if kind == KEY_DOWN:
+            check_keydown_events(pygame.event.Event(pygame.KEYDOWN, key=code), player)
+        elif kind == MOUSE_DOWN:
+            check_mousedown(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=code), player)
+        elif kind == MOUSE_UP:
+            check_mouseup(pygame.event.Event(pygame.MOUSEBUTTONUP, button=code), player)
+
+
+def shoot_zombie(zombies, bullets, dead_zombies, player, ammos, first_aid_packs, zombie_grid=None):
+    """
+    Check which zombies are hit by bullets, damage them and remove dead zombies and spent bullets
 
-    # return new spawn time
-    return pygame.time.get_ticks()
+    Parameter:
+        bullets: Group of bullet sprites, or ProjectilePool
+        zombie_grid: SpatialHash of zombies built this frame, only zombies sharing a cell with
+            a bullet are tested. If not given, a grid is built here
+    """
+    if zombie_grid is None:
+        zombie_grid = SpatialHash(player.game_settings.collision_cell_size)
+        zombie_grid.build(zombies)
+
+    if isinstance(bullets, ProjectilePool):
+        shoot_zombie_projectiles(zombies, bullets, dead_zombies, player, ammos, first_aid_packs, zombie_grid)
+        return
+
+    spent_damage = player.game_settings.bullet_spent_damage
+
+    if player.game_settings.swept_bullet_collision:
+        for bullet in bullets.sprites():
+            # apply hits in the order the bullet reached the zombies, until the bullet is spent
+            for zombie in swept_bullet_targets(bullet, zombie_grid):
+                bullet.hit_zombies.add(zombie.spawn_id)
+                bullet.damage = hit_zombie(zombie, bullet.damage, bullet.damage == bullet.original_damage, bullet.slow_down_factor,
+                                           zombies, dead_zombies, player, ammos, first_aid_packs)
+                if bullet.damage <= spent_damage:
+                    bullets.remove(bullet)
+                    break
+        return
 
+    for bullet in bullets.sprites():
+        for zombie in zombie_grid.query(bullet.rect):
+            if zombie.hp <= 0:  # already killed by another bullet this frame
+                continue
 
-def shoot_zombie(zombies, bullets, dead_zombies, player, ammos, first_aid_packs):
-    for zombie in zombies.copy().sprites():
-        for bullet in bullets.copy().sprites():
             if zombie.rect.colliderect(bullet.rect) and rect_center_distance(bullet.rect,
                                                                              zombie.rect) <= bullet.game_settings.bullet_awp_damage_distance:
-                # play the hitting sound effect and count hit
-                zombie.hit_channel.play(zombie.zombie_hit_sound)
-                if bullet.damage == bullet.original_damage:
-                    player.zombie_hit += 1
-
-                # decrease zombie's hp and bullet's damage
-                # if bullet damage is zero, remove it
-                zm_hp = zombie.hp
-                zombie.hp -= bullet.damage  # damage zombie
-                zombie.hit_slow_down_factor *= bullet.slow_down_factor  # slow down zombie
-
-                bullet.damage -= zm_hp  # decrease bullet damage and remove weak bullet
-                if bullet.damage <= 20:
+                bullet.damage = hit_zombie(zombie, bullet.damage, bullet.damage == bullet.original_damage, bullet.slow_down_factor,
+                                           zombies, dead_zombies, player, ammos, first_aid_packs)
+                if bullet.damage <= spent_damage:
+                    # bullet is too weak to go through more zombies
                     bullets.remove(bullet)
+                    break
 
-                # check if this zombie died or not
-                if zombie.hp <= 0:
-                    # play death sound and remove zombie from zombies
-                    zombie.hit_channel.play(zombie.zombie_death_sound)
-                    zombies.remove(zombie)
 
-                    # create a new dead zombie and add to dead_zombies
-                    new_dead_zombie = DeadZombie(zombie)
-                    dead_zombies.add(new_dead_zombie)
+def shoot_zombie_projectiles(zombies, projectiles, dead_zombies, player, ammos, first_aid_packs, zombie_grid):
+    """
+    shoot_zombie() for bullets stored in a ProjectilePool.
+    Without swept collision, only the current position of each bullet is tested
+    """
+    game_settings = player.game_settings
+    max_distance = game_settings.bullet_awp_damage_distance
+    swept = game_settings.swept_bullet_collision
+
+    for slot in projectiles.slots():
+        x1 = projectiles.x[slot]
+        y1 = projectiles.y[slot]
+        if swept:
+            x0 = projectiles.previous_x[slot]
+            y0 = projectiles.previous_y[slot]
+        else:
+            x0, y0 = x1, y1
+        hit_zombies = projectiles.hit_zombies[slot]
+        half_width, half_height = projectiles.half_size(slot)
+
+        for zombie in swept_targets(x0, y0, x1, y1, half_width, half_height, max_distance, zombie_grid, hit_zombies):
+            hit_zombies.add(zombie.spawn_id)
+            damage = projectiles.damage[slot]
+            projectiles.damage[slot] = hit_zombie(zombie, damage, damage == projectiles.original_damage[slot], projectiles.slow[slot],
+                                                  zombies, dead_zombies, player, ammos, first_aid_packs)
+            if projectiles.damage[slot] <= game_settings.bullet_spent_damage:
+                projectiles.release(slot)
+                break
 
-                    # update player's kill score
-                    player.zombie_killed += 1
 
-                    # drop ammo
-                    if random.randint(1, 100) <= zombie.game_settings.pistol_ammo_drop_rate:
-                        new_ammo = PistolAmmo(zombie)
-                        ammos.add(new_ammo)
+def hit_zombie(zombie, damage, first_hit, slow_down_factor, zombies, dead_zombies, player, ammos, first_aid_packs):
+    """
+    Apply the damage of a bullet to zombie, kill the zombie if its hp drops to zero
 
-                    if random.randint(1, 100) <= zombie.game_settings.m4_ammo_drop_rate:
-                        new_ammo = M4Ammo(zombie)
-                        ammos.add(new_ammo)
+    Parameter:
+        damage: remaining damage of the bullet
+        first_hit: True if this is the first zombie hit by the bullet (counted for accuracy)
+        slow_down_factor: bullet's slow down factor, multiplied to zombie's speed ratio
+    :return: remaining damage of the bullet
+    """
+    # play the hitting sound effect and count hit
+    zombie.hit_channel.play(zombie.zombie_hit_sound)
+    if first_hit:
+        player.zombie_hit += 1
 
-                    if random.randint(1, 100) <= zombie.game_settings.awp_ammo_drop_rate:
-                        new_ammo = AwpAmmo(zombie)
-                        ammos.add(new_ammo)
+    # decrease zombie's hp and bullet's damage
+    zm_hp = zombie.hp
+    zombie.hp -= damage  # damage zombie
+    zombie.hit_slow_down_factor *= slow_down_factor  # slow down zombie
 
-                    # drop first aid pack
-                    if random.randint(1, 100) <= zombie.game_settings.first_aid_pack_drop_rate:
-                        new_first_aid_pack = FirstAidPack(zombie)
-                        first_aid_packs.add(new_first_aid_pack)
+    # check if this zombie died or not
+    if zombie.hp <= 0:
+        kill_zombie(zombie, zombies, dead_zombies, player, ammos, first_aid_packs)
+
+    return damage - zm_hp
+
+
+def swept_bullet_targets(bullet, zombie_grid):
+    """
+    Find the zombies crossed by the path of a bullet sprite during its last move
+    (segment from bullet.previous_center to bullet.rect.center), see swept_targets()
+    """
+    x0, y0 = bullet.previous_center
+    x1, y1 = bullet.rect.center
+    return swept_targets(x0, y0, x1, y1, bullet.rect.width / 2, bullet.rect.height / 2,
+                         bullet.game_settings.bullet_awp_damage_distance, zombie_grid, bullet.hit_zombies)
+
+
+def swept_targets(x0, y0, x1, y1, half_width, half_height, max_distance, zombie_grid, hit_zombies):
+    """
+    Find the zombies crossed by the segment (x0, y0) - (x1, y1), with the hit test of a bullet standing
+    still applied along the whole path: the rect of the bullet (half size half_width, half_height)
+    overlaps the rect of the zombie, and their centers are at most max_distance apart.
+    So the hit area of a zombie is its rect grown by the bullet's half size, cut by a circle,
+    and the width of the path it hits depends on the weapon's bullet and on its direction.
+    Zombies whose spawn id is in hit_zombies (already hit by the bullet) are skipped: the ids are kept
+    rather than the zombies, as a zombie reused by the pool is a new target.
+
+    :return: list of zombies, sorted by the distance the bullet traveled before entering their hit area
+    """
+    dx = x1 - x0
+    dy = y1 - y0
+    length_square = dx * dx + dy * dy
+
+    # broad-phase: zombies near the bounding box of the path (hit areas are inside the circle)
+    area = pygame.Rect(min(x0, x1) - max_distance, min(y0, y1) - max_distance,
+                       abs(dx) + 2 * max_distance, abs(dy) + 2 * max_distance)
+
+    targets = []
+    for zombie in zombie_grid.query(area):
+        if zombie.hp <= 0 or zombie.spawn_id in hit_zombies:
+            continue
+
+        # part [enter, leave] of the path (0: start, 1: end) inside the grown rect of the zombie, axis by axis
+        fx = zombie.rect.centerx - x0
+        fy = zombie.rect.centery - y0
+        enter, leave = 0, 1
+        for f, d, extent in ((fx, dx, zombie.rect.width / 2 + half_width), (fy, dy, zombie.rect.height / 2 + half_height)):
+            if d == 0:
+                if abs(f) >= extent:  # touching rects do not collide
+                    enter, leave = 1, 0
+                    break
+            else:
+                near, far = sorted(((f - extent) / d, (f + extent) / d))
+                enter = max(enter, near)
+                leave = min(leave, far)
+        if enter > leave:
+            continue
+
+        # part of the path inside the circle of max_distance around the zombie's center
+        if length_square == 0:
+            if fx * fx + fy * fy > max_distance * max_distance:
+                continue
+        else:
+            closest = (fx * dx + fy * dy) / length_square
+            distance_square = (fx - closest * dx) ** 2 + (fy - closest * dy) ** 2
+            if distance_square > max_distance * max_distance:
+                continue
+            half_chord = math.sqrt((max_distance * max_distance - distance_square) / length_square)
+            enter = max(enter, closest - half_chord)
+            leave = min(leave, closest + half_chord)
+            if enter > leave:
+                continue
+        targets.append((enter, zombie))
+
+    targets.sort(key=lambda target: target[0])
+    return [target[1] for target in targets]
+
+
+def kill_zombie(zombie, zombies, dead_zombies, player, ammos, first_aid_packs):
+    """
+    Remove a dead zombie, show its death animation and drop items
+    """
+    # play death sound and remove zombie from zombies
+    zombie.hit_channel.play(zombie.zombie_death_sound)
+    zombies.remove(zombie)
+
+    # create a new dead zombie and add to dead_zombies, it is removed when its animation ends
+    new_dead_zombie = DeadZombie.pool.acquire(zombie)
+    new_dead_zombie.drop(dead_zombies)
+
+    # update player's kill score
+    player.zombie_killed += 1
+
+    # drop ammo
+    if game_random.randint(1, 100) <= zombie.game_settings.pistol_ammo_drop_rate:
+        new_ammo = PistolAmmo.pool.acquire(zombie)
+        new_ammo.drop(ammos)
+
+    if game_random.randint(1, 100) <= zombie.game_settings.m4_ammo_drop_rate:
+        new_ammo = M4Ammo.pool.acquire(zombie)
+        new_ammo.drop(ammos)
+
+    if game_random.randint(1, 100) <= zombie.game_settings.awp_ammo_drop_rate:
+        new_ammo = AwpAmmo.pool.acquire(zombie)
+        new_ammo.drop(ammos)
+
+    # drop first aid pack
+    if game_random.randint(1, 100) <= zombie.game_settings.first_aid_pack_drop_rate:
+        new_first_aid_pack = FirstAidPack.pool.acquire(zombie)
+        new_first_aid_pack.drop(first_aid_packs)
+
+    # the zombie can be reused for a later spawn
+    zombie.pool.release(zombie)
 
 
 def rect_center_distance(rect_a, rect_b):
     return math.sqrt(pow((rect_a.centerx - rect_b.centerx), 2) + pow((rect_a.centery - rect_b.centery), 2))
 
 
-def attack_player(zombies, player):
-    for zombie in zombies.sprites():
-        if zombie.rect.colliderect(
-                player.rect) and pygame.time.get_ticks() - zombie.last_attacking_time >= player.game_settings.zombie_attack_interval:
+def attack_player(zombies, player, zombie_grid=None):
+    """
+    Zombies touching the player attack (if their attack interval has passed)
+
+    Parameter:
+        zombie_grid: SpatialHash of zombies, only zombies near the player are tested if given
+    """
+    if zombie_grid is None:
+        candidates = zombies.sprites()
+    else:
+        candidates = zombie_grid.query(player.rect)
+
+    for zombie in candidates:
+        if zombie.hp > 0 and zombie.rect.colliderect(
+                player.rect) and game_clock.get_ticks() - zombie.last_attacking_time >= player.game_settings.zombie_attack_interval:
             # attack player
             zombie.attack_player(player)
 
 
-def update_screen(background, player, zombies, screen, bullets, dead_zombies, pistol_ammos, first_aid_packs):
+def update_screen(background, player, zombies, screen, bullets, dead_zombies, pistol_ammos, first_aid_packs, alpha=None):
     """
     Redraw screens (after items on the screen are updated)
+
+    Parameter:
+        alpha: fraction of a simulation step elapsed since the last step, moving objects are drawn
+               between their previous and current positions if given
+
+    With dirty_renderer enabled, only the background under the last frame's objects is restored and
+    only the changed parts of the screen are updated (see dirty_rects.py), each blit returns the
+    rects it drew.
     """
     # draw background
-    screen.blit(background, (0, 0))
+    if dirty_renderer.enabled:
+        dirty_renderer.begin_frame(screen, background)
+    else:
+        screen.blit(background, (0, 0))
+    drawn = []
 
     # blit each bullet, delete it if it is out of screen
-    for bullet in bullets.copy().sprites():
-        if bullet.rect.bottom < 0 or bullet.rect.top > screen.get_height() or bullet.rect.left > screen.get_width() or bullet.rect.right < 0:  # out of screen
-            bullets.remove(bullet)
-        else:
-            bullet.blit_bullet()
+    if isinstance(bullets, ProjectilePool):
+        drawn.extend(bullets.draw(screen, alpha))
+    else:
+        for bullet in bullets.copy().sprites():
+            if bullet.rect.bottom < 0 or bullet.rect.top > screen.get_height() or bullet.rect.left > screen.get_width() or bullet.rect.right < 0:  # out of screen
+                bullets.remove(bullet)
+            else:
+                drawn.append(bullet.blit_bullet(alpha))
 
-    # blit each dead zombie's death animation, delete it if all frames are displayed
-    for dead_zombie in dead_zombies.copy().sprites():
-        if not dead_zombie.death_images:  # remove zombie that finished displaying death frames
-            dead_zombies.remove(dead_zombie)
-        else:
-            dead_zombie.blit_death_frame()
+    # blit each dead zombie's death animation (corpses, ammos and packs are removed by the timing wheel when they expire)
+    for dead_zombie in dead_zombies:
+        drawn.append(dead_zombie.blit_death_frame())
 
-    # draw each ammo to screen, remove those expired
-    for pistol_ammo in pistol_ammos.copy().sprites():
-        if pistol_ammo.ammo_life <= 0:
-            pistol_ammos.remove(pistol_ammo)
-        else:
-            pistol_ammo.blit_ammo()
+    # draw each ammo to screen
+    for pistol_ammo in pistol_ammos:
+        drawn.append(pistol_ammo.blit_ammo())
 
-    # draw each first aid pack to screen, remove those expired
-    for first_aid_pack in first_aid_packs.copy().sprites():
-        if first_aid_pack.pack_life <= 0:
-            first_aid_packs.remove(first_aid_pack)
-        else:
-            first_aid_pack.blit_pack()
+    # draw each first aid pack to screen
+    for first_aid_pack in first_aid_packs:
+        drawn.append(first_aid_pack.blit_pack())
 
     # draw each zombie to screen
     for zombie in zombies:
-        zombie.blit_zombie()
+        drawn.append(zombie.blit_zombie(alpha))
 
     # draw player's character to screen
-    player.blit_player()
+    drawn.extend(player.blit_player(alpha))
+    phase_timer.mark('update_screen')
+
+    # draw the profiler overlay on top of everything
+    if frame_profiler.enabled:
+        drawn.append(frame_profiler.draw(screen))
+        phase_timer.mark('profiler_overlay')
+
+    # draw the updated screen (or its changed parts) on the game window
+    if dirty_renderer.enabled:
+        dirty_renderer.present(screen, drawn)
+    else:
+        pygame.display.flip()
+    phase_timer.mark('display_flip')
 
-    # draw the updated screen on the game window
-    pygame.display.flip()
+    if frame_profiler.enabled:
+        counts = {'zombies': len(zombies), 'bullets': len(bullets), 'corpses': len(dead_zombies),
+                  'ammos': len(pistol_ammos), 'packs': len(first_aid_packs), 'jobs': scheduler.depth()}
+        if dirty_renderer.enabled:
+            counts['blit_kpx'] = dirty_renderer.blitted // 1000
+        frame_profiler.end_frame(counts)
 
 
-def player_get_item(player, ammos, first_aid_packs):
-    # get pistol ammos
-    for ammo in ammos.copy().sprites():
-        if player.rect.colliderect(ammo.rect):
-            if ammo.ammo_type == player.game_settings.pistol:
-                player.ammo_pistol += ammo.amount
-            if ammo.ammo_type == player.game_settings.m4:
-                player.ammo_m4 += ammo.amount
-            if ammo.ammo_type == player.game_settings.awp:
-                player.ammo_awp += ammo.amount
+def player_get_item(player, ammos, first_aid_packs, item_grid=None):
+    """
+    Pick up ammos and first aid packs the player is touching
+
+    Parameter:
+        item_grid: SpatialHash of ammos and first aid packs, only items near the player are tested if given
+    """
+    if item_grid is None:
+        candidates = ammos.sprites() + first_aid_packs.sprites()
+    else:
+        candidates = list(item_grid.query(player.rect))
+
+    for item in candidates:
+        if not player.rect.colliderect(item.rect):
+            continue
+
+        # get ammos
+        if ammos.has(item):
+            if item.ammo_type == player.game_settings.pistol:
+                player.ammo_pistol += item.amount
+            if item.ammo_type == player.game_settings.m4:
+                player.ammo_m4 += item.amount
+            if item.ammo_type == player.game_settings.awp:
+                player.ammo_awp += item.amount
 
             player.foot_steps_channel.play(player.ammo_pickup_sound)  # play sound
-            ammos.remove(ammo)
+            item.expiry.cancel()
+            ammos.remove(item)
+            item.pool.release(item)
 
-    # get first aid packs
-    for first_aid_pack in first_aid_packs.copy().sprites():
-        if player.rect.colliderect(first_aid_pack.rect):
+        # get first aid packs
+        elif first_aid_packs.has(item):
             # heal player
-            player.hp += first_aid_pack.heal_amount
+            player.hp += item.heal_amount
             if player.hp > player.game_settings.max_health_point:
                 player.hp = player.game_settings.max_health_point
             # play sound effect
             player.foot_steps_channel.play(player.item_pickup_sound)
             # delete pack
-            first_aid_packs.remove(first_aid_pack)
+            item.expiry.cancel()
+            first_aid_packs.remove(item)
+            item.pool.release(item)
 
 
+@traced('welcome_screen', 'menu')
 def welcome_screen(screen, game_settings):
     # Game sounds:
     # Main Menu (Royalty Free Soundtrack):
@@ -378,18 +718,18 @@ def welcome_screen(screen, game_settings):
     # Game Fonts
     font = game_settings.font
 
-    # Game FPS
-    clock = pygame.time.Clock()
-    FPS = game_settings.FPS
+    # the menu sleeps until a key is pressed, and is redrawn when the selection changes
+    menu = MenuLoop(screen, 'img/bg.jpg', game_settings.menu_event_timeout_ms)
 
     # Main Menu Loop to display menus
     selected = "new game"  # store current selected option
     while True:
-        for event in pygame.event.get():
+        for event in menu.events():
             if event.type == pygame.QUIT:
                 sys.exit()
 
             if event.type == pygame.KEYDOWN:
+                previous_selected = selected
                 if selected == "new game" and event.key == pygame.K_UP:
                     key_sound.play()
                     selected = "quit"
@@ -430,10 +770,14 @@ def welcome_screen(screen, game_settings):
                     key_sound.play()
                     selected = "new game"
 
+                if selected != previous_selected:
+                    menu.invalidate()
+
                 if event.key == pygame.K_RETURN:
                     if selected == "new game":
                         username = create_user(screen, game_settings)
-                        run_game(screen, game_settings, username)
+                        if username is not None:
+                            run_game(screen, game_settings, username)
                     if selected == "load game":
                         load_user(screen, game_settings)
                     if selected == "leaderboard":
@@ -442,10 +786,11 @@ def welcome_screen(screen, game_settings):
                         user_settings(screen, game_settings)
                     if selected == "quit":
                         sys.exit()
+                    menu.invalidate()  # back from another screen
 
         # Main Menu UI
-        menu = pygame.image.load('img/bg.jpg')
-        screen.blit(menu, (0, 0))
+        if not menu.redraw():
+            continue
 
         title = text_format(game_settings.caption, font, 100, game_settings.color_black)
         if selected == "new game":
@@ -485,22 +830,30 @@ def welcome_screen(screen, game_settings):
         screen.blit(text_leaderboard, (game_settings.screen_width / 2 - (leaderboard_rect[2] / 2), 400))
         screen.blit(text_settings, (game_settings.screen_width / 2 - (settings_rect[2] / 2), 450))
         screen.blit(text_quit, (game_settings.screen_width / 2 - (quit_rect[2] / 2), 500))
-        pygame.display.update()
-        clock.tick(FPS)
+        menu.present()
 
 
 def text_format(message, textFont, textSize, textColor):
-    newFont = pygame.font.Font(textFont, textSize)
-    newText = newFont.render(message, 0, textColor)
-    return newText
+    # shared surface from the text cache, rendered once per text, font, size and colour
+    return texts.render(message, textFont, textSize, textColor)
 
 
+@traced('user_settings', 'menu')
 def user_settings(screen, game_settings):
-    # create objects that will displayed on game main screen
-    background = pygame.image.load(game_settings.background_path)
+    # the instructions are drawn once, the menu sleeps until esc is pressed
+    menu = MenuLoop(screen, game_settings.background_path, game_settings.menu_event_timeout_ms)
 
     while True:
-        screen.blit(background, (0, 0))
+        # checking for player input to quit instruction screen
+        for event in menu.events():
+            if event.type == pygame.QUIT:
+                sys.exit()
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                return
+
+        if not menu.redraw():
+            continue
 
         # creating player instruction
         instructions = text_format("Game Instructions", game_settings.font, 75, game_settings.color_black)
@@ -543,33 +896,23 @@ def user_settings(screen, game_settings):
 
         screen.blit(exit_screen, (game_settings.screen_width / 2 - (exit_screen_rect[2] / 2), 600))
 
-        # checking for player input to quit instruction screen
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-
-            elif event.key == pygame.K_ESCAPE:
-                return
-
         # draw the updated screen
-        pygame.display.flip()
+        menu.present()
 
 
+@traced('pause_game', 'menu')
 def pause_game(screen, game_settings, player, username):
-    # draws background
-    background = pygame.image.load(game_settings.background_path)
+    # the menu sleeps until a key is pressed, and is redrawn when the selection changes
+    menu = MenuLoop(screen, game_settings.background_path, game_settings.menu_event_timeout_ms)
 
     # in-game fx sound for whenever the user presses the up or down arrow key
     key_sound = pygame.mixer.Sound('sfx/key_sound.wav')
-    clock = pygame.time.Clock()
 
     # Pause Game selection menu
     selected = "Save Game"
     while True:
-        screen.blit(background, (0, 0))
-
         # checking for player input to quit instruction screen
-        for event in pygame.event.get():
+        for event in menu.events():
             if event.type == pygame.QUIT:
                 sys.exit()
 
@@ -577,6 +920,8 @@ def pause_game(screen, game_settings, player, username):
                 if event.key == pygame.K_ESCAPE:
                     return
 
+                previous_selected = selected
+
                 if event.key == pygame.K_DOWN and selected == "Save Game":
                     key_sound.play()
                     selected = "Game Settings"
@@ -609,6 +954,9 @@ def pause_game(screen, game_settings, player, username):
                     key_sound.play()
                     selected = "Exit Game"
 
+                if selected != previous_selected:
+                    menu.invalidate()
+
                 if event.key == pygame.K_RETURN:
                     if selected == "Save Game":
                         saved_user(screen, game_settings, player, username)
@@ -618,6 +966,10 @@ def pause_game(screen, game_settings, player, username):
                         welcome_screen(screen, game_settings)
                     elif selected == "Exit Game":
                         sys.exit()
+                    menu.invalidate()  # back from another screen
+
+        if not menu.redraw():
+            continue
 
         # creating Pause Game instruction
         pause = text_format("Pause Game", game_settings.font, 100, game_settings.color_black)
@@ -656,49 +1008,62 @@ def pause_game(screen, game_settings, player, username):
         screen.blit(exit_game, (game_settings.screen_width / 2 - (exit_game_rect[2] / 2), 420))
 
         # draw the updated screen
-        pygame.display.update()
-
-        clock.tick(game_settings.FPS)
+        menu.present()
 
 
+@traced('create_user', 'menu')
 def create_user(screen, game_settings):
-    screenSize(game_settings.screen_width, game_settings.screen_height)
-    setBackgroundImage(game_settings.background_path)
-
-    titleLabel = makeLabel("New Player Registration", 80, 100, 100, game_settings.color_black,
-                           game_settings.font, "clear")
-    showLabel(titleLabel)
-
-    instructionLabel = makeLabel("Player Name: ", 40, 100, 250, game_settings.color_black,
-                                 game_settings.font, "clear")
-    showLabel(instructionLabel)  # makes label appear on the screen
-    # parameters are in the order x,y,case,prompt,maxlen of characters that can be typed, font size
-    # if max len set to 0 any amount of characters can be typed
-    wordBox = makeTextBox(420, 250, 300, 0, "Enter text here", 30, 24)
-    showTextBox(wordBox)  # makes the text box appear on the screen
-    entry = textBoxInput(wordBox)  # user input will be stored in entry
-
-    new_user = User()
-    if new_user.check_user(entry) == 1:
-        create_user(screen, game_settings)
-
-    else:
-        addtoleadtable(entry, 0)
-        savegame(entry, new_user)
-
-    pygame.display.update()
+    """
+    Registration form: ask a new player name (asked again if it is already used), save the new user
+    :return: the name, None if the player went back to the menu (esc)
+    """
+    error = None
+    while True:
+        entry = ask_new_player_name(screen, game_settings, error)
+        if entry is None:
+            return None
 
-    return entry
+        new_user = User()
+        if new_user.check_user(entry) == 1:
+            error = "Name already used"
+        else:
+            addtoleadtable(entry, 0)
+            savegame(entry, new_user)
+            return entry
 
 
+@traced('saved_user', 'menu')
 def saved_user(screen, game_settings, player, user):
-    background = pygame.image.load(game_settings.background_path)
+    # the menu sleeps until a key is pressed, the queued jobs (the save, and e.g. the rotation warmup
+    # of the game) run in slices of the frame budget, with a sleep of menu_job_interval_ms between them
+    menu = MenuLoop(screen, game_settings.background_path, game_settings.menu_event_timeout_ms)
 
-    saved = 0
+    save_job = None  # job writing the progress, queued when Enter is pressed
     temp_user = User()
+    saved_shown = False  # the confirmation is drawn
 
     while True:
-        screen.blit(background, (0, 0))
+        for event in menu.events(game_settings.menu_job_interval_ms if scheduler.depth() else None):
+            if event.type == pygame.QUIT:
+                sys.exit()
+
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return
+
+                if event.key == pygame.K_RETURN:
+                    save_job = scheduler.add(save_progress(user, temp_user, player.zombie_killed), PRIORITY_SAVE, 'save progress')
+                    saved_shown = False
+
+        # the save is written in the time left in the frame
+        frame_start = time.perf_counter()
+        scheduler.run(frame_start)
+        if save_job is not None and save_job.finished and not saved_shown:
+            menu.invalidate()
+            saved_shown = True
+
+        if not menu.redraw():
+            continue
 
         # creating player instruction
         instructions = text_format("Press Enter to Save progress:", game_settings.font, 60,
@@ -708,85 +1073,53 @@ def saved_user(screen, game_settings, player, user):
         load_gamer = text_format(user, game_settings.font, 45, game_settings.color_black)
         load_gamer_rect = instructions.get_rect()
         screen.blit(load_gamer, (game_settings.screen_width / 2 - (load_gamer_rect[2] / 2), 240))
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return
-
-                if event.key == pygame.K_RETURN:
-                    saved = 1
-                    existing_user = loadgame(user, temp_user)
-                    existing_user.add_score(player.zombie_killed)
-                    addtoleadtable(user, existing_user.show_score())
-                    savegame(user, temp_user)
-        if saved == 1:
+        if saved_shown:
             save_confirmation = text_format(user + " progress was successfully saved.",
                                             game_settings.font, 40, game_settings.color_white)
             save_confirmation_rect = save_confirmation.get_rect()
             screen.blit(save_confirmation, (game_settings.screen_width / 3 - (save_confirmation_rect[2] / 3),
                                           600))
 
-        pygame.display.update()
+        menu.present()
 
 
+@traced('load_user', 'menu')
 def load_user(screen, game_settings):  # user_info
-
-    screenSize(game_settings.screen_width, game_settings.screen_height)
-    setBackgroundImage(game_settings.background_path)
-    instruction = makeLabel("Please ENTER Gamer Name to Load: ", 50, 100, 100, game_settings.color_black,
-                                 game_settings.font, "clear")
-    showLabel(instruction)
-
+    """form listing the saved users, the game starts with the user chosen (asked again if unknown), esc goes back to the menu"""
     username = User()
     userList = username.show_users()
 
-    pixel_x_size = 100
-    pixel_y_size = 240
-    for user in userList:
-        if pixel_y_size >= 500:
-            pixel_x_size += 250
-            pixel_y_size = 240
-            display_user = makeLabel(user, 40, pixel_x_size, pixel_y_size, game_settings.color_black,
-                                     game_settings.font, "clear")
-            showLabel(display_user)
-
-            pixel_y_size += 60
-
-        else:
-            display_user = makeLabel(user, 40, pixel_x_size, pixel_y_size, game_settings.color_black,
-                                     game_settings.font, "clear")
-            showLabel(display_user)
-
-            pixel_y_size += 60
-
-
-    instructionLabel = makeLabel("Player Name: ", 40, 100, 600, game_settings.color_black,
-                                 game_settings.font, "clear")
-    showLabel(instructionLabel)  # makes label appear on the screen
-    # parameters are in the order x,y,case,prompt,maxlen of characters that can be typed, font size
-    # if max len set to 0 any amount of characters can be typed
-    wordBox = makeTextBox(420, 600, 300, 0, "Enter text here", 30, 24)
-    showTextBox(wordBox)  # makes the text box appear on the screen
-    entry = textBoxInput(wordBox)  # user input will be stored in entry
-
-    name = User()
-    if name.check_user(entry):
-        run_game(screen, game_settings, entry)
-
-    else:
-        load_user(screen, game_settings)
+    error = None
+    while True:
+        entry = ask_player_to_load(screen, game_settings, userList, error)
+        if entry is None:
+            return
 
-    pygame.display.update()
+        name = User()
+        if name.check_user(entry):
+            run_game(screen, game_settings, entry)
+            return
+        error = "Unknown player"
 
 
+@traced('leaderboard', 'menu')
 def leaderboard(screen, game_settings):  # user_info
-    background = pygame.image.load("img/bg.jpg")
+    # the table is drawn once, the menu sleeps until esc is pressed
+    menu = MenuLoop(screen, "img/bg.jpg", game_settings.menu_event_timeout_ms)
     leadtable = openleadtable()
     while True:
-        screen.blit(background, (0, 0))
+        for event in menu.events():
+            if event.type == pygame.QUIT:
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return
+                if event.key == pygame.K_RETURN:
+                    pass
+
+        if not menu.redraw():
+            continue
+
         # creating player instruction
         instructions = text_format("Leaderboard:", game_settings.font, 100,
                                    game_settings.color_black)
@@ -805,18 +1138,10 @@ def leaderboard(screen, game_settings):  # user_info
             else:
                 break
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return
-                if event.key == pygame.K_RETURN:
-                    pass
-
-            pygame.display.update()
+        menu.present()
 
 
+@traced('savegame', 'io')
 def savegame(filetag, user):
     current_dir = os.getcwd() + "/users"
     file_to_open = os.path.join(current_dir, (filetag + ".dat"))
@@ -825,6 +1150,7 @@ def savegame(filetag, user):
     user_file.close()
 
 
+@traced('loadgame', 'io')
 def loadgame(filetag, user):
     file = os.path.join((os.getcwd() + "/users"), filetag + ".dat")
     pickle_in = open(file, "rb")
@@ -832,6 +1158,19 @@ def loadgame(filetag, user):
     return user
 
 
+def save_progress(user, temp_user, score):
+    """
+    Job (job_scheduler): add score to the saved progress of user and write it, and the leaderboard, to disk
+    Each file is read or written in its own slice
+    """
+    existing_user = loadgame(user, temp_user)
+    yield
+    existing_user.add_score(score)
+    addtoleadtable(user, existing_user.show_score())
+    yield
+    savegame(user, temp_user)
+
+
 def saveleadtable(leadtable):
     file = open("leaderboard.dat", "wb")
     pickle.dump(leadtable, file)
@@ -844,6 +1183,7 @@ def openleadtable():
     return table
 
 
+@traced('addtoleadtable', 'io')
 def addtoleadtable(name, score):
     '''file = os.getcwd() + "leaderboard.dat"
     if "leaderboard.dat" != file:
@@ -0,0 +1,6 @@
+import random
+
+
+# random number stream of the game logic (spawn positions, damage rolls, item drops, ...)
+# GameWorld seeds it at the start of each session, so a session can be replayed exactly
+game_random = random.Random()
@@ -0,0 +1,163 @@
+import random
+from pygame.sprite import Group
+from player import Player
+from player_resources import PlayerResources
+from zombie import Zombie, DeadZombie
+from ammo import PistolAmmo, M4Ammo, AwpAmmo
+from first_aid_pack import FirstAidPack
+from asset_manager import assets
+from dirty_rects import dirty_renderer
+from spatial_hash import SpatialHash
+from flow_field import FlowField
+from crowd import CrowdSeparation
+from spawn_director import SpawnDirector
+from zombie_lod import ZombieLOD
+from zombie_engine import ZombieEngine, EngineZombie
+from projectile_pool import ProjectilePool
+from game_clock import game_clock
+from timing_wheel import timers
+from game_random import game_random
+from replay import InputState
+
+
+class GameWorld:
+    """
+    Hold every object of one game session, so the simulation step, the renderer and
+    tools running the game without a human (headless runs, benchmarks) can share them.
+
+    Attributes (self.):
+        :screen, game_settings, username: as passed to run_game()
+        :background: background image of the game screen
+        :bullets: Group of bullet sprites, or ProjectilePool if numpy is installed
+        :zombies, dead_zombies, ammos, first_aid_packs: sprite groups
+        :player: the player's character
+        :zombie_engine: optional vectorized zombie simulation (None if disabled)
+        :zombie_grid, item_grid: collision broad-phase grids, rebuilt every simulation step
+        :flow_field: headings of the zombies around map obstacles, rebuilt when the player changes cell (None if disabled)
+        :crowd: separation steering of the zombies (None if disabled)
+        :zombie_lod: level of detail of the zombie updates (None if disabled: every zombie fully updated every step)
+        :director: spawns the zombies following the wave file
+        :step_ms: duration of one simulation step, in ms
+        :seed: seed of game_random for this session
+        :input: live input (mouse, keys) collected from events, used by the next simulation step
+        :recorder: ReplayRecorder writing the input of every step, or None
+        :replay: ReplayReader giving the input of every step in place of self.input, or None
+    """
+
+    def __init__(self, screen, game_settings, username, seed=None):
+        self.screen = screen
+        self.game_settings = game_settings
+        self.username = username
+
+        # the session starts at simulated time 0, each simulation step lasts step_ms
+        self.step_ms = 1000 / game_settings.simulation_rate
+        game_clock.reset()
+        timers.clear()  # lifetimes, corpses and reloads of the session, counted in steps
+
+        # create objects that will displayed on game main screen
+        self.background = assets.image(game_settings.background_path)
+        dirty_renderer.invalidate()  # the first frame of the session draws the whole screen
+
+        # create Group() objects to store game objects shown on screen
+        # bullets are kept in a ProjectilePool if numpy is installed
+        if game_settings.projectile_pool_enabled and ProjectilePool.available:
+            self.bullets = ProjectilePool(game_settings, screen)
+        else:
+            self.bullets = Group()
+        self.zombies = Group()
+        self.dead_zombies = Group()
+        self.ammos = Group()
+        self.first_aid_packs = Group()
+
+        # player object
+        self.player_resources = PlayerResources(game_settings)
+        self.player = Player(screen, game_settings, self.bullets, self.player_resources)
+
+        # optional vectorized zombie simulation
+        if game_settings.zombie_engine_enabled and ZombieEngine.available:
+            self.zombie_engine = ZombieEngine(game_settings)
+        else:
+            self.zombie_engine = None
+
+        # waves of zombies
+        self.director = SpawnDirector(game_settings)
+
+        # collision broad-phase grids, rebuilt every simulation step
+        self.zombie_grid = SpatialHash(game_settings.collision_cell_size)
+        self.item_grid = SpatialHash(game_settings.collision_cell_size)
+
+        # pathing of the zombies, shared by all of them
+        if game_settings.flow_field_enabled:
+            self.flow_field = FlowField(game_settings)
+        else:
+            self.flow_field = None
+        if game_settings.separation_enabled:
+            self.crowd = CrowdSeparation(game_settings)
+        else:
+            self.crowd = None
+        if game_settings.zombie_lod_enabled:
+            self.zombie_lod = ZombieLOD(game_settings, screen)
+        else:
+            self.zombie_lod = None
+
+        # create reusable zombies, corpses and items before the game starts
+        if game_settings.object_pool_prewarm:
+            self.prewarm_pools()
+
+        # input of the simulation steps
+        self.input = InputState(screen.get_rect().centerx, 0)
+        self.recorder = None
+        self.replay = None
+
+        # seed the random stream last: the same seed then gives the same session,
+        # whatever objects the pools had to create above
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        game_random.seed(seed)
+
+    def prewarm_pools(self):
+        """
+        Fill the object pools, so the first waves reuse objects instead of creating them
+        """
+        game_settings = self.game_settings
+        if self.zombie_engine is None:
+            zombie_pool = Zombie.pool
+            zombie_args = (game_settings, self.screen, self.player)
+        else:
+            zombie_pool = EngineZombie.pool
+            zombie_args = (game_settings, self.screen, self.player, self.zombie_engine)
+        zombie_pool.prewarm(max(game_settings.zombie_pool_prewarm, self.director.prewarm), *zombie_args)
+
+        # corpses and items are created at the place of a zombie
+        zombie = zombie_pool.acquire(*zombie_args)
+        DeadZombie.pool.prewarm(game_settings.corpse_pool_prewarm, zombie)
+        for item_class in (PistolAmmo, M4Ammo, AwpAmmo, FirstAidPack):
+            item_class.pool.prewarm(game_settings.item_pool_prewarm, zombie)
+        zombie_pool.release(zombie)
+
+    def close(self):
+        """
+        End the session: give the zombies, corpses and items still in the groups back to their pools,
+        then drop the timers of the session (their expiries would have released the corpses and items)
+        """
+        for group in (self.zombies, self.dead_zombies, self.ammos, self.first_aid_packs):
+            for sprite in group.sprites():
+                group.remove(sprite)
+                sprite.pool.release(sprite)
+        timers.clear()
+
+    def next_input(self):
+        """
+        Input of the next simulation step: read from the replay if one is played, else taken from
+        the live input. The input is written to the recorder if one is set
+        :return: InputSnapshot, or None if the replay is finished
+        """
+        if self.replay is not None:
+            snapshot = self.replay.next()
+        else:
+            snapshot = self.input.take()
+
+        if self.recorder is not None and snapshot is not None:
+            self.recorder.record(snapshot)
+        return snapshot
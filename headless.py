@@ -0,0 +1,192 @@
+"""
+Run the game without a window, an audio device or a human player.
+
+SDL's dummy video and audio drivers are used, nothing is drawn (update_screen() is skipped),
+no sound is loaded or played, and simulation steps run back to back without waiting,
+so a session is simulated much faster than real time. Useful for soak tests and benchmarks
+on machines without a display.
+
+usage: python headless.py [simulated seconds] [--idle] [--engine] [--seed=N] [--record=FILE] [--trace=FILE]
+                              [--waves=FILE]
+       python headless.py --replay=FILE
+    --idle: nobody plays (by default the autopilot holds m4 fire on the nearest zombie)
+    --engine: use the numpy zombie engine
+    --seed: seed of the session's random stream
+    --record: record the session to a replay file
+    --waves: wave file of the spawn director (e.g. waves/horde.json)
+    --trace: write a trace of the simulation steps (Perfetto / chrome://tracing JSON) to FILE
+    --replay: play a replay file again as fast as possible, and check the final state is the same
+"""
+import os
+import sys
+import time
+
+# must be set before pygame creates the display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from setting import Settings
+from asset_manager import assets
+import game_functions as gf
+from replay import ReplayRecorder, ReplayReader, world_digest
+from phase_timer import phase_timer
+from trace_export import tracer
+
+
+def init_headless(game_settings):
+    """
+    Initialize pygame without sound and create the (invisible) screen
+    :return: screen surface
+    """
+    pygame.display.init()
+    pygame.font.init()
+    assets.mute()
+    game_settings.render_enabled = False
+    return pygame.display.set_mode((game_settings.screen_width, game_settings.screen_height))
+
+
+def autopilot(world):
+    """
+    Play in place of a human: aim at the nearest zombie and hold m4 fire, release the button
+    to reload when the clip is empty. The input goes through world.input like the events of a
+    human player, so it is recorded in replays.
+    Give the player enough m4 ammo (game_settings.initial_m4_ammo) for the whole run.
+    """
+    player = world.player
+    player_input = world.input
+
+    if player.current_weapon != world.game_settings.m4:
+        player_input.handle_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_2))
+
+    nearest = None
+    nearest_distance = None
+    for zombie in world.zombies:
+        distance = gf.rect_center_distance(player.rect, zombie.rect)
+        if nearest_distance is None or distance < nearest_distance:
+            nearest = zombie
+            nearest_distance = distance
+    if nearest is not None:
+        player_input.mouse_position = nearest.rect.center
+
+    if player.clip_m4 == 0:
+        if player.auto_shooting:
+            player_input.handle_event(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1))  # reload
+    elif not player.auto_shooting:
+        player_input.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1))
+
+
+def run_world(world, total_steps, controller=None, invincible=False):
+    """
+    Run simulation steps back to back, until total_steps are run, the player dies or the replay ends
+    :return: dictionary of results: simulated and wall-clock seconds, speed (simulated seconds per wall second), ...
+    """
+    game_settings = world.game_settings
+    steps = 0
+    start = time.perf_counter()
+    while steps < total_steps and world.player.hp > 0:
+        if world.replay is not None and world.replay.finished:
+            break
+        if controller is not None:
+            controller(world)
+        tracer.begin('simulation_step')
+        phase_timer.start()
+        gf.simulation_step(world)
+        tracer.end('simulation_step')
+        steps += 1
+        if invincible:
+            world.player.hp = game_settings.max_health_point
+    wall_seconds = time.perf_counter() - start
+
+    simulated_seconds = steps / game_settings.simulation_rate
+    return {
+        'steps': steps,
+        'simulated_seconds': simulated_seconds,
+        'wall_seconds': wall_seconds,
+        'speed': simulated_seconds / wall_seconds if wall_seconds > 0 else float('inf'),
+        'player_alive': world.player.hp > 0,
+        'zombies': len(world.zombies),
+        'zombie_killed': world.player.zombie_killed,
+        'shots': world.player.shots,
+        'digest': world_digest(world),
+    }
+
+
+def run_headless(game_settings, seconds, controller=autopilot, invincible=False, seed=None, record_path=None):
+    """
+    Simulate a game session of seconds (simulated time) as fast as possible, or until the player dies
+
+    Parameter:
+        controller: function called with the GameWorld before each step to give inputs (None: no input)
+        invincible: restore the player's health after each step, so the session lasts
+        seed: seed of the session (None: random)
+        record_path: if given, the session is recorded to this replay file
+    :return: dictionary of results, see run_world()
+    """
+    screen = init_headless(game_settings)
+    world = gf.GameWorld(screen, game_settings, 'headless', seed)
+    if record_path is not None:
+        world.recorder = ReplayRecorder(record_path, world)
+
+    result = run_world(world, int(seconds * game_settings.simulation_rate), controller, invincible)
+    if world.recorder is not None:
+        world.recorder.close(world)
+    world.close()
+    return result
+
+
+def replay_session(path, game_settings=None):
+    """
+    Play a replay file again as fast as possible, e.g. as a fixed workload for benchmarks
+    :return: dictionary of results (see run_world()), with 'replay_digest', the digest recorded in the file,
+             and 'identical', True if the session ended in the same state
+    """
+    replay = ReplayReader(path)
+    if game_settings is None:
+        game_settings = Settings()
+    replay.apply_settings(game_settings)
+
+    screen = init_headless(game_settings)
+    world = gf.GameWorld(screen, game_settings, 'headless', replay.seed)
+    world.replay = replay
+
+    result = run_world(world, replay.steps)
+    world.close()
+    result['replay_digest'] = replay.digest
+    result['identical'] = result['digest'] == replay.digest and result['steps'] == replay.steps
+    return result
+
+
+def print_result(result):
+    print('simulated %.1f s in %.2f s of wall time: %.1f simulated seconds per wall second'
+          % (result['simulated_seconds'], result['wall_seconds'], result['speed']))
+    print('steps: %d, zombies alive: %d, killed: %d, shots: %d, player alive: %s, state digest: %08x'
+          % (result['steps'], result['zombies'], result['zombie_killed'], result['shots'], result['player_alive'], result['digest']))
+
+
+if __name__ == '__main__':
+    options = dict(argument[2:].partition('=')[::2] for argument in sys.argv[1:] if argument.startswith('--'))
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith('--')]
+
+    if 'replay' in options:
+        result = replay_session(options['replay'])
+        print_result(result)
+        print('same final state as the recorded session: %s' % result['identical'])
+        sys.exit(0 if result['identical'] else 1)
+
+    game_settings = Settings()
+    game_settings.zombie_engine_enabled = 'engine' in options
+    if options.get('waves'):
+        game_settings.wave_file = options['waves']
+    seconds = float(arguments[0]) if arguments else 60
+    seed = int(options['seed']) if options.get('seed') else None
+    if options.get('trace'):
+        tracer.start(options['trace'])
+
+    if 'idle' in options:
+        result = run_headless(game_settings, seconds, None, seed=seed, record_path=options.get('record'))
+    else:
+        game_settings.initial_m4_ammo = 1000000  # sustained fire during the whole run
+        result = run_headless(game_settings, seconds, autopilot, invincible=True, seed=seed, record_path=options.get('record'))
+    tracer.stop()
+    print_result(result)
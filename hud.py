@@ -0,0 +1,101 @@
+import pygame
+from text_cache import texts
+
+
+class PlayerHUD:
+    """
+    Head-up display of the player: health bar, ammo counter and weapon icon at the bottom of the screen,
+    reload bar above the player while reloading.
+
+    Both parts are rendered into cached surfaces, drawn in one blit each. The bottom overlay is only
+    rendered again when hp, the clip or ammo count, or the current weapon changed, and the reload bar
+    when its progress (in pixels) changed. Their texts come from the text cache.
+
+    Attributes (self.):
+        :overlay, overlay_rect: rendered bottom overlay and where it is drawn on the screen
+        :overlay_key: (hp, weapon, clip, ammo) the overlay was rendered for
+        :reload_overlay, reload_key: rendered reload bar and the progress it was rendered for
+        :rebuilds: number of times an overlay was rendered
+    """
+
+    def __init__(self, game_settings):
+        self.game_settings = game_settings
+        self.health_x = game_settings.screen_width - game_settings.health_bar_distancex
+        self.health_y = game_settings.screen_height - game_settings.health_bar_distancey
+        self.ammo_x = game_settings.weapon_distancex
+        self.ammo_y = game_settings.screen_height - game_settings.weapon_distancey
+
+        self.overlay = None
+        self.overlay_rect = None
+        self.overlay_key = None
+        self.reload_overlay = None
+        self.reload_key = None
+        self.rebuilds = 0
+
+    def weapon_state(self, player):
+        """:return: (weapon icon, clip, ammo) of the weapon in hand"""
+        if player.current_weapon == self.game_settings.m4:
+            return player.m4_image, player.clip_m4, player.ammo_m4
+        if player.current_weapon == self.game_settings.awp:
+            return player.awp_image, player.clip_awp, player.ammo_awp
+        return player.pistol_image, player.clip_pistol, player.ammo_pistol
+
+    def render_overlay(self, player):
+        """render the health bar, ammo counter and weapon icon into self.overlay"""
+        game_settings = self.game_settings
+        icon, clip, ammo = self.weapon_state(player)
+        ammo_text = texts.render(str(clip) + '/' + str(ammo), game_settings.digital_font_path, 40, game_settings.BRIGHT_YELLOW)
+
+        # images and where they go on the screen, the overlay covers all of them
+        hp_box = pygame.Rect(self.health_x, self.health_y, game_settings.max_health_bar_length, 20)
+        images = ((player.heart_image, (self.health_x - 30, self.health_y)),
+                  (ammo_text, (self.ammo_x, self.ammo_y)),
+                  (icon, (self.ammo_x - 150, self.ammo_y - 40)))
+        self.overlay_rect = hp_box.unionall([image.get_rect(topleft=position) for image, position in images])
+        x, y = self.overlay_rect.topleft
+        if self.overlay is None or self.overlay.get_size() != self.overlay_rect.size:
+            self.overlay = pygame.Surface(self.overlay_rect.size, pygame.SRCALPHA)
+        else:
+            self.overlay.fill((0, 0, 0, 0))
+
+        # heart, hp box and health bar, ammo count, weapon
+        self.overlay.blit(player.heart_image, (self.health_x - 30 - x, self.health_y - y))
+        pygame.draw.rect(self.overlay, (0, 0, 0), hp_box.move(-x, -y), 1)
+        pygame.draw.rect(self.overlay, (255, 0, 0), (hp_box.x + 1 - x, hp_box.y + 1 - y, int(game_settings.max_health_bar_length * player.hp / game_settings.max_health_point) - 2, 18))
+        self.overlay.blit(ammo_text, (self.ammo_x - x, self.ammo_y - y))
+        self.overlay.blit(icon, (self.ammo_x - 150 - x, self.ammo_y - 40 - y))
+        self.rebuilds += 1
+
+    def render_reload_overlay(self, progress):
+        """render the reload bar, filled on progress pixels, and the reloading text into self.reload_overlay"""
+        bar_length = self.game_settings.max_reload_bar_length
+        reload_text = texts.render("Reloading...", self.game_settings.segoeui_path, 18, self.game_settings.BRIGHT_YELLOW)
+        if self.reload_overlay is None:
+            self.reload_overlay = pygame.Surface((max(bar_length, reload_text.get_width()), 50), pygame.SRCALPHA)
+        else:
+            self.reload_overlay.fill((0, 0, 0, 0))
+        pygame.draw.rect(self.reload_overlay, (0, 0, 0), (0, 30, bar_length, 20), 1)
+        pygame.draw.rect(self.reload_overlay, self.game_settings.BRIGHT_YELLOW, (1, 31, progress, 18))
+        self.reload_overlay.blit(reload_text, (0, 0))
+        self.rebuilds += 1
+
+    def draw(self, screen, player):
+        """
+        Blit the HUD of player, rendered again only if its state changed
+        :return: list of the Rects of the screen drawn
+        """
+        icon, clip, ammo = self.weapon_state(player)
+        key = (player.hp, player.current_weapon, clip, ammo)
+        if key != self.overlay_key:
+            self.render_overlay(player)
+            self.overlay_key = key
+        drawn = [screen.blit(self.overlay, self.overlay_rect)]
+
+        # reload progress bar above the player
+        if player.reload_frame > 0:
+            progress = int(self.game_settings.max_reload_bar_length * (1 - player.reload_frame / self.game_settings.reload_speed[player.current_weapon])) - 1
+            if progress != self.reload_key:
+                self.render_reload_overlay(progress)
+                self.reload_key = progress
+            drawn.append(screen.blit(self.reload_overlay, (player.rect[0], player.rect[1] - 60)))
+        return drawn
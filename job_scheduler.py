@@ -0,0 +1,140 @@
+import time
+import heapq
+import atexit
+from setting import Settings
+from trace_export import tracer
+
+# job priorities, lower values run first
+PRIORITY_SAVE = 0  # player progress and leaderboard writes
+PRIORITY_CORPSE = 1  # rotations of the death animation of a new corpse
+PRIORITY_WARMUP = 2  # caches filled ahead of use
+
+
+class Job:
+    """
+    A queued job: a generator doing a slice of its work at each next()
+
+    Attributes (self.):
+        :name: shown in the metrics and traces
+        :priority, order: position in the queue (lower first, then in the order they were added)
+        :generator: the work, each yield gives control back to the scheduler
+        :added: time the job was queued (perf_counter, s)
+        :run_time: time spent running the job so far (s)
+        :finished: True when the generator is exhausted
+    """
+
+    def __init__(self, generator, priority, order, name):
+        self.generator = generator
+        self.priority = priority
+        self.order = order
+        self.name = name
+        self.added = time.perf_counter()
+        self.run_time = 0.0
+        self.finished = False
+
+    def __lt__(self, other):
+        return (self.priority, self.order) < (other.priority, other.order)
+
+
+class JobScheduler:
+    """
+    Cooperative scheduler of background work spread across frames (saves, cache warmups, corpse baking).
+
+    A job is a generator that yields between short slices of work. After a frame is drawn, run() resumes
+    the queued jobs, highest priority first, as long as the frame has taken less than budget_ms,
+    so the background work uses the time left in the frame and never delays the next one by much
+    (a slice that has started always finishes). Jobs still queued at exit are completed (run_all()).
+
+    Work that changes the simulation (e.g. the flow field) is not scheduled here: its result would
+    depend on the frame times and replays would no longer be deterministic.
+
+    Attributes (self.):
+        :budget_ms: jobs only run while the current frame is shorter than this
+        :queue: heap of the pending jobs
+        :completed: number of finished jobs
+        :slices: number of job slices run
+        :total_deferred_ms, max_deferred_ms: time finished jobs waited in the queue (not running)
+    """
+
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.queue = []
+        self.next_order = 0
+        self.completed = 0
+        self.slices = 0
+        self.total_deferred_ms = 0.0
+        self.max_deferred_ms = 0.0
+
+    def add(self, generator, priority=PRIORITY_WARMUP, name='job'):
+        """queue a job, :return: the Job"""
+        job = Job(generator, priority, self.next_order, name)
+        self.next_order += 1
+        heapq.heappush(self.queue, job)
+        return job
+
+    def depth(self):
+        """:return: number of queued jobs"""
+        return len(self.queue)
+
+    def run(self, frame_start):
+        """
+        Run job slices while the frame that started at frame_start (perf_counter, s) is under the budget
+        :return: number of slices run
+        """
+        deadline = frame_start + self.budget_ms / 1000
+        slices = 0
+        while self.queue and time.perf_counter() < deadline:
+            self.run_slice()
+            slices += 1
+        return slices
+
+    def run_all(self):
+        """run every queued job to the end, whatever the time it takes"""
+        while self.queue:
+            self.run_slice()
+
+    def run_slice(self):
+        """resume the first job once, it is removed from the queue when it is finished"""
+        job = self.queue[0]
+        start = time.perf_counter()
+        try:
+            with tracer.span(job.name, 'job'):
+                next(job.generator)
+            finished = False
+        except StopIteration:
+            finished = True
+        end = time.perf_counter()
+        job.run_time += end - start
+        self.slices += 1
+
+        if finished:
+            heapq.heappop(self.queue)
+            job.finished = True
+            deferred_ms = (end - job.added - job.run_time) * 1000
+            self.completed += 1
+            self.total_deferred_ms += deferred_ms
+            self.max_deferred_ms = max(self.max_deferred_ms, deferred_ms)
+
+    def oldest_pending_ms(self):
+        """:return: time the oldest queued job has been waiting (ms), 0 if the queue is empty"""
+        if not self.queue:
+            return 0.0
+        return (time.perf_counter() - min(job.added for job in self.queue)) * 1000
+
+    def stats(self):
+        return {
+            'queued': len(self.queue),
+            'completed': self.completed,
+            'slices': self.slices,
+            'mean_deferred_ms': self.total_deferred_ms / self.completed if self.completed else 0.0,
+            'max_deferred_ms': self.max_deferred_ms,
+            'oldest_pending_ms': self.oldest_pending_ms(),
+        }
+
+
+# the scheduler of the game loop
+_settings = Settings()
+scheduler = JobScheduler(_settings.job_frame_budget_ms)
+
+# queued saves must not be lost when the game is closed
+atexit.register(scheduler.run_all)
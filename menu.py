@@ -0,0 +1,74 @@
+import pygame
+from asset_manager import assets
+
+
+class MenuLoop:
+    """
+    Event-driven loop of a menu screen.
+
+    The menus used to redraw their whole screen as fast as they could (or at FPS), some loading their
+    background from disk in every iteration. A menu using MenuLoop sleeps in pygame.event.wait() until
+    an event arrives (or timeout_ms passed), and only redraws when something changed: the menu calls
+    invalidate() when its selection or contents change or when it comes back from another screen,
+    and the window being exposed invalidates it too. An idle menu wakes up a few times per second.
+
+        menu = MenuLoop(screen, game_settings.background_path, game_settings.menu_event_timeout_ms)
+        while True:
+            if menu.redraw():  # background blitted, draw the texts
+                ...
+                menu.present()
+            for event in menu.events():
+                ...  # menu.invalidate() if the selection changed
+
+    Attributes (self.):
+        :screen: surface of the window
+        :background: background image, loaded once (shared by the asset manager)
+        :timeout_ms: longest sleep without events, menus with periodic work (e.g. saves) pass a shorter one to events()
+        :dirty: the menu must be redrawn
+        :redraws, wakeups: number of redraws and of returns from events()
+    """
+
+    def __init__(self, screen, background_path, timeout_ms):
+        self.screen = screen
+        self.background = assets.image(background_path)
+        self.timeout_ms = timeout_ms
+        self.dirty = True
+        self.redraws = 0
+        self.wakeups = 0
+
+    def invalidate(self):
+        """the menu changed (or the screen was drawn by something else): redraw it"""
+        self.dirty = True
+
+    def redraw(self):
+        """:return: True if the menu must be drawn, the background is blitted already"""
+        if not self.dirty:
+            return False
+        self.screen.blit(self.background, (0, 0))
+        self.dirty = False
+        self.redraws += 1
+        return True
+
+    def present(self):
+        pygame.display.update()
+
+    def events(self, timeout_ms=None):
+        """
+        Sleep until there are events, at most timeout_ms (self.timeout_ms if None, 0 does not sleep).
+        A menu waiting to be redrawn does not sleep.
+        :return: list of the pending events, empty if none arrived
+        """
+        if timeout_ms is None:
+            timeout_ms = self.timeout_ms
+        if timeout_ms > 0 and not self.dirty:
+            event = pygame.event.wait(timeout_ms)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+        else:
+            events = pygame.event.get()
+        self.wakeups += 1
+
+        for event in events:
+            if event.type == pygame.VIDEOEXPOSE:
+                self.invalidate()
+        return events
@@ -0,0 +1,66 @@
+class ObjectPool:
+    """
+    A generic pool of reusable game objects (zombies, corpses, item drops).
+
+    Creating and discarding a sprite for every spawn, kill and drop produces a lot of garbage,
+    and the garbage collector pauses cause frame hitches in long sessions. Objects released to
+    the pool are kept and handed out again by acquire().
+
+    The pooled class must implement reset(*args), taking the same arguments as its constructor
+    and putting the object back in the state of a newly created one.
+
+    Attributes (self.):
+        :cls: class of the pooled objects
+        :free: released objects waiting to be reused
+        :max_free: maximum number of objects kept in self.free (None: no limit)
+        :created: number of objects constructed by the pool
+        :reused: number of acquire() calls served by a released object
+        :in_use: number of objects acquired and not released yet
+        :high_water: highest value of in_use
+    """
+
+    def __init__(self, cls, max_free=None):
+        self.cls = cls
+        self.free = []
+        self.max_free = max_free
+
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+        self.high_water = 0
+
+    def acquire(self, *args):
+        """:return: an object of self.cls initialized with args (reused if possible)"""
+        if self.free:
+            item = self.free.pop()
+            item.reset(*args)
+            self.reused += 1
+        else:
+            item = self.cls(*args)
+            self.created += 1
+
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return item
+
+    def release(self, item):
+        """give an object back to the pool, it must not be used (or be in any sprite group) afterwards"""
+        self.in_use -= 1
+        if self.max_free is None or len(self.free) < self.max_free:
+            self.free.append(item)
+
+    def prewarm(self, count, *args):
+        """create objects until count objects are free, e.g. before the game starts"""
+        while len(self.free) < count:
+            self.free.append(self.cls(*args))
+            self.created += 1
+
+    def stats(self):
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'in_use': self.in_use,
+            'free': len(self.free),
+            'high_water': self.high_water,
+        }
@@ -0,0 +1,50 @@
+import time
+
+
+class PhaseTimer:
+    """
+    Measure how long each phase of the game loop takes (check_events, spawn_zombies, shoot_zombie, ...).
+
+    The game loop calls start() at the beginning of a frame, then mark(phase) at the end of each phase:
+    the time since the previous mark is attributed to that phase and passed to every listener,
+    as listener(phase, start, end) with perf_counter() times in seconds.
+    Nothing is measured while no listener is registered, the marks then cost one attribute test.
+
+    Attributes (self.):
+        :enabled: True if at least one listener is registered
+        :listeners: functions called for each measured phase
+        :last: time of the previous mark
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.listeners = []
+        self.last = 0
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        self.enabled = True
+        self.last = time.perf_counter()  # a listener added in the middle of a frame
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+        self.enabled = bool(self.listeners)
+
+    def start(self):
+        """a new frame starts, the next phase is measured from now"""
+        if self.enabled:
+            self.last = time.perf_counter()
+
+    def mark(self, phase):
+        """the phase that started at the previous mark (or start()) ends now"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        for listener in self.listeners:
+            listener(phase, self.last, now)
+        self.last = now
+
+
+# the phase timer of the game loop
+phase_timer = PhaseTimer()
@@ -1,8 +1,16 @@
 import pygame
-import random  # for playing foot steps randomly
+from game_random import game_random  # for playing foot steps randomly
 import math  # for calculating rotated angle
 import game_functions as gf
 from bullet import *
+from asset_manager import assets
+from rotation_cache import rotations
+from animation import AnimationCursor
+from projectile_pool import ProjectilePool
+from fixed_timestep import interpolation_offset
+from game_clock import game_clock
+from timing_wheel import timers
+from hud import PlayerHUD
 
 
 class Player:
@@ -28,10 +36,10 @@ class Player:
         self.resources = resources
 
         # load character image and get its rect
-        self.image = pygame.image.load(self.game_settings.player_pistol_image_path)  # will be used to rotate and display
-        self.image_pistol = pygame.image.load(self.game_settings.player_pistol_image_path)
-        self.image_m4 = pygame.image.load(self.game_settings.player_m4_image_path)
-        self.image_awp = pygame.image.load(self.game_settings.player_awp_image_path)
+        self.image = assets.image(self.game_settings.player_pistol_image_path)  # will be used to rotate and display
+        self.image_pistol = assets.image(self.game_settings.player_pistol_image_path)
+        self.image_m4 = assets.image(self.game_settings.player_m4_image_path)
+        self.image_awp = assets.image(self.game_settings.player_awp_image_path)
 
         self.rect = self.image.get_rect()  # rect will be used to store moving info
         self.rect_pistol = self.image_pistol.get_rect()
@@ -39,24 +47,28 @@ class Player:
         self.rect_awp = self.image_awp.get_rect()
         self.screen_rect = screen.get_rect()
 
+        # aiming point, set from the mouse by check_events() (or by a script when no human plays)
+        # initially straight up from the center of the screen
+        self.mouse_position = (self.screen_rect.centerx, 0)
+
         # get player rotation 
-        mouse_position = pygame.mouse.get_pos()
-        self.angle = math.atan2(self.rect.centery - mouse_position[1], self.rect.centerx - mouse_position[0]) * 57.29
+        self.angle = math.atan2(self.rect.centery - self.mouse_position[1], self.rect.centerx - self.mouse_position[0]) * 57.29
         
         # set player's starting position (center of the screen)
         self.rect.centerx = self.screen_rect.centerx
         self.rect.centery = self.screen_rect.centery
+        self.previous_center = self.rect.center  # center before the last move, for render interpolation
 
         # character foot step sound effect
         self.last_foot_step_time = 0  # control foot step play interval
-        self.foot_step_sound_1 = pygame.mixer.Sound(self.game_settings.foot_step_sound1_path)
-        self.foot_step_sound_2 = pygame.mixer.Sound(self.game_settings.foot_step_sound2_path)
-        self.foot_step_sound_3 = pygame.mixer.Sound(self.game_settings.foot_step_sound3_path)
-        self.foot_step_sound_4 = pygame.mixer.Sound(self.game_settings.foot_step_sound4_path)
+        self.foot_step_sound_1 = assets.sound(self.game_settings.foot_step_sound1_path)
+        self.foot_step_sound_2 = assets.sound(self.game_settings.foot_step_sound2_path)
+        self.foot_step_sound_3 = assets.sound(self.game_settings.foot_step_sound3_path)
+        self.foot_step_sound_4 = assets.sound(self.game_settings.foot_step_sound4_path)
         # create a tuple to hold the sound of foot steps
         self.foot_steps = self.foot_step_sound_1, self.foot_step_sound_2, self.foot_step_sound_3, self.foot_step_sound_4
         # create a channel for playing foot step sounds
-        self.foot_steps_channel = pygame.mixer.Channel(game_settings.foot_step_channel)
+        self.foot_steps_channel = assets.channel(game_settings.foot_step_channel)
 
         # character moving flag, if the flag is true, character should be in a continuously moving state
         self.moving_right = False
@@ -71,44 +83,50 @@ class Player:
         self.accuracy = 0
 
         # player health point
-        self.heart_image = pygame.image.load(self.game_settings.player_health_icon_path)
+        self.heart_image = assets.image(self.game_settings.player_health_icon_path)
         self.hp = self.game_settings.max_health_point
 
         # load ammo and fire resources and set attributes
-        self.bullets = bullets  # Sprite class used to hold bullets
+        self.bullets = bullets  # Sprite group or ProjectilePool used to hold bullets
+        self.bullet_classes = {
+            self.game_settings.pistol: BulletPistol,
+            self.game_settings.m4: BulletM4,
+            self.game_settings.awp: BulletAwp,
+        }
 
             # pistol
         self.ammo_pistol = self.game_settings.initial_pistol_ammo
         self.clip_pistol = self.game_settings.pistol_clip_capacity
-        self.pistol_sound = pygame.mixer.Sound(self.game_settings.pistol_sound_path)
-        self.pistol_image = pygame.image.load(self.game_settings.pistol_image_path)
+        self.pistol_sound = assets.sound(self.game_settings.pistol_sound_path)
+        self.pistol_image = assets.image(self.game_settings.pistol_image_path)
             # automatic rifle
         self.ammo_m4 = self.game_settings.initial_m4_ammo
         self.clip_m4 = self.game_settings.m4_clip_capacity
-        self.m4_sound = pygame.mixer.Sound(self.game_settings.m4_sound_path)
-        self.m4_image = pygame.image.load(self.game_settings.m4_image_path)
+        self.m4_sound = assets.sound(self.game_settings.m4_sound_path)
+        self.m4_image = assets.image(self.game_settings.m4_image_path)
             # awp
         self.ammo_awp = self.game_settings.initial_awp_ammo
         self.clip_awp = self.game_settings.awp_clip_capacity
-        self.awp_sound = pygame.mixer.Sound(self.game_settings.awp_sound_path)
-        self.awp_image = pygame.image.load(self.game_settings.awp_image_path)
+        self.awp_sound = assets.sound(self.game_settings.awp_sound_path)
+        self.awp_image = assets.image(self.game_settings.awp_image_path)
 
-        self.ammo_pickup_sound = pygame.mixer.Sound(self.game_settings.ammo_pickup_sound_path)
-        self.clip_empty_sound = pygame.mixer.Sound(self.game_settings.clip_empty_sound_path)
+        self.ammo_pickup_sound = assets.sound(self.game_settings.ammo_pickup_sound_path)
+        self.clip_empty_sound = assets.sound(self.game_settings.clip_empty_sound_path)
 
         # reload sound
-        self.pistol_reload_sound = pygame.mixer.Sound(self.game_settings.pistol_reload_sound_path)
-        self.m4_reload_sound = pygame.mixer.Sound(self.game_settings.m4_reload_sound_path)
-        self.awp_reload_sound = pygame.mixer.Sound(self.game_settings.awp_reload_sound_path)
+        self.pistol_reload_sound = assets.sound(self.game_settings.pistol_reload_sound_path)
+        self.m4_reload_sound = assets.sound(self.game_settings.m4_reload_sound_path)
+        self.awp_reload_sound = assets.sound(self.game_settings.awp_reload_sound_path)
         self.reload_sounds = (self.pistol_reload_sound, self.m4_reload_sound, self.awp_reload_sound)
 
         # item pickup sound
-        self.item_pickup_sound = pygame.mixer.Sound(self.game_settings.item_pickup_sound_path)
+        self.item_pickup_sound = assets.sound(self.game_settings.item_pickup_sound_path)
 
         # define gun channel
-        self.gun_channel = pygame.mixer.Channel(self.game_settings.gun_channel)
+        self.gun_channel = assets.channel(self.game_settings.gun_channel)
 
-        self.reload_frame = 0
+        self.reload_timer = None  # completion of the reload on the timing wheel, None if not reloading
+        self.hud = PlayerHUD(game_settings)  # health bar, ammo and reload bar, redrawn only when they change
         self.auto_reload_flag = False
 
         self.last_pistol_shooting_time = 0
@@ -119,11 +137,14 @@ class Player:
         self.current_weapon = self.game_settings.pistol
         self.auto_shooting = False
 
-        # fire sheets container, will be filled by data in self.resources when fire
+        # fire animations, will play the clips in self.resources when fire
         # these images have higher precedence than normal player image to blit
-        self.pistol_fire_sheet = []
-        self.m4_fire_sheet = []
-        self.awp_fire_sheet = []
+        # they advance by one frame per simulation step (update()), the blit methods only read them
+        self.pistol_fire_animation = AnimationCursor()
+        self.m4_fire_animation = AnimationCursor()
+        self.awp_fire_animation = AnimationCursor()
+        self.fire_animations = (self.pistol_fire_animation, self.m4_fire_animation, self.awp_fire_animation)
+        self.fire_started = []  # fire animations started during this step, they show their first frame until the next one
 
     def update(self):
         """
@@ -131,6 +152,7 @@ class Player:
             1. update the coordinate of player's rect 
             2. play foot step if player is moving
             3. update the rotation of player's image
+            4. advance the fire animations by one frame
             
         """
         # update player's image according to different weapons carrying
@@ -147,17 +169,26 @@ class Player:
         # update player's coordinate and orientation
         self.update_player_pos()
 
-        # count reload time and reload
-        self.count_reload_time()
-
         # check auto weapon fire and reload
         if self.current_weapon == self.game_settings.m4 and self.auto_shooting:
             self.m4_fire()
 
         if self.clip_m4 == 0 and self.auto_reload_flag and self.reload_frame == 0 and self.ammo_m4 > 0:
-            self.reload_frame = self.game_settings.m4_reload_speed
+            self.start_reload(self.game_settings.m4_reload_speed)
             self.gun_channel.play(self.m4_reload_sound)
 
+        # fire animations, one frame per step
+        for animation in self.fire_animations:
+            if animation.playing and animation not in self.fire_started:
+                animation.advance()
+        self.fire_started.clear()
+
+    def play_fire_animation(self, animation, clip):
+        """start a fire animation, its first frame is shown after this step"""
+        animation.play(clip)
+        if animation not in self.fire_started:
+            self.fire_started.append(animation)
+
     def play_foot_step(self):
         # play random foot step sound while moving flag is true
         # if the character is trying to move out of the boundary, don't play sound
@@ -166,9 +197,9 @@ class Player:
                 self.moving_right and self.rect.right + self.game_settings.allowed_margin < self.screen_rect.right) or (
                 self.moving_up and self.rect.top > self.game_settings.allowed_margin):
             # if not self.foot_steps_channel.get_busy():  # if foot step channel is not playing
-            if pygame.time.get_ticks() - self.last_foot_step_time >= self.game_settings.weapon_foot_step_interval[self.current_weapon]:
-                self.foot_steps_channel.play(self.foot_steps[random.randint(0, 3)])
-                self.last_foot_step_time = pygame.time.get_ticks()
+            if game_clock.get_ticks() - self.last_foot_step_time >= self.game_settings.weapon_foot_step_interval[self.current_weapon]:
+                self.foot_steps_channel.play(self.foot_steps[game_random.randint(0, 3)])
+                self.last_foot_step_time = game_clock.get_ticks()
 
         # stop playing sound effect when player stopped
         if not self.moving_down and not self.moving_left and not self.moving_right and not self.moving_up:
@@ -176,6 +207,7 @@ class Player:
 
     def update_player_pos(self):
         # update player's coordinate, bound player within the screen
+        self.previous_center = self.rect.center
         if self.moving_down and self.rect.bottom + self.game_settings.allowed_margin < self.screen_rect.bottom:
             self.rect.centery += self.game_settings.character_speed - self.game_settings.weapon_speed_reduce_factor[self.current_weapon]
 
@@ -189,34 +221,43 @@ class Player:
             self.rect.centery -= self.game_settings.character_speed - self.game_settings.weapon_speed_reduce_factor[self.current_weapon]
 
         # rotate player's image
-        # get mouse coordinate
-        mouse_position = pygame.mouse.get_pos()
-
         # calculate angle using the initial rect
         self.angle = math.degrees(
-            math.atan2(self.rect.centery - mouse_position[1], self.rect.centerx - mouse_position[0]))
+            math.atan2(self.rect.centery - self.mouse_position[1], self.rect.centerx - self.mouse_position[0]))
 
         # rotate player's image surface and store rotated image in player's object
-        self.rotated_image = pygame.transform.rotate(self.image, 180 - self.angle)
+        self.rotated_image = rotations.rotate(self.image, 180 - self.angle)
 
         # find out where to blit the rotated image (coordinate of the upper left corner), store the updated rect in player's object
         self.updated_rect = self.rotated_image.get_rect()
         self.updated_rect.centerx = self.rect.centerx
         self.updated_rect.centery = self.rect.centery
 
-    def count_reload_time(self):
-        # count reload time if self.pistol_reload_frame is not zero
-        # this means the player is reloading
-        # update player's clip number when self.pistol_reload_frame is returned to zero
-        if self.reload_frame > 0:
-            self.reload_frame -= 1
-            if self.reload_frame == 0:
-                if self.current_weapon == self.game_settings.pistol:
-                    self.reload_pistol()
-                if self.current_weapon == self.game_settings.m4:
-                    self.reload_m4()
-                if self.current_weapon == self.game_settings.awp:
-                    self.reload_awp()
+    @property
+    def reload_frame(self):
+        """number of steps before the reload completes, 0 if the player is not reloading"""
+        if self.reload_timer is None:
+            return 0
+        return self.reload_timer.expires - timers.now
+
+    def start_reload(self, reload_speed):
+        """
+        the clip of the weapon in hand is refilled in reload_speed steps (complete_reload()),
+        a reload already running is restarted (its timer would complete the new one early)
+        """
+        if self.reload_timer is not None:
+            self.reload_timer.cancel()
+        self.reload_timer = timers.schedule(reload_speed, self.complete_reload)
+
+    def complete_reload(self):
+        # reload timer expired: update player's clip number
+        self.reload_timer = None
+        if self.current_weapon == self.game_settings.pistol:
+            self.reload_pistol()
+        if self.current_weapon == self.game_settings.m4:
+            self.reload_m4()
+        if self.current_weapon == self.game_settings.awp:
+            self.reload_awp()
 
     def reload_pistol(self):
         self.ammo_pistol += self.clip_pistol  # get remainning ammo
@@ -264,12 +305,11 @@ class Player:
             self.awp_fire()  # fire directly
 
     def pistol_fire(self):
-        if pygame.time.get_ticks() - self.last_pistol_shooting_time >= self.game_settings.pistol_shooting_interval and not gf.is_mouse_in_player(
+        if game_clock.get_ticks() - self.last_pistol_shooting_time >= self.game_settings.pistol_shooting_interval and not gf.is_mouse_in_player(
                 self) and self.reload_frame == 0:
             if self.clip_pistol > 0:
                 # create a pistol bullet and add to bullets
-                new_bullet = BulletPistol(self.game_settings, self.screen, self)
-                self.bullets.add(new_bullet)
+                self.shoot_bullet(self.game_settings.pistol)
                 self.shots += 1  # add to total number of shots
                 self.accuracy = self.zombie_hit / self.shots  # update accuracy
 
@@ -281,11 +321,11 @@ class Player:
                 #     self.screen.blit(rotated_fire_image, self.updated_rect)
                 #     pygame.display.flip()
 
-                # set pistol fire sheet
-                self.pistol_fire_sheet = self.resources.pistol_fire_sheet[:]
+                # play pistol fire animation
+                self.play_fire_animation(self.pistol_fire_animation, self.resources.pistol_fire_clip)
 
                 # update shooting time
-                self.last_pistol_shooting_time = pygame.time.get_ticks()
+                self.last_pistol_shooting_time = game_clock.get_ticks()
 
                 # update clip
                 self.clip_pistol -= 1
@@ -296,23 +336,22 @@ class Player:
                     self.reload()
 
     def awp_fire(self):
-        if pygame.time.get_ticks() - self.last_awp_shooting_time >= self.game_settings.awp_shooting_interval and not gf.is_mouse_in_player(
+        if game_clock.get_ticks() - self.last_awp_shooting_time >= self.game_settings.awp_shooting_interval and not gf.is_mouse_in_player(
                 self) and self.reload_frame == 0:
             if self.clip_awp > 0:
                 # create a awp bullet and add to bullets
-                new_bullet = BulletAwp(self.game_settings, self.screen, self)
-                self.bullets.add(new_bullet)
+                self.shoot_bullet(self.game_settings.awp)
                 self.shots += 1  # add to total number of shots
                 self.accuracy = self.zombie_hit / self.shots  # update accuracy
 
                 # play the shooting sound at designated channel
                 self.gun_channel.play(self.awp_sound)
 
-                # set awp fire sheet
-                self.awp_fire_sheet = self.resources.awp_fire_sheet[:]
+                # play awp fire animation
+                self.play_fire_animation(self.awp_fire_animation, self.resources.awp_fire_clip)
 
                 # update shooting time
-                self.last_awp_shooting_time = pygame.time.get_ticks()
+                self.last_awp_shooting_time = game_clock.get_ticks()
 
                 # update clip
                 self.clip_awp -= 1
@@ -323,24 +362,23 @@ class Player:
                     self.reload()
 
     def m4_fire(self):
-        if pygame.time.get_ticks() - self.last_auto_shooting_time >= self.game_settings.m4_shooting_interval and not gf.is_mouse_in_player(
+        if game_clock.get_ticks() - self.last_auto_shooting_time >= self.game_settings.m4_shooting_interval and not gf.is_mouse_in_player(
                 self) and self.reload_frame == 0:
 
             # update shooting time
-            self.last_auto_shooting_time = pygame.time.get_ticks()
+            self.last_auto_shooting_time = game_clock.get_ticks()
 
             if self.clip_m4 > 0:
-                # create a pistol bullet and add to bullets
-                new_bullet = BulletM4(self.game_settings, self.screen, self)
-                self.bullets.add(new_bullet)
+                # create a m4 bullet and add to bullets
+                self.shoot_bullet(self.game_settings.m4)
                 self.shots += 1  # add to total number of shots
                 self.accuracy = self.zombie_hit / self.shots  # update accuracy
 
                 # play the shooting sound at designated channel
                 self.gun_channel.play(self.m4_sound)
 
-                # set m4 fire sheet
-                self.m4_fire_sheet = self.resources.m4_fire_sheet[:]
+                # play m4 fire animation
+                self.play_fire_animation(self.m4_fire_animation, self.resources.m4_fire_clip)
 
                 # update clip
                 self.clip_m4 -= 1
@@ -348,6 +386,31 @@ class Player:
             else:
                 self.gun_channel.play(self.clip_empty_sound)
 
+    def shoot_bullet(self, weapon):
+        """
+        Create a bullet of weapon at the muzzle, flying toward the mouse
+        In a ProjectilePool, this only fills a free slot, no object is created
+        """
+        if isinstance(self.bullets, ProjectilePool):
+            x, y, angle = self.muzzle()
+            self.bullets.spawn(weapon, x, y, angle)
+        else:
+            self.bullets.add(self.bullet_classes[weapon](self.game_settings, self.screen, self))
+
+    def muzzle(self):
+        """
+        Position and direction of a new bullet (same as the Bullet classes)
+        :return: x, y, angle (radians)
+        """
+        mouse_position = self.mouse_position
+        angle = math.atan2(mouse_position[1] - (self.updated_rect[1] + self.rect.width / 2),
+                           mouse_position[0] - (self.updated_rect[0] + self.rect.height / 2))
+
+        # 36 and 32 are results of trial and error
+        x = self.rect[0] + 40 * math.sin(math.radians(90) - angle) + 36
+        y = self.rect[1] + 40 * math.cos(math.radians(90) - angle) + 32
+        return x, y, angle
+
     def injured(self):
         """
         This function is called when player is being attacked by zombie
@@ -362,74 +425,50 @@ class Player:
         Reload clip
         :return:
         """
-        self.reload_frame = self.game_settings.reload_speed[self.current_weapon]
+        self.start_reload(self.game_settings.reload_speed[self.current_weapon])
         self.gun_channel.play(self.reload_sounds[self.current_weapon])
 
-    def blit_player(self):
+    def blit_player(self, alpha=None):
         """
         This function will:
             - draw player
             - draw health bar
             - display ammo amount
             - draw reload bar if player is reloading
-        :return:
+
+        Parameter:
+            alpha: if given, draw the player at this fraction of its last move (render interpolation)
+        :return: list of the Rects of the screen drawn
         """
+        # where to draw the player
+        player_rect = self.updated_rect
+        if alpha is not None:
+            player_rect = self.updated_rect.move(interpolation_offset(self.previous_center, self.rect.center, alpha))
+
         # draw player, called in update_screen() function
-        if self.pistol_fire_sheet:
-            self.blit_pistol_fire()
-        elif self.m4_fire_sheet:
-            self.blit_m4_fire()
-        elif self.awp_fire_sheet:
-            self.blit_awp_fire()
+        drawn = []
+        if self.pistol_fire_animation.playing:
+            drawn.append(self.blit_pistol_fire(player_rect))
+        elif self.m4_fire_animation.playing:
+            drawn.append(self.blit_m4_fire(player_rect))
+        elif self.awp_fire_animation.playing:
+            drawn.append(self.blit_awp_fire(player_rect))
         else:
             # if not firing any weapon, blit the normal image
-            self.screen.blit(self.rotated_image, self.updated_rect)
+            drawn.append(self.screen.blit(self.rotated_image, player_rect))
 
-        # draw health bar
-        health_x = self.game_settings.screen_width - self.game_settings.health_bar_distancex
-        health_y = self.game_settings.screen_height - self.game_settings.health_bar_distancey
+        # draw health bar, ammo amount, current weapon and reload progress bar (cached by the HUD)
+        drawn.extend(self.hud.draw(self.screen, self))
+        return drawn
 
-        self.screen.blit(self.heart_image, (health_x - 30, health_y))  # draw heart
-        pygame.draw.rect(self.screen, (0, 0, 0), (health_x, health_y, self.game_settings.max_health_bar_length, 20), 1)  # draw hp box
-        pygame.draw.rect(self.screen, (255, 0, 0), (health_x + 1, health_y + 1, int(self.game_settings.max_health_bar_length * self.hp / self.game_settings.max_health_point) - 2, 18))
+    def blit_pistol_fire(self, player_rect):
+        rotated_image = rotations.rotate(self.pistol_fire_animation.frame(), 180 - self.angle)
+        return self.screen.blit(rotated_image, player_rect)
 
-        # display ammo amount
-        ammo_x = self.game_settings.weapon_distancex
-        ammo_y = self.game_settings.screen_height - self.game_settings.weapon_distancey
+    def blit_m4_fire(self, player_rect):
+        rotated_image = rotations.rotate(self.m4_fire_animation.frame(), 180 - self.angle)
+        return self.screen.blit(rotated_image, player_rect)
 
-        if self.current_weapon == self.game_settings.pistol:
-            ammo_text_surface = gf.text_format(str(self.clip_pistol) + '/' + str(self.ammo_pistol), self.game_settings.digital_font_path, 40, self.game_settings.BRIGHT_YELLOW)
-            self.screen.blit(ammo_text_surface, (ammo_x, ammo_y))
-        if self.current_weapon == self.game_settings.m4:
-            ammo_text_surface = gf.text_format(str(self.clip_m4) + '/' + str(self.ammo_m4), self.game_settings.digital_font_path, 40, self.game_settings.BRIGHT_YELLOW)
-            self.screen.blit(ammo_text_surface, (ammo_x, ammo_y))
-        if self.current_weapon == self.game_settings.awp:
-            ammo_text_surface = gf.text_format(str(self.clip_awp) + '/' + str(self.ammo_awp), self.game_settings.digital_font_path, 40, self.game_settings.BRIGHT_YELLOW)
-            self.screen.blit(ammo_text_surface, (ammo_x, ammo_y))
-
-        # draw current weapon player carrying
-        if self.current_weapon == self.game_settings.pistol:
-            self.screen.blit(self.pistol_image, (ammo_x - 150, ammo_y - 40))
-        if self.current_weapon == self.game_settings.m4:
-            self.screen.blit(self.m4_image, (ammo_x - 150, ammo_y - 40))
-        if self.current_weapon == self.game_settings.awp:
-            self.screen.blit(self.awp_image, (ammo_x - 150, ammo_y - 40))
-
-        # draw reload progress bar if player is reloading
-        if self.reload_frame > 0:
-            pygame.draw.rect(self.screen, (0, 0, 0), (self.rect[0], self.rect[1] - 30, self.game_settings.max_reload_bar_length, 20), 1)
-            pygame.draw.rect(self.screen, self.game_settings.BRIGHT_YELLOW, (self.rect[0] + 1, self.rect[1] - 29, int(self.game_settings.max_reload_bar_length * (1 - self.reload_frame / self.game_settings.reload_speed[self.current_weapon])) - 1, 18))
-            reload_text = gf.text_format("Reloading...", self.game_settings.segoeui_path, 18, self.game_settings.BRIGHT_YELLOW)
-            self.screen.blit(reload_text, (self.rect[0], self.rect[1] - 60))
-
-    def blit_pistol_fire(self):
-        rotated_image = pygame.transform.rotate(self.pistol_fire_sheet.pop(), 180 - self.angle)
-        self.screen.blit(rotated_image, self.updated_rect)
-
-    def blit_m4_fire(self):
-        rotated_image = pygame.transform.rotate(self.m4_fire_sheet.pop(), 180 - self.angle)
-        self.screen.blit(rotated_image, self.updated_rect)
-
-    def blit_awp_fire(self):
-        rotated_image = pygame.transform.rotate(self.awp_fire_sheet.pop(), 180 - self.angle)
-        self.screen.blit(rotated_image, self.updated_rect)
+    def blit_awp_fire(self, player_rect):
+        rotated_image = rotations.rotate(self.awp_fire_animation.frame(), 180 - self.angle)
+        return self.screen.blit(rotated_image, player_rect)
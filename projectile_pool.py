@@ -0,0 +1,146 @@
+from game_random import game_random
+import math
+from asset_manager import assets
+from rotation_cache import rotations
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, bullets are sprites (bullet.py) without it
+    np = None
+
+
+class ProjectilePool:
+    """
+    All bullets of all weapons in one fixed-capacity pool of numpy arrays.
+
+    Firing used to create a Bullet sprite (image load, rotation, mouse query), and every frame each
+    bullet recomputed its velocity with cos/sin and truncated its position to ints. In the pool,
+    a shot only writes a few numbers into a free slot: position (floats), velocity (computed once),
+    damage, original damage, slow down factor and weapon id. All bullets are moved and culled
+    at once with vectorized operations, and finished slots go back to a free list.
+
+    Attributes (self.):
+        :x, y: bullet center
+        :previous_x, previous_y: center before the last move (path used for swept collision)
+        :vx, vy: velocity, pixels per frame
+        :angle: travel direction in degrees, used to pick the rotated image
+        :damage, original_damage: remaining and initial damage of the bullet
+        :slow: slow down factor applied to zombies hit
+        :weapon: weapon id (game_settings.pistol, m4 or awp)
+        :active: slot in use
+        :free: stack of free slots, the first free_count entries are valid
+        :hit_zombies: slot -> set of the spawn ids of the zombies already hit by the bullet in this slot
+    """
+    available = np is not None
+
+    def __init__(self, game_settings, screen, capacity=None):
+        self.game_settings = game_settings
+        self.screen = screen
+        if capacity is None:
+            capacity = game_settings.projectile_pool_capacity
+        self.capacity = capacity
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.previous_x = np.zeros(capacity)
+        self.previous_y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.angle = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+        self.original_damage = np.zeros(capacity)
+        self.slow = np.zeros(capacity)
+        self.weapon = np.zeros(capacity, dtype=np.int8)
+        self.active = np.zeros(capacity, dtype=bool)
+
+        self.free = np.arange(capacity - 1, -1, -1)
+        self.free_count = capacity
+        self.hit_zombies = [set() for i in range(capacity)]
+
+        # per weapon tables, indexed by weapon id
+        weapons = [None] * game_settings.weapon_number
+        weapons[game_settings.pistol] = 'pistol'
+        weapons[game_settings.m4] = 'm4'
+        weapons[game_settings.awp] = 'awp'
+        self.speeds = [getattr(game_settings, 'bullet_%s_speed' % weapon) for weapon in weapons]
+        self.min_damages = [getattr(game_settings, 'bullet_%s_min_damage' % weapon) for weapon in weapons]
+        self.max_damages = [getattr(game_settings, 'bullet_%s_max_damage' % weapon) for weapon in weapons]
+        self.slow_down_factors = [getattr(game_settings, 'bullet_%s_slow_down_factor' % weapon) for weapon in weapons]
+        self.images = [assets.image(getattr(game_settings, 'bullet_%s_image_path' % weapon)) for weapon in weapons]
+
+    def __len__(self):
+        """number of bullets in flight"""
+        return self.capacity - self.free_count
+
+    def spawn(self, weapon, x, y, angle):
+        """
+        Fire a bullet of weapon from (x, y), toward angle (radians)
+        :return: slot of the bullet, or None if the pool is full (the shot is dropped)
+        """
+        if self.free_count == 0:
+            return None
+
+        self.free_count -= 1
+        slot = self.free[self.free_count]
+
+        speed = self.speeds[weapon]
+        self.x[slot] = self.previous_x[slot] = x
+        self.y[slot] = self.previous_y[slot] = y
+        self.vx[slot] = math.cos(angle) * speed
+        self.vy[slot] = math.sin(angle) * speed
+        self.angle[slot] = math.degrees(angle)
+        self.damage[slot] = self.original_damage[slot] = game_random.randint(self.min_damages[weapon], self.max_damages[weapon])
+        self.slow[slot] = self.slow_down_factors[weapon]
+        self.weapon[slot] = weapon
+        self.active[slot] = True
+        self.hit_zombies[slot].clear()
+        return slot
+
+    def release(self, slot):
+        """free a slot (bullet spent or out of screen)"""
+        if self.active[slot]:
+            self.active[slot] = False
+            self.free[self.free_count] = slot
+            self.free_count += 1
+
+    def update(self):
+        """move all bullets, then free those that left the screen"""
+        np.copyto(self.previous_x, self.x)
+        np.copyto(self.previous_y, self.y)
+        self.x += self.vx
+        self.y += self.vy
+
+        margin = self.game_settings.projectile_cull_margin
+        out = self.active & ((self.x < -margin) | (self.x > self.game_settings.screen_width + margin) |
+                             (self.y < -margin) | (self.y > self.game_settings.screen_height + margin))
+        for slot in np.flatnonzero(out):
+            self.release(slot)
+
+    def half_size(self, slot):
+        """:return: half width and half height of the rect of the rotated image of the bullet in slot"""
+        length, thickness = self.images[self.weapon[slot]].get_size()
+        radians = math.radians(self.angle[slot])
+        cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
+        return (length * cos + thickness * sin) / 2, (length * sin + thickness * cos) / 2
+
+    def slots(self):
+        """slots of the bullets in flight"""
+        return np.flatnonzero(self.active)
+
+    def draw(self, screen=None, alpha=None):
+        """
+        blit every bullet in flight
+        if alpha is given, bullets are drawn at this fraction of their last move (render interpolation)
+        :return: list of the Rects of the screen drawn
+        """
+        if screen is None:
+            screen = self.screen
+        x, y = self.x, self.y
+        if alpha is not None:
+            x = self.previous_x + (self.x - self.previous_x) * alpha
+            y = self.previous_y + (self.y - self.previous_y) * alpha
+        drawn = []
+        for slot in self.slots():
+            image, rect = rotations.rect(self.images[self.weapon[slot]], 360 - self.angle[slot], (x[slot], y[slot]))
+            drawn.append(screen.blit(image, rect))
+        return drawn
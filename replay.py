@@ -0,0 +1,201 @@
+import json
+import struct
+import zlib
+from collections import namedtuple
+import pygame
+from setting import Settings
+from game_clock import game_clock
+
+
+# input of one simulation step:
+#   mouse_x, mouse_y: aiming point
+#   keys: bit mask of the movement keys held (MOVE_UP, MOVE_LEFT, MOVE_DOWN, MOVE_RIGHT)
+#   actions: tuple of (kind, code) input events since the previous step, kind is KEY_DOWN (code: key),
+#            MOUSE_DOWN or MOUSE_UP (code: mouse button)
+InputSnapshot = namedtuple('InputSnapshot', ('mouse_x', 'mouse_y', 'keys', 'actions'))
+
+MOVE_UP = 1
+MOVE_LEFT = 2
+MOVE_DOWN = 4
+MOVE_RIGHT = 8
+
+KEY_DOWN = 0
+MOUSE_DOWN = 1
+MOUSE_UP = 2
+
+# replay file: header, settings (json), then a zlib stream of one record per step and an end record
+REPLAY_MAGIC = b'ZRPL'
+REPLAY_VERSION = 1
+HEADER_FORMAT = '<4sBII'  # magic, version, seed, length of the settings json
+STEP_FORMAT = '<hhBB'  # mouse x, mouse y, keys, number of actions
+ACTION_FORMAT = '<BI'  # kind, code
+END_FORMAT = '<II'  # number of steps, digest of the final game state
+END_MARK = 255  # number of actions of the end record
+
+
+class InputState:
+    """
+    Live input of the player, collected from pygame events by check_events() and handed to
+    the next simulation step as an InputSnapshot. Inputs only act at step boundaries, so the
+    same snapshots give the same session (see ReplayRecorder)
+
+    Attributes (self.):
+        :mouse_position: aiming point
+        :keys: bit mask of the movement keys held
+        :actions: input events received since the last snapshot
+    """
+    held_keys = {
+        pygame.K_w: MOVE_UP,
+        pygame.K_a: MOVE_LEFT,
+        pygame.K_s: MOVE_DOWN,
+        pygame.K_d: MOVE_RIGHT,
+    }
+
+    def __init__(self, mouse_x, mouse_y):
+        self.mouse_position = (mouse_x, mouse_y)
+        self.keys = 0
+        self.actions = []
+
+    def handle_event(self, event):
+        """record a keyboard or mouse button event"""
+        if event.type == pygame.KEYDOWN:
+            if event.key in self.held_keys:
+                self.keys |= self.held_keys[event.key]
+            else:
+                self.actions.append((KEY_DOWN, event.key))
+
+        elif event.type == pygame.KEYUP:
+            if event.key in self.held_keys:
+                self.keys &= ~self.held_keys[event.key]
+
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.actions.append((MOUSE_DOWN, event.button))
+
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.actions.append((MOUSE_UP, event.button))
+
+    def take(self):
+        """:return: InputSnapshot of the current input, the pending actions are consumed"""
+        snapshot = InputSnapshot(int(self.mouse_position[0]), int(self.mouse_position[1]), self.keys, tuple(self.actions))
+        self.actions.clear()
+        return snapshot
+
+
+def settings_overrides(game_settings):
+    """:return: dictionary of the settings that differ from the defaults of Settings()"""
+    defaults = Settings().__dict__
+    overrides = {}
+    for name, value in game_settings.__dict__.items():
+        if name not in defaults or value != defaults[name]:
+            overrides[name] = value
+    return overrides
+
+
+def world_digest(world):
+    """
+    Checksum of the game state: player, zombies, items and simulated time.
+    Two sessions played from the same replay must end with the same digest
+    """
+    player = world.player
+    state = [game_clock.get_ticks(), player.rect.center, player.hp, player.zombie_killed, player.shots,
+             player.clip_pistol, player.ammo_pistol, player.clip_m4, player.ammo_m4, player.clip_awp, player.ammo_awp,
+             len(world.bullets), len(world.dead_zombies), len(world.ammos), len(world.first_aid_packs)]
+    for zombie in world.zombies:
+        state.append((zombie.rect.center, float(zombie.hp)))
+    return zlib.crc32(repr(state).encode())
+
+
+class ReplayRecorder:
+    """
+    Write the input of every simulation step of a session to a compact binary replay file.
+    Together with the seed and the settings of the session, stored in the header, the inputs
+    are enough to play the session again exactly (ReplayReader)
+    """
+
+    def __init__(self, path, world):
+        self.file = open(path, 'wb')
+        self.compressor = zlib.compressobj(9)
+        self.steps = 0
+
+        settings = json.dumps(settings_overrides(world.game_settings)).encode()
+        self.file.write(struct.pack(HEADER_FORMAT, REPLAY_MAGIC, REPLAY_VERSION, world.seed, len(settings)))
+        self.file.write(settings)
+
+    def record(self, snapshot):
+        """append the input of one step"""
+        data = struct.pack(STEP_FORMAT, snapshot.mouse_x, snapshot.mouse_y, snapshot.keys, len(snapshot.actions))
+        for kind, code in snapshot.actions:
+            data += struct.pack(ACTION_FORMAT, kind, code)
+        self.file.write(self.compressor.compress(data))
+        self.steps += 1
+
+    def close(self, world):
+        """end the file with the number of steps and the digest of the final game state"""
+        if self.file.closed:
+            return
+        data = struct.pack(STEP_FORMAT, 0, 0, 0, END_MARK) + struct.pack(END_FORMAT, self.steps, world_digest(world))
+        self.file.write(self.compressor.compress(data))
+        self.file.write(self.compressor.flush())
+        self.file.close()
+
+
+class ReplayReader:
+    """
+    Read a replay file written by ReplayRecorder
+
+    Attributes (self.):
+        :seed: seed of the recorded session
+        :overrides: settings of the recorded session that differ from the defaults
+        :snapshots: InputSnapshot of each step
+        :steps: number of steps recorded
+        :digest: digest of the final game state (None if the recording was not closed)
+        :position: index of the next snapshot
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        header_size = struct.calcsize(HEADER_FORMAT)
+        magic, version, self.seed, settings_size = struct.unpack_from(HEADER_FORMAT, data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError('%s is not a replay file (version %d)' % (path, REPLAY_VERSION))
+        self.overrides = json.loads(data[header_size:header_size + settings_size].decode())
+
+        body = zlib.decompressobj().decompress(data[header_size + settings_size:])
+        self.snapshots = []
+        self.digest = None
+        step_size = struct.calcsize(STEP_FORMAT)
+        action_size = struct.calcsize(ACTION_FORMAT)
+        offset = 0
+        while offset + step_size <= len(body):
+            mouse_x, mouse_y, keys, action_count = struct.unpack_from(STEP_FORMAT, body, offset)
+            offset += step_size
+            if action_count == END_MARK:
+                steps, self.digest = struct.unpack_from(END_FORMAT, body, offset)
+                break
+            actions = tuple(struct.unpack_from(ACTION_FORMAT, body, offset + i * action_size) for i in range(action_count))
+            offset += action_count * action_size
+            self.snapshots.append(InputSnapshot(mouse_x, mouse_y, keys, actions))
+
+        self.steps = len(self.snapshots)
+        self.position = 0
+
+    def apply_settings(self, game_settings):
+        """give game_settings the settings of the recorded session"""
+        for name, value in self.overrides.items():
+            if isinstance(getattr(game_settings, name, None), tuple):
+                value = tuple(value)
+            setattr(game_settings, name, value)
+
+    @property
+    def finished(self):
+        return self.position >= self.steps
+
+    def next(self):
+        """:return: InputSnapshot of the next step, or None at the end of the replay"""
+        if self.finished:
+            return None
+        snapshot = self.snapshots[self.position]
+        self.position += 1
+        return snapshot
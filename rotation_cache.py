@@ -0,0 +1,112 @@
+import pygame
+from collections import OrderedDict
+from setting import Settings
+
+
+class RotationCache:
+    """
+    A class to share rotated copies of sprite images.
+
+    pygame.transform.rotate() is expensive and used to be called for every zombie, bullet and
+    fire frame on every frame. Angles are quantized to a fixed step (e.g. 2 degrees), so each
+    source image has at most 360 / step rotated versions, built lazily (or all at once by
+    prewarm()) and reused by every sprite that shows the same image.
+
+    The cache is bounded by memory: when the rotated surfaces exceed max_bytes, the least
+    recently used ones are dropped and will be rebuilt on demand.
+
+    Attributes (self.):
+        :step: angle quantization step in degrees
+        :max_bytes: memory cap of the rotated surfaces
+        :entries: (source surface, quantized angle) -> (rotated surface, (offset x, offset y)),
+            ordered from least to most recently used. The offset is the position of the rotated
+            surface's top left corner relative to the rotation center
+        :bytes: memory currently held by the rotated surfaces
+    """
+
+    def __init__(self, step, max_bytes):
+        self.step = step
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, angle):
+        """round angle (degrees) to the nearest step, in range [0, 360)"""
+        return round(angle / self.step) * self.step % 360
+
+    def get(self, surface, angle):
+        """
+        Look up (or build) the rotated version of surface
+        :return: rotated surface, offset of its top left corner to the rotation center
+        """
+        key = (surface, self.quantize(angle))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        rotated = pygame.transform.rotate(surface, key[1])
+        entry = rotated, (-(rotated.get_width() // 2), -(rotated.get_height() // 2))
+        self.entries[key] = entry
+        self.bytes += rotated.get_pitch() * rotated.get_height()
+
+        # evict least recently used rotations when over the memory cap (always keep the new one)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            old_rotated = self.entries.popitem(last=False)[1][0]
+            self.bytes -= old_rotated.get_pitch() * old_rotated.get_height()
+            self.evictions += 1
+
+        return entry
+
+    def rotate(self, surface, angle):
+        """drop-in replacement of pygame.transform.rotate(surface, angle)"""
+        return self.get(surface, angle)[0]
+
+    def rect(self, surface, angle, center):
+        """
+        :return: rotated surface, and the rect to blit it so that it is centered at center
+        """
+        rotated, offset = self.get(surface, angle)
+        return rotated, pygame.Rect(center[0] + offset[0], center[1] + offset[1], rotated.get_width(), rotated.get_height())
+
+    def prewarm(self, surface):
+        """build every rotation of surface at once, e.g. at load time"""
+        angle = 0
+        while angle < 360:
+            self.get(surface, angle)
+            angle += self.step
+
+    def prewarm_job(self, surfaces, angles_per_slice=10):
+        """generator building every rotation of surfaces, a few angles per slice (job_scheduler job)"""
+        for surface in surfaces:
+            angle = 0
+            while angle < 360:
+                for i in range(angles_per_slice):
+                    if angle < 360:
+                        self.get(surface, angle)
+                        angle += self.step
+                yield
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+# the rotation cache shared by zombies, player and bullets
+_settings = Settings()
+rotations = RotationCache(_settings.rotation_angle_step, _settings.rotation_cache_max_bytes)
@@ -36,6 +36,18 @@ class Settings:
         self.screen_width = 1366
         self.screen_height = 768
 
+        # rotation cache settings (shared rotated sprite images)
+        self.rotation_angle_step = 2  # angles are rounded to multiples of this value, in degrees
+        self.rotation_cache_max_bytes = 64 * 1024 * 1024  # least recently used rotations are dropped above this size
+
+        # rendered text cache (menus and HUD)
+        self.text_cache_max_bytes = 8 * 1024 * 1024  # least recently used text surfaces are dropped above this size
+
+        # collision settings
+        self.collision_cell_size = 160  # cell size of the collision grid (spatial hash), about the size of a zombie
+        self.swept_bullet_collision = True  # test the whole path a bullet moved along this frame, so fast bullets can't skip zombies
+        self.bullet_spent_damage = 20  # bullet is removed when its remaining damage is not larger than this value
+
         # UI settings
         self.background_path = 'img/bg.png'
         self.health_bar_distancex = 350  # distance to x = screen.width (x-direction)
@@ -83,9 +95,14 @@ class Settings:
         self.awp_shooting_interval = 1500  # shooting interval of pistol, in ms
         self.bullet_awp_min_damage = 500
         self.bullet_awp_max_damage = 700
-        self.bullet_awp_damage_distance = 80  # center distance between bullet's rect and target's rect
+        self.bullet_awp_damage_distance = 80  # max center distance between bullet's rect and target's rect, for the bullets of every weapon (their rects must also overlap)
         self.bullet_awp_slow_down_factor = 0.2  # will slow down zombie to this ratio
 
+        # projectile pool: all bullets in fixed-size numpy arrays (only used if numpy is installed)
+        self.projectile_pool_enabled = True
+        self.projectile_pool_capacity = 256  # maximum number of bullets in flight
+        self.projectile_cull_margin = 60  # bullets are removed this far outside of the screen
+
         # weapon and ammo settings and resources
         self.weapon_number = 3
         self.pistol = 0
@@ -220,15 +237,77 @@ class Settings:
 
         self.zombie_speed = 3
         self.spawn_distance = 0  # distance to edge of screen, zombies are spawned outside of screen
-        self.spawn_time = 1000  # time to spawn a zombie, in milliseconds
+        self.wave_file = 'waves/default.json'  # waves of zombies of the spawn director (waves/horde.json: thousands of zombies)
 
         self.zombie_damage = 20  # max damage to player's hp (each attack)
         self.zombie_attack_interval = 1000  # attack time interval, in ms
+        self.zombie_attack_sweep_angle = 45  # zombie image sweeps back this many degrees when attacking, 1 degree each frame
         self.zombie_attack_sound_path = ['sfx/zombie/zm_attack1.wav', 'sfx/zombie/zm_attack2.wav', 'sfx/zombie/zm_attack3.wav', 'sfx/zombie/zm_attack4.wav']
         self.zombie_hit_sound_path = 'sfx/zombie/zm_hit.wav'
         self.zombie_death_sound_path = 'sfx/zombie/explode.wav'
         self.zombie_hit_slow_down_restore_factor = 0.02  # amount to restore the zombie hit slow down factor by each frame
 
+        # zombie pathing: a flow field (distance map from the player) shared by all zombies leads them around obstacles
+        self.flow_field_enabled = True
+        self.flow_field_cell_size = 40  # cell size of the flow field, in pixels
+        self.flow_field_margin = 160  # the field extends this far beyond the spawn area (pixels)
+        self.map_obstacles = []  # rects (x, y, width, height) that zombies walk around
+
+        # crowd separation: zombies closer than the radius push each other away, so waves do not stack on one point
+        self.separation_enabled = True
+        self.separation_radius = 50  # in pixels
+        self.separation_weight = 0.5  # maximum push, as a fraction of zombie_speed
+        self.separation_max_neighbours = 8  # neighbours taken into account for the push of a zombie
+        self.separation_budget = 300  # zombies whose push is recomputed each step, the others keep their last push
+
+        # zombie level of detail: far or hidden zombies refresh their heading and rotation less often
+        self.zombie_lod_enabled = True
+        self.zombie_lod_near_distance = 400  # zombies closer to the player (pixels) are fully updated every step
+        self.zombie_lod_far_interval = 4  # other zombies refresh their heading every this many steps, in staggered buckets
+        self.zombie_lod_visible_margin = 100  # zombies less than this outside of the screen (pixels) are still rotated
+
+        # zombie engine: update all zombies at once with numpy arrays (only used if numpy is installed)
+        self.zombie_engine_enabled = False
+        self.zombie_engine_capacity = 1024  # initial number of zombie slots, arrays grow when full
+
+        # object pools: zombies, corpses and items are reused instead of created for each spawn
+        self.object_pool_prewarm = True  # create pooled objects when the game starts
+        self.zombie_pool_prewarm = 30  # number of zombies created in advance
+        self.corpse_pool_prewarm = 20  # number of dead zombies created in advance
+        self.item_pool_prewarm = 5  # number of each kind of ammo and first aid pack created in advance
+
+        # game loop: the simulation advances in fixed steps, rendering is capped at FPS
+        self.simulation_rate = 60  # simulation steps per second (speeds and lifetimes are per step)
+        self.max_simulation_steps = 5  # maximum steps per rendered frame, the rest of a long delay is dropped
+        self.render_enabled = True  # if False, nothing is drawn and the simulation runs as fast as possible
+        self.interpolate_rendering = True  # draw moving objects between their previous and current positions
+
+        # deterministic sessions
+        self.session_seed = None  # seed of the game's random stream, None: a new random seed for each game
+        self.replay_record_path = None  # if set, every game is recorded to this replay file
+
+        # frame profiler overlay (toggled with F3 during the game)
+        self.profiler_history_frames = 300  # number of frames kept for percentiles and the frame time graph
+        self.profiler_refresh_frames = 10  # the overlay text is redrawn every this many frames
+
+        # trace export (F4 during the game starts / stops recording trace_<date>_<time>.json)
+        self.trace_flush_interval = 0.5  # seconds between two writes of the recorded events to the file
+
+        # dirty rectangle rendering: only the parts of the screen that changed are redrawn and updated
+        self.dirty_rects_enabled = True  # if False, the whole screen is redrawn and flipped every frame
+        self.dirty_rect_full_flip_coverage = 0.5  # fraction of the screen changed above which the whole screen is flipped
+        self.dirty_rect_max_rects = 600  # number of rects drawn in a frame above which the whole screen is flipped
+        self.dirty_rect_max_merge_waste = 1.25  # two overlapping rects are merged if their union is at most this many times their areas
+
+        # background jobs (saves, cache warmups, corpse baking) run in the time left in a frame
+        self.job_frame_budget_ms = 12  # jobs run after a frame is drawn as long as the frame took less than this
+
+        # menus sleep until an event arrives and only redraw when they change
+        self.menu_event_timeout_ms = 500  # longest sleep of a menu without events
+        self.menu_job_interval_ms = 50  # sleep of a menu between two runs of the queued background jobs
+        self.ui_key_repeat_delay = 200  # a key held in a form repeats after this delay (ms)
+        self.ui_key_repeat_interval = 50  # then every this many ms
+
         # sound channels (playback channels)
         self.foot_step_channel = 0
         self.gun_channel = 1
@@ -236,7 +315,7 @@ class Settings:
         self.zombie_attack_channel = 3
 
         # welcome menu and game settings
-        self.FPS = 60
+        self.FPS = 60  # maximum rendered frames per second
 
         # Colors
         self.color_white = (255, 255, 255)
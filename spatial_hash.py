@@ -0,0 +1,73 @@
+class SpatialHash:
+    """
+    A uniform grid used as collision broad-phase.
+
+    Every sprite is registered in each grid cell its rect overlaps. A query only looks at the
+    cells covered by the query rect, so testing B bullets against Z zombies costs about
+    O(Z + B) instead of testing every pair (O(Z x B)).
+    The grid is rebuilt from the sprites' rects once per frame (build()).
+
+    Attributes (self.):
+        :cell_size: width and height of a cell, in pixels. Should be about the size of the largest sprite
+        :cells: (column, row) -> list of sprites overlapping this cell
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_range(self, rect):
+        """columns and rows of the cells covered by rect"""
+        size = self.cell_size
+        return range(rect.left // size, (rect.right - 1) // size + 1), range(rect.top // size, (rect.bottom - 1) // size + 1)
+
+    def insert(self, item, rect):
+        columns, rows = self.cell_range(rect)
+        cells = self.cells
+        for column in columns:
+            for row in rows:
+                cell = cells.get((column, row))
+                if cell is None:
+                    cells[(column, row)] = [item]
+                else:
+                    cell.append(item)
+
+    def build(self, *groups):
+        """clear the grid and register every sprite of the given groups (or lists) by its rect"""
+        self.cells.clear()
+        for group in groups:
+            for sprite in group:
+                self.insert(sprite, sprite.rect)
+
+    def query(self, rect):
+        """
+        :return: list of the sprites registered in the cells covered by rect, without duplicates
+            (candidates only, the caller does the exact collision test). The list must not be modified
+        """
+        columns, rows = self.cell_range(rect)
+        cells = self.cells
+
+        # fast path, rect inside a single cell
+        if len(columns) == 1 and len(rows) == 1:
+            return cells.get((columns[0], rows[0]), [])
+
+        found = []
+        seen = set()
+        for column in columns:
+            for row in rows:
+                for item in cells.get((column, row), ()):
+                    if item not in seen:
+                        seen.add(item)
+                        found.append(item)
+        return found
+
+    def candidate_pairs(self, sprites):
+        """
+        :return: generator of (sprite, candidate) for each sprite in sprites and each candidate sharing a cell with it
+        """
+        for sprite in sprites:
+            for candidate in self.query(sprite.rect):
+                yield sprite, candidate
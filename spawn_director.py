@@ -0,0 +1,124 @@
+import json
+import random
+from zombie import Zombie
+from zombie_engine import EngineZombie
+from game_clock import game_clock
+from game_random import game_random
+
+
+class SpawnDirector:
+    """
+    Spawn the zombies following a wave file (JSON, see waves/default.json):
+
+        {
+            "max_zombies": 300,       zombies alive at the same time, no spawn above it
+            "spawn_per_step": 100,    a burst is spread over several steps if it is larger than this
+            "edge_positions": 1024,   number of spawn positions precomputed around the screen
+            "prewarm": 30,            zombies created in the pool before the game starts
+            "waves": [
+                {"from_kills": 0, "interval": 1000, "burst": 1},
+                {"from_kills": 11, "interval": 2500, "burst": 1, "max_zombies": 50},
+                ...
+            ]
+        }
+
+    The current wave is the last one whose from_kills the player reached. Every interval (ms of game
+    time) the wave adds burst zombies to spawn; they appear at random positions of the precomputed
+    edge table, at most spawn_per_step per simulation step and while fewer than max_zombies (of the
+    wave, or of the file) are alive. Spawned zombies are taken from the zombie pool.
+
+    Attributes (self.):
+        :name: name of the wave file
+        :waves: list of waves (dictionaries), sorted by from_kills
+        :wave_index: index of the current wave
+        :max_zombies, spawn_per_step, prewarm: as in the file
+        :edge_positions: precomputed spawn positions (x, y)
+        :last_spawn_time: game time of the last burst
+        :pending: zombies of the bursts not spawned yet
+        :spawned: number of zombies spawned in the session
+    """
+
+    def __init__(self, game_settings, path=None):
+        self.game_settings = game_settings
+        if path is None:
+            path = game_settings.wave_file
+        with open(path) as file:
+            data = json.load(file)
+
+        self.name = data.get('name', path)
+        self.waves = sorted(data['waves'], key=lambda wave: wave['from_kills'])
+        self.max_zombies = data.get('max_zombies', 300)
+        self.spawn_per_step = data.get('spawn_per_step', 100)
+        self.prewarm = data.get('prewarm', game_settings.zombie_pool_prewarm)
+        self.edge_positions = self.compute_edge_positions(data.get('edge_positions', 1024))
+
+        self.wave_index = 0
+        self.last_spawn_time = game_clock.get_ticks()
+        self.pending = 0
+        self.spawned = 0
+
+    def compute_edge_positions(self, count):
+        """
+        :return: count spawn positions outside the four edges of the screen (as Zombie.random_spawn_generator()).
+            They come from a fixed seed, so the table is the same in every session
+        """
+        table_random = random.Random(count)
+        d = self.game_settings.spawn_distance
+        s_h = self.game_settings.screen_height
+        s_w = self.game_settings.screen_width
+
+        positions = []
+        for i in range(count):
+            region_code = table_random.randint(1, 4)  # corresponds to four edges
+            if region_code == 1:  # spawn at left edge
+                positions.append((table_random.randint(-2 * d, -d), table_random.randint(0, s_h)))
+            elif region_code == 2:
+                positions.append((table_random.randint(0, s_w), table_random.randint(-2 * d, -d)))
+            elif region_code == 3:
+                positions.append((table_random.randint(s_w + d, s_w + 2 * d), table_random.randint(0, s_h)))
+            else:
+                positions.append((table_random.randint(0, s_w), table_random.randint(s_h + d, s_h + 2 * d)))
+        return positions
+
+    def current_wave(self, zombie_killed):
+        """:return: the wave reached with zombie_killed kills"""
+        while self.wave_index + 1 < len(self.waves) and zombie_killed >= self.waves[self.wave_index + 1]['from_kills']:
+            self.wave_index += 1
+        return self.waves[self.wave_index]
+
+    def update(self, zombies, player, screen, zombie_engine=None):
+        """spawn the zombies due at this step"""
+        wave = self.current_wave(player.zombie_killed)
+        max_zombies = wave.get('max_zombies', self.max_zombies)
+
+        # a new burst every interval
+        now = game_clock.get_ticks()
+        if now - self.last_spawn_time >= wave['interval']:
+            self.pending = min(self.pending + wave['burst'], max_zombies)
+            self.last_spawn_time = now
+
+        count = min(self.pending, self.spawn_per_step, max_zombies - len(zombies))
+        if count <= 0:
+            return
+        self.pending -= count
+        self.spawned += count
+
+        # add new (or reused) zombies in zombies
+        game_settings = self.game_settings
+        positions = self.edge_positions
+        new_zombies = []
+        for i in range(count):
+            position = positions[game_random.randrange(len(positions))]
+            if zombie_engine is None:
+                new_zombies.append(Zombie.pool.acquire(game_settings, screen, player, position))
+            else:
+                new_zombies.append(EngineZombie.pool.acquire(game_settings, screen, player, zombie_engine, position))
+        zombies.add(new_zombies)
+
+    def stats(self):
+        return {
+            'waves': self.name,
+            'wave': self.wave_index,
+            'pending': self.pending,
+            'spawned': self.spawned,
+        }
@@ -0,0 +1,38 @@
+"""
+Tests of the game sessions, run without a display: python -m unittest test_game_world
+"""
+import unittest
+from setting import Settings
+from headless import run_headless
+from zombie import Zombie, DeadZombie
+from zombie_engine import EngineZombie, ZombieEngine
+from ammo import PistolAmmo, M4Ammo, AwpAmmo
+from first_aid_pack import FirstAidPack
+
+POOLED_CLASSES = (Zombie, EngineZombie, DeadZombie, PistolAmmo, M4Ammo, AwpAmmo, FirstAidPack)
+
+
+class SessionPoolsTest(unittest.TestCase):
+    """the objects of a session go back to their pools when it ends, even the corpses and items still on the map"""
+
+    def run_sessions(self, engine):
+        for seed in (1, 2):
+            game_settings = Settings()
+            game_settings.zombie_engine_enabled = engine
+            game_settings.initial_m4_ammo = 100000
+            # long enough for kills, corpses and item drops, short enough that some are left at the end
+            result = run_headless(game_settings, 10, invincible=True, seed=seed)
+            self.assertGreater(result['zombie_killed'], 0)
+            for cls in POOLED_CLASSES:
+                self.assertEqual(cls.pool.in_use, 0, '%s objects not released after session %d' % (cls.__name__, seed))
+
+    def test_two_sessions_release_everything(self):
+        self.run_sessions(engine=False)
+
+    @unittest.skipUnless(ZombieEngine.available, 'numpy is not installed')
+    def test_two_sessions_release_everything_with_engine(self):
+        self.run_sessions(engine=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
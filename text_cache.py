@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from setting import Settings
+from asset_manager import assets
+
+
+class TextCache:
+    """
+    A class to share rendered text surfaces.
+
+    Menus draw the same lines every frame and Font.render() is slow (glyphs are rasterized each time),
+    so rendered surfaces are kept and reused for the same text, font, size and colour. The fonts come
+    from the asset manager, one Font per (path, size).
+
+    The cache is bounded by memory: when the surfaces exceed max_bytes, the least recently used ones
+    are dropped and will be rendered again on demand (e.g. the changing numbers of the ammo counter).
+
+    Attributes (self.):
+        :max_bytes: memory cap of the rendered surfaces
+        :entries: (text, font path, size, colour, antialias) -> rendered surface,
+            ordered from least to most recently used
+        :bytes: memory currently held by the rendered surfaces
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, text, path, size, colour, antialias=False):
+        """
+        Look up (or render) text in the font at path (None for pygame's default font)
+        :return: shared surface of the text, it must not be drawn on
+        """
+        key = (text, path, size, tuple(colour), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = assets.font(path, size).render(text, antialias, colour)
+        self.entries[key] = surface
+        self.bytes += surface.get_pitch() * surface.get_height()
+
+        # evict least recently used surfaces when over the memory cap (always keep the new one)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            old_surface = self.entries.popitem(last=False)[1]
+            self.bytes -= old_surface.get_pitch() * old_surface.get_height()
+            self.evictions += 1
+
+        return surface
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+# the text cache shared by the menus and the HUD
+_settings = Settings()
+texts = TextCache(_settings.text_cache_max_bytes)
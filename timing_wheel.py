@@ -0,0 +1,148 @@
+class Timer:
+    """
+    A callback scheduled on the timing wheel
+
+    Attributes (self.):
+        :expires: tick at which the callback is called
+        :callback, args: called as callback(*args), None once cancelled
+    """
+    __slots__ = ('expires', 'callback', 'args')
+
+    def __init__(self, expires, callback, args):
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        """the callback will not be called (the timer stays in its slot until its tick, then is dropped)"""
+        self.callback = None
+        self.args = None
+
+    @property
+    def active(self):
+        return self.callback is not None
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel: callbacks scheduled a number of ticks (simulation steps) ahead,
+    e.g. the end of an item's lifetime, of a corpse's animation or of a reload.
+
+    Level 0 has one slot per tick for the next `slots` ticks, level 1 one slot per `slots` ticks for
+    the next slots ** 2 ticks, and so on. A timer is put in the lowest level whose range covers its
+    delay. Each tick only looks at one slot of level 0; when level 0 wraps around, the timers of the
+    next slot of level 1 are moved down (cascaded) to level 0, and so on up the levels.
+    So a tick costs O(timers expiring + timers cascaded), not O(timers scheduled): entities that
+    are alive but not expiring are never touched.
+
+    Attributes (self.):
+        :now: current tick
+        :slots: number of slots per level (a power of 2)
+        :wheels: list of levels, each a list of slots, each a list of timers
+        :scheduled, expired, cancelled_dropped: counters of timers
+        :last_expired: number of callbacks called in the last tick
+    """
+
+    def __init__(self, levels=4, slot_bits=6):
+        self.slot_bits = slot_bits
+        self.slots = 1 << slot_bits
+        self.mask = self.slots - 1
+        self.max_delay = (1 << (slot_bits * levels)) - 1
+        self.wheels = [[[] for i in range(self.slots)] for level in range(levels)]
+        self.now = 0
+        self.scheduled = 0
+        self.expired = 0
+        self.cancelled_dropped = 0
+        self.last_expired = 0
+
+    def clear(self):
+        """drop every timer and restart at tick 0 (new game session)"""
+        for wheel in self.wheels:
+            for slot in wheel:
+                slot.clear()
+        self.now = 0
+        self.last_expired = 0
+
+    def schedule(self, delay, callback, *args):
+        """
+        Call callback(*args) in delay ticks (at least 1: at the next advance())
+        :return: Timer, can be cancelled
+        """
+        delay = min(max(int(delay), 1), self.max_delay)
+        timer = Timer(self.now + delay, callback, args)
+        self.insert(timer)
+        self.scheduled += 1
+        return timer
+
+    def insert(self, timer):
+        """put timer in the slot of the lowest level covering its delay"""
+        delay = timer.expires - self.now
+        level = 0
+        while delay >> (self.slot_bits * (level + 1)) and level < len(self.wheels) - 1:
+            level += 1
+        self.wheels[level][(timer.expires >> (self.slot_bits * level)) & self.mask].append(timer)
+
+    def advance(self):
+        """move to the next tick and call the callbacks of the timers expiring at it"""
+        self.now += 1
+        now = self.now
+
+        # level 0 wrapped around: move the timers of the next slot of each upper level down
+        level = 0
+        while level + 1 < len(self.wheels) and (now >> (self.slot_bits * level)) & self.mask == 0:
+            level += 1
+            slot = self.wheels[level][(now >> (self.slot_bits * level)) & self.mask]
+            timers, slot[:] = slot[:], []
+            for timer in timers:
+                if timer.callback is None:
+                    self.cancelled_dropped += 1
+                else:
+                    self.insert(timer)
+
+        slot = self.wheels[0][now & self.mask]
+        expired = 0
+        while slot:
+            timers, slot[:] = slot[:], []  # callbacks may schedule timers in this slot, they run in this tick too
+            for timer in timers:
+                callback = timer.callback
+                if callback is None:
+                    self.cancelled_dropped += 1
+                    continue
+                timer.callback = None
+                callback(*timer.args)
+                expired += 1
+        self.expired += expired
+        self.last_expired = expired
+
+    def stats(self):
+        return {
+            'now': self.now,
+            'scheduled': self.scheduled,
+            'expired': self.expired,
+            'cancelled': self.cancelled_dropped,
+            'last_expired': self.last_expired,
+        }
+
+
+# timers of the game session, in simulation steps (reset by GameWorld)
+timers = TimingWheel()
+
+
+if __name__ == '__main__':
+    # cost of a tick with many long-lived timers and a few expiring ones
+    import time
+    import random
+
+    wheel = TimingWheel()
+    fired = []
+    for alive in (1000, 10000, 100000):
+        wheel.clear()
+        for i in range(alive):
+            wheel.schedule(random.randint(1000, 5000), fired.append, i)
+        for i in range(100):
+            wheel.schedule(random.randint(1, 600), fired.append, i)
+        ticks = 600
+        start = time.perf_counter()
+        for i in range(ticks):
+            wheel.advance()
+        print('%6d timers alive: %.4f ms per tick' % (alive, (time.perf_counter() - start) * 1000 / ticks))
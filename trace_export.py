@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from setting import Settings
+from phase_timer import phase_timer
+
+
+class TraceExporter:
+    """
+    Record a segment of a session as a trace file in the trace event format (JSON),
+    which opens in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+    Recorded spans: every iteration of the game loop ('frame') and its phases (from phase_timer),
+    asset loads, saves and menu loops (traced() functions), and any begin()/end() pair.
+    Recording only appends a tuple to an in-memory buffer (a deque, safe to append to while the
+    other end is consumed); a background thread formats the events and writes them to the file
+    every flush_interval seconds, so writing the trace does not distort the frame times it measures.
+
+    Attributes (self.):
+        :enabled: a trace is being recorded
+        :events: buffer of (phase type, name, category, time (s), duration (s)) not written yet
+        :path: file of the trace being recorded
+        :flush_interval: seconds between two writes of the buffer
+    """
+
+    def __init__(self, flush_interval):
+        self.enabled = False
+        self.events = deque()
+        self.path = None
+        self.file = None
+        self.flush_interval = flush_interval
+        self.flusher = None
+        self.stopping = threading.Event()
+        self.file_lock = threading.Lock()
+        self.first_event = True
+        self.pid = os.getpid()
+
+    def start(self, path):
+        """start recording to the trace file path"""
+        if self.enabled:
+            self.stop()
+
+        self.path = path
+        self.file = open(path, 'w')
+        self.file.write('[\n')
+        self.first_event = True
+        self.events.clear()
+        self.write_event({'ph': 'M', 'name': 'process_name', 'pid': self.pid, 'tid': 1, 'args': {'name': 'zombie game'}})
+        self.write_event({'ph': 'M', 'name': 'thread_name', 'pid': self.pid, 'tid': 1, 'args': {'name': 'game loop'}})
+
+        self.enabled = True
+        phase_timer.add_listener(self.record_phase)
+
+        self.stopping.clear()
+        self.flusher = threading.Thread(target=self.run_flusher, name='trace flusher', daemon=True)
+        self.flusher.start()
+
+    def stop(self):
+        """stop recording, write the remaining events and close the file"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        phase_timer.remove_listener(self.record_phase)
+
+        self.stopping.set()
+        self.flusher.join()
+        self.flush()
+        self.file.write('\n]\n')
+        self.file.close()
+        self.file = None
+
+    def toggle(self, path):
+        if self.enabled:
+            self.stop()
+        else:
+            self.start(path)
+
+    def record_phase(self, phase, start, end):
+        """phase_timer listener"""
+        self.events.append(('X', phase, 'phase', start, end - start))
+
+    def begin(self, name, category='game'):
+        """open a span, closed by end() with the same name"""
+        if self.enabled:
+            self.events.append(('B', name, category, time.perf_counter(), 0))
+
+    def end(self, name, category='game'):
+        if self.enabled:
+            self.events.append(('E', name, category, time.perf_counter(), 0))
+
+    def complete(self, name, start, category='game'):
+        """
+        Record a span from start (time.perf_counter()) to now in one event: the span stays whole
+        even if the recording started or stopped since start (e.g. F4 pressed during a frame)
+        """
+        if self.enabled:
+            self.events.append(('X', name, category, start, time.perf_counter() - start))
+
+    @contextmanager
+    def span(self, name, category='game'):
+        """span covering the body of a with statement"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.events.append(('X', name, category, start, time.perf_counter() - start))
+
+    def run_flusher(self):
+        while not self.stopping.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """write the buffered events to the file"""
+        events = self.events
+        with self.file_lock:
+            while events:
+                phase_type, name, category, start, duration = events.popleft()
+                event = {'ph': phase_type, 'name': name, 'cat': category, 'pid': self.pid, 'tid': 1,
+                         'ts': round(start * 1000000, 1)}
+                if phase_type == 'X':
+                    event['dur'] = round(duration * 1000000, 1)
+                self.write_event(event)
+            self.file.flush()
+
+    def write_event(self, event):
+        if not self.first_event:
+            self.file.write(',\n')
+        self.first_event = False
+        self.file.write(json.dumps(event))
+
+
+def traced(name, category):
+    """decorator: calls of the function are recorded as spans while a trace is recorded"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with tracer.span(name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_file_name():
+    """:return: name of a new trace file, from the current date and time"""
+    return time.strftime('trace_%Y%m%d_%H%M%S.json')
+
+
+# the trace exporter of the game
+_settings = Settings()
+tracer = TraceExporter(_settings.trace_flush_interval)
@@ -0,0 +1,438 @@
+import sys
+import pygame
+from text_cache import texts
+from menu import MenuLoop
+from dirty_rects import DirtyRectRenderer
+
+
+class Widget:
+    """
+    Base class of the widgets of a Form: a rectangle of the screen, drawn by draw(), with child widgets
+    drawn on top of it.
+
+    Widgets are retained: they keep their state and are only drawn again when they changed (invalidate()),
+    the form then restores the background and redraws the widgets under the changed area only.
+
+    Attributes (self.):
+        :rect: area of the screen covered by the widget
+        :children: widgets drawn on top of this one, in order
+        :parent: widget containing this one, None for the root of the form
+        :visible: the widget (and its children) is drawn
+        :focused: the widget has the keyboard focus
+        :dirty: the widget changed and must be redrawn
+        :drawn_rect: where the widget was drawn last (erased when it is redrawn), None if not drawn
+    """
+    focusable = False  # the widget can take the keyboard focus
+
+    def __init__(self, rect=(0, 0, 0, 0)):
+        self.rect = pygame.Rect(rect)
+        self.children = []
+        self.parent = None
+        self.visible = True
+        self.focused = False
+        self.dirty = True
+        self.drawn_rect = None
+
+    def add(self, *widgets):
+        for widget in widgets:
+            widget.parent = self
+            self.children.append(widget)
+            widget.invalidate()
+
+    def walk(self):
+        """generator of the widget and its descendants, in drawing order"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def invalidate(self):
+        self.dirty = True
+
+    def show(self):
+        if not self.visible:
+            self.visible = True
+            self.invalidate()
+
+    def hide(self):
+        if self.visible:
+            self.visible = False
+            self.invalidate()
+
+    def is_shown(self):
+        """:return: True if the widget and all its parents are visible"""
+        widget = self
+        while widget is not None:
+            if not widget.visible:
+                return False
+            widget = widget.parent
+        return True
+
+    def set_focus(self, focused):
+        if focused != self.focused:
+            self.focused = focused
+            self.invalidate()
+
+    def draw(self, surface):
+        """draw the widget on surface, in self.rect (the background is already restored)"""
+        pass
+
+    def handle_key(self, event):
+        """KEYDOWN event while the widget has the focus, :return: True if it was used"""
+        return False
+
+    def handle_click(self, position):
+        """left click in the widget (it got the focus if focusable)"""
+        pass
+
+
+class Label(Widget):
+    """
+    Text, several lines separated by <br>, on an optional background colour
+
+    Attributes (self.):
+        :text, font, size, colour, background: as given to set_text(), background is None for no background
+        :image: rendered text
+    """
+
+    def __init__(self, text, position, font, size, colour, background=None):
+        super().__init__((position, (0, 0)))
+        self.font = font
+        self.size = size
+        self.colour = colour
+        self.background = background
+        self.set_text(text)
+
+    def set_text(self, text, colour=None):
+        self.text = text
+        if colour is not None:
+            self.colour = colour
+
+        lines = [texts.render(line, self.font, self.size, self.colour, True) for line in text.split("<br>")]
+        width = max(line.get_width() for line in lines)
+        self.image = pygame.Surface((width, (self.size + 1) * len(lines) + 5), pygame.SRCALPHA)
+        if self.background is not None:
+            self.image.fill(self.background)
+        for i, line in enumerate(lines):
+            self.image.blit(line, (0, i * (self.size + 1)))
+        self.rect.size = self.image.get_size()
+        self.invalidate()
+
+    def draw(self, surface):
+        surface.blit(self.image, self.rect)
+
+
+class TextBox(Widget):
+    """
+    One line text entry: printable keys add a character, backspace removes the last one
+    (held keys repeat, see Form), Enter calls on_submit(text). The prompt is shown while it is empty.
+
+    Attributes (self.):
+        :text: text typed
+        :prompt: grey text shown while text is empty
+        :max_length: maximum number of characters, 0 for no limit
+        :case: 0 keeps the characters typed, 1 forces lowercase, 2 uppercase
+        :on_submit: called with the text when Enter is pressed, or None
+    """
+    focusable = True
+    text_colour = (0, 0, 0)
+    prompt_colour = (180, 180, 180)
+
+    def __init__(self, position, width, prompt, max_length=0, font_size=24, case=0, on_submit=None):
+        super().__init__((position, (width, int(font_size * 1.7))))
+        self.text = ""
+        self.prompt = prompt
+        self.max_length = max_length
+        self.case = case
+        self.on_submit = on_submit
+        self.font = pygame.font.match_font("Arial")  # None (pygame's default font) if Arial is not installed
+        self.font_size = font_size
+
+    def set_text(self, text):
+        self.text = text
+        self.invalidate()
+
+    def handle_key(self, event):
+        if event.key == pygame.K_RETURN:
+            if self.on_submit is not None:
+                self.on_submit(self.text)
+            return True
+
+        if event.key == pygame.K_BACKSPACE:
+            if self.text:
+                self.set_text(self.text[:-1])
+            return True
+
+        character = event.unicode
+        if character and character.isprintable() and (self.max_length == 0 or len(self.text) < self.max_length):
+            if self.case == 1:
+                character = character.lower()
+            elif self.case == 2:
+                character = character.upper()
+            self.set_text(self.text + character)
+            return True
+        return False
+
+    def draw(self, surface):
+        # white box with a black border, the text (or the prompt), and the caret if focused
+        surface.fill((255, 255, 255), self.rect)
+        pygame.draw.rect(surface, (0, 0, 0), (self.rect.x, self.rect.y, self.rect.width - 1, self.rect.height - 1), 2)
+        if self.text:
+            text_surface = texts.render(self.text, self.font, self.font_size, self.text_colour, True)
+        else:
+            text_surface = texts.render(self.prompt, self.font, self.font_size, self.prompt_colour, True)
+        surface.blit(text_surface, (self.rect.x + 10, self.rect.y + 5))
+
+        if self.focused:
+            caret_x = self.rect.x + 12 + (text_surface.get_width() if self.text else 0)
+            pygame.draw.line(surface, self.text_colour, (caret_x, self.rect.y + 6), (caret_x, self.rect.bottom - 7), 2)
+
+
+class ListView(Widget):
+    """
+    List of items laid out in columns of rows items. Up / down (left / right for the columns) or a click
+    selects an item, Enter or a click calls on_choose(item). The selected item is highlighted while
+    the list has the focus.
+
+    Attributes (self.):
+        :items: list of strings
+        :selected: index of the selected item, None if the list is empty
+        :on_choose: called with the chosen item, or None
+    """
+    focusable = True
+
+    def __init__(self, items, position, font, size, colour, selected_colour, row_height=60, rows=5, column_width=250, on_choose=None):
+        self.items = list(items)
+        self.font = font
+        self.size = size
+        self.colour = colour
+        self.selected_colour = selected_colour
+        self.row_height = row_height
+        self.rows = rows
+        self.column_width = column_width
+        self.on_choose = on_choose
+        self.selected = 0 if self.items else None
+        columns = max(1, (len(self.items) + rows - 1) // rows)
+        super().__init__((position, (columns * column_width, rows * row_height)))
+
+    def item_position(self, index):
+        return (self.rect.x + index // self.rows * self.column_width,
+                self.rect.y + index % self.rows * self.row_height)
+
+    def select(self, index):
+        if self.items and index != self.selected:
+            self.selected = index % len(self.items)
+            self.invalidate()
+
+    def handle_key(self, event):
+        if self.selected is None:
+            return False
+        moves = {pygame.K_UP: -1, pygame.K_DOWN: 1, pygame.K_LEFT: -self.rows, pygame.K_RIGHT: self.rows}
+        if event.key in moves:
+            self.select(self.selected + moves[event.key])
+            return True
+        if event.key == pygame.K_RETURN:
+            if self.on_choose is not None:
+                self.on_choose(self.items[self.selected])
+            return True
+        return False
+
+    def handle_click(self, position):
+        column = (position[0] - self.rect.x) // self.column_width
+        row = (position[1] - self.rect.y) // self.row_height
+        index = column * self.rows + row
+        if 0 <= row < self.rows and 0 <= index < len(self.items):
+            self.select(index)
+            if self.on_choose is not None:
+                self.on_choose(self.items[index])
+
+    def draw(self, surface):
+        for i, item in enumerate(self.items):
+            colour = self.selected_colour if self.focused and i == self.selected else self.colour
+            surface.blit(texts.render(item, self.font, self.size, colour, True), self.item_position(i))
+
+
+class Button(Widget):
+    """
+    Text in a box, Enter, space or a click calls on_click()
+
+    Attributes (self.):
+        :text, font, size: text of the button
+        :on_click: called when the button is pressed
+    """
+    focusable = True
+    padding = 10
+
+    def __init__(self, text, position, font, size, on_click):
+        self.text = text
+        self.font = font
+        self.size = size
+        self.on_click = on_click
+        text_surface = texts.render(text, font, size, (0, 0, 0), True)
+        super().__init__((position, (text_surface.get_width() + 2 * self.padding, text_surface.get_height() + self.padding)))
+
+    def handle_key(self, event):
+        if event.key in (pygame.K_RETURN, pygame.K_SPACE):
+            self.on_click()
+            return True
+        return False
+
+    def handle_click(self, position):
+        self.on_click()
+
+    def draw(self, surface):
+        # inverted colours when focused
+        box_colour, text_colour = ((0, 0, 0), (255, 255, 255)) if self.focused else ((255, 255, 255), (0, 0, 0))
+        surface.fill(box_colour, self.rect)
+        pygame.draw.rect(surface, (0, 0, 0), (self.rect.x, self.rect.y, self.rect.width - 1, self.rect.height - 1), 2)
+        surface.blit(texts.render(self.text, self.font, self.size, text_colour, True),
+                     (self.rect.x + self.padding, self.rect.y + self.padding // 2))
+
+
+class Form:
+    """
+    Screen made of a tree of widgets, drawn on the existing display surface (the display mode is not set again).
+
+    run() waits for events (MenuLoop: the form sleeps while nothing happens), gives the key presses to
+    the focused widget (Tab moves the focus to the next focusable widget, a click focuses the widget
+    clicked), and redraws the dirty regions: only the background under the widgets that changed, and
+    the widgets overlapping it, are drawn again and sent to the display. Typing in a text box only
+    redraws the text box. Held keys repeat (pygame.key.set_repeat) while the form runs.
+    Widgets call close(result) to end run(), esc closes the form with None.
+
+    Attributes (self.):
+        :screen: surface of the window
+        :loop: MenuLoop of the form: background and event waiting
+        :root: widget containing every widget of the form
+        :focus: widget with the keyboard focus, or None
+        :running: run() is waiting for events
+        :result: value returned by run()
+        :repeat_delay, repeat_interval: key repeat while the form runs (ms)
+        :max_merge_waste: overlapping dirty areas are merged if their union is not larger than this many times their areas
+        :redrawn_pixels: pixels redrawn by dirty regions (full redraws excluded)
+    """
+
+    def __init__(self, screen, game_settings, background_path=None):
+        if background_path is None:
+            background_path = game_settings.background_path
+        self.screen = screen
+        self.loop = MenuLoop(screen, background_path, game_settings.menu_event_timeout_ms)
+        self.root = Widget(screen.get_rect())
+        self.focus = None
+        self.running = False
+        self.result = None
+        self.repeat_delay = game_settings.ui_key_repeat_delay
+        self.repeat_interval = game_settings.ui_key_repeat_interval
+        self.max_merge_waste = game_settings.dirty_rect_max_merge_waste
+        self.redrawn_pixels = 0
+
+    def add(self, *widgets):
+        self.root.add(*widgets)
+
+    def set_focus(self, widget):
+        if self.focus is not None:
+            self.focus.set_focus(False)
+        self.focus = widget
+        if widget is not None:
+            widget.set_focus(True)
+
+    def focus_next(self):
+        """move the focus to the next visible focusable widget (Tab)"""
+        candidates = [widget for widget in self.root.walk() if widget.focusable and widget.is_shown()]
+        if not candidates:
+            return
+        index = candidates.index(self.focus) + 1 if self.focus in candidates else 0
+        self.set_focus(candidates[index % len(candidates)])
+
+    def close(self, result=None):
+        self.result = result
+        self.running = False
+
+    def widget_at(self, position):
+        """:return: the topmost visible focusable widget at position, or None"""
+        found = None
+        for widget in self.root.walk():
+            if widget.focusable and widget.is_shown() and widget.rect.collidepoint(position):
+                found = widget
+        return found
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            sys.exit()
+
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.close(None)
+            elif event.key == pygame.K_TAB:
+                self.focus_next()
+            elif self.focus is not None:
+                self.focus.handle_key(event)
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            widget = self.widget_at(event.pos)
+            if widget is not None:
+                self.set_focus(widget)
+                widget.handle_click(event.pos)
+
+    def render(self):
+        """draw the widgets that changed (every widget after the background was redrawn)"""
+        if self.loop.redraw():
+            # background blitted: draw everything
+            for widget in self.root.walk():
+                if widget.is_shown():
+                    widget.draw(self.screen)
+            for widget in self.root.walk():
+                widget.dirty = False
+                widget.drawn_rect = widget.rect.copy() if widget.is_shown() else None
+            self.loop.present()
+            return
+
+        # areas to redraw: where the changed widgets were and are
+        areas = []
+        for widget in self.root.walk():
+            if widget.dirty:
+                if widget.drawn_rect is not None:
+                    areas.append(widget.drawn_rect)
+                if widget.is_shown():
+                    areas.append(widget.rect)
+        areas = DirtyRectRenderer.merge([area.clip(self.screen.get_rect()) for area in areas if area], self.max_merge_waste)
+        if not areas:
+            return
+
+        # restore the background and draw the widgets overlapping each area, clipped to it
+        shown = [widget for widget in self.root.walk() if widget.is_shown()]
+        for area in areas:
+            self.screen.set_clip(area)
+            self.screen.blit(self.loop.background, area, area)
+            for widget in shown:
+                if widget.rect.colliderect(area):
+                    widget.draw(self.screen)
+            self.redrawn_pixels += area.width * area.height
+        self.screen.set_clip(None)
+
+        for widget in self.root.walk():
+            if widget.dirty:
+                widget.dirty = False
+                widget.drawn_rect = widget.rect.copy() if widget.is_shown() else None
+        pygame.display.update(areas)
+
+    def run(self):
+        """
+        Show the form until a widget closes it (or esc)
+        :return: result given to close(), None if esc was pressed
+        """
+        previous_repeat = pygame.key.get_repeat()
+        pygame.key.set_repeat(self.repeat_delay, self.repeat_interval)
+        if self.focus is None:
+            self.focus_next()
+        self.loop.invalidate()
+        self.running = True
+        try:
+            while self.running:
+                self.render()
+                for event in self.loop.events():
+                    self.handle_event(event)
+                    if not self.running:
+                        break
+        finally:
+            pygame.key.set_repeat(*previous_repeat)
+        return self.result
@@ -1,8 +1,17 @@
 import pygame
 from pygame.sprite import Sprite
-import random
+from game_random import game_random
 import math
+import itertools
 from setting import Settings
+from asset_manager import assets
+from rotation_cache import rotations
+from animation import AnimationClip, AnimationCursor
+from object_pool import ObjectPool
+from fixed_timestep import interpolation_offset
+from game_clock import game_clock
+from job_scheduler import scheduler, PRIORITY_CORPSE
+from timing_wheel import timers
 
 
 class Zombie(Sprite):
@@ -10,59 +19,74 @@ class Zombie(Sprite):
     Zombie class
 
     """
-    # load zombie death resources as class variable to improve performance
+    # zombie death resources are class variables to improve performance, they are shared by all zombies
     # images are stored separately for rotation purpose (sprite sheet does not help)
-    pygame.mixer.pre_init(44100, -16, 1, 2048)
-    pygame.init()
-    death_images = []
     game_settings = Settings()
     zombie_death_sheet = game_settings.zombie_death_sheet_3
 
-    # load last frame of corpse (this frame is displayed longer)
-    for i in range(game_settings.zombie_corpse_display_frame):
-        death_images.append(pygame.image.load(zombie_death_sheet[0]))
-    # load previous death frame
-    for i in range(len(zombie_death_sheet)):
-        for j in range(game_settings.zombie_death_frame_multiplier):
-            death_images.append(pygame.image.load(zombie_death_sheet[i]))
+    # filled by load_resources() when the first zombie spawns
+    death_clip = None
+    attack_clip = None
+    zombie_attack_sound = None
+    zombie_hit_sound = None
+    zombie_death_sound = None
 
-    # load sound effect
-    zombie_attack_sound = []
-    for i in range(len(game_settings.zombie_attack_sound_path)):
-        zombie_attack_sound.append(pygame.mixer.Sound(game_settings.zombie_attack_sound_path[i]))
+    # spawn ids: a zombie reused by the pool is another zombie for the bullets that hit it before
+    spawn_ids = itertools.count(1)
 
-    zombie_hit_sound = pygame.mixer.Sound(game_settings.zombie_hit_sound_path)
-    zombie_death_sound = pygame.mixer.Sound(game_settings.zombie_death_sound_path)
-
-    def __init__(self, game_settings, screen, player):
+    def __init__(self, game_settings, screen, player, spawn_position=None):
         super().__init__()
+        self.load_resources()
+
+        # created once, kept when the zombie is reused by the pool
+        self.attack_animation = AnimationCursor()  # plays attack_clip: angle offsets of the attack sweep
+
+        self.reset(game_settings, screen, player, spawn_position=spawn_position)
+
+    def reset(self, game_settings, screen, player, spawn_position=None):
+        """
+        (Re)initialize the zombie: new spawn position, full health
+        Called by the constructor, and by Zombie.pool when a released zombie is reused
+        :param spawn_position: starting position (x, y), e.g. from the spawn director's edge table (None: random)
+        """
         self.screen = screen
         self.game_settings = game_settings
         self.player = player
+        self.spawn_id = next(Zombie.spawn_ids)  # recorded by the bullets that hit this zombie
 
-        # starting position of zombie, determined by calling random_spawn_generator()
-        self.start_x = None
-        self.start_y = None
-        self.random_spawn_generator()
+        # starting position of zombie, determined by calling random_spawn_generator() if not given
+        if spawn_position is None:
+            self.start_x = None
+            self.start_y = None
+            self.random_spawn_generator()
+        else:
+            self.start_x, self.start_y = spawn_position
 
         # load zombie image and initial rect
-        self.image = pygame.image.load(game_settings.zombie_image_path)
+        self.image = assets.image(game_settings.zombie_image_path)
         self.rect = self.image.get_rect()
         self.rect.centerx = self.start_x
         self.rect.centery = self.start_y
+        self.previous_center = self.rect.center  # center before the last move, for render interpolation
 
         # load zombie attack resources
-        self.attack_image = pygame.image.load(self.game_settings.zombie_attack_image_path)
-        self.attack_angle = 0
+        self.attack_image = assets.image(self.game_settings.zombie_attack_image_path)
+        self.attack_animation.stop()
 
         # create sound channels
-        self.attack_channel = pygame.mixer.Channel(game_settings.zombie_attack_channel)
-        self.hit_channel = pygame.mixer.Channel(game_settings.zombie_hit_channel)
+        self.attack_channel = assets.channel(game_settings.zombie_attack_channel)
+        self.hit_channel = assets.channel(game_settings.zombie_hit_channel)
 
         # create another pair of image and rect for rotated version, and update them
-        self.rotated_image = pygame.image.load(game_settings.zombie_image_path)
+        self.rotated_image = self.image
         self.updated_rect = self.rotated_image.get_rect()
         self.angle = None
+        self.rotated_angle = None  # angle of rotated_image
+
+        # heading (cos, sin of angle), kept between two refreshes of the level of detail
+        # far zombies refresh it on the steps of their bucket
+        self.heading = (1.0, 0.0)
+        self.lod_bucket = int(self.start_x + self.start_y) % game_settings.zombie_lod_far_interval
 
         # record the time of last attacking
         self.last_attacking_time = 0
@@ -71,15 +95,46 @@ class Zombie(Sprite):
         self.hp = self.game_settings.zombie_max_health
         self.hit_slow_down_factor = 1  # ratio multiplied to speed, will be modified when hit by a certain kinds of bullet, will restore over time
 
+        # push away from the neighbouring zombies (x, y), added to each move, set by CrowdSeparation
+        self.separation = (0.0, 0.0)
+
         # initialize update
         self.update()
 
+    @classmethod
+    def load_resources(cls):
+        """
+        Load the animations and sound effects shared by all zombies.
+        Every file is decoded once by the asset manager, the clips only hold references.
+        :return: None
+        """
+        if cls.death_clip is not None:
+            return
+
+        # death sheet is listed from last to first frame
+        # the last frame (corpse) is displayed longer
+        death_frames = [assets.image(path) for path in cls.zombie_death_sheet[::-1]]
+        death_holds = [cls.game_settings.zombie_death_frame_multiplier] * len(death_frames)
+        death_holds[-1] += cls.game_settings.zombie_corpse_display_frame
+        cls.death_clip = AnimationClip(death_frames, death_holds)
+
+        # attack sweep: rotation offset of the attack image, decreasing by 1 degree each frame
+        cls.attack_clip = AnimationClip(range(cls.game_settings.zombie_attack_sweep_angle, 0, -1))
+
+        # load sound effect
+        cls.zombie_attack_sound = []
+        for i in range(len(cls.game_settings.zombie_attack_sound_path)):
+            cls.zombie_attack_sound.append(assets.sound(cls.game_settings.zombie_attack_sound_path[i]))
+
+        cls.zombie_hit_sound = assets.sound(cls.game_settings.zombie_hit_sound_path)
+        cls.zombie_death_sound = assets.sound(cls.game_settings.zombie_death_sound_path)
+
     def random_spawn_generator(self):
         """
         Generates a random coordinate used as starting position of zombie
         :return: None (starting position is written into class attribute)
         """
-        region_code = random.randint(1, 4)  # corresponds to four edges
+        region_code = game_random.randint(1, 4)  # corresponds to four edges
 
         # create alias
         d = self.game_settings.spawn_distance
@@ -88,57 +143,76 @@ class Zombie(Sprite):
 
         # generate random coordinate
         if region_code == 1:  # spawn at left edge
-            self.start_x = random.randint(-2 * d, -d)
-            self.start_y = random.randint(0, s_h)
+            self.start_x = game_random.randint(-2 * d, -d)
+            self.start_y = game_random.randint(0, s_h)
         elif region_code == 2:
-            self.start_x = random.randint(0, s_w)
-            self.start_y = random.randint(-2 * d, -d)
+            self.start_x = game_random.randint(0, s_w)
+            self.start_y = game_random.randint(-2 * d, -d)
         elif region_code == 3:
-            self.start_x = random.randint(s_w + d, s_w + 2 * d)
-            self.start_y = random.randint(0, s_h)
+            self.start_x = game_random.randint(s_w + d, s_w + 2 * d)
+            self.start_y = game_random.randint(0, s_h)
         else:
-            self.start_x = random.randint(0, s_w)
-            self.start_y = random.randint(s_h + d, s_h + 2 * d)
+            self.start_x = game_random.randint(0, s_w)
+            self.start_y = game_random.randint(s_h + d, s_h + 2 * d)
 
-    def update(self):
+    def update(self, flow_field=None, lod=None):
         """
         This method will do following:
             1. update zombie coordinate and orientation
+        :param flow_field: FlowField giving the heading around obstacles (None: straight to the player)
+        :param lod: ZombieLOD deciding if the heading is refreshed this step (None: every step)
         :return:
         """
 
         # update zombie's position
-        self.update_zombie_pos()
+        self.update_zombie_pos(flow_field, lod)
 
         # update slow down factor
         if self.hit_slow_down_factor < 1:
             self.hit_slow_down_factor += self.game_settings.zombie_hit_slow_down_restore_factor
 
-    def update_zombie_pos(self):
-        # calculate rotate angle and get rect
-        # get player's position, used as "mouse position" as in player's class
-        player_position = self.player.rect.centerx, self.player.rect.centery
+    def update_zombie_pos(self, flow_field=None, lod=None):
+        # level of detail: far zombies only refresh their heading on some steps, hidden zombies are not rotated
+        refresh, visible = True, True
+        if lod is not None:
+            refresh, visible = lod.level(self)
 
-        # calculate angle using the initial rect
-        self.angle = math.degrees(
-            math.atan2(self.rect.centery - player_position[1], self.rect.centerx - player_position[0]))
+        # calculate rotate angle and get rect
+        if refresh or self.angle is None:
+            # the flow field gives the heading if an obstacle is between the zombie and the player
+            angle = None
+            if flow_field is not None:
+                angle = flow_field.angle(self.rect.centerx, self.rect.centery)
+
+            if angle is None:
+                # get player's position, used as "mouse position" as in player's class
+                player_position = self.player.rect.centerx, self.player.rect.centery
+
+                # calculate angle using the initial rect
+                angle = math.degrees(
+                    math.atan2(self.rect.centery - player_position[1], self.rect.centerx - player_position[0]))
+            self.angle = angle
+            self.heading = (math.cos(math.radians(angle)), math.sin(math.radians(angle)))
 
         # rotate zombie's image surface
         # use attack_image if zombie just attacked
-        if self.attack_angle != 0:
-            self.rotated_image = pygame.transform.rotate(self.attack_image, 180 - self.angle + self.attack_angle)
-            self.attack_angle -= 1
-        else:
-            self.rotated_image = pygame.transform.rotate(self.image, 180 - self.angle)
+        if self.attack_animation.playing:
+            self.rotated_image = rotations.rotate(self.attack_image, 180 - self.angle + self.attack_animation.frame())
+            self.rotated_angle = None
+            self.attack_animation.advance()
+            self.updated_rect = self.rotated_image.get_rect()  # get_rect() should be recalled to get the new rect as image rotates
+        elif visible and self.rotated_angle != self.angle:
+            self.rotated_image = rotations.rotate(self.image, 180 - self.angle)
+            self.rotated_angle = self.angle
+            self.updated_rect = self.rotated_image.get_rect()
 
         # find out where to blit the rotated image
-        self.updated_rect = self.rotated_image.get_rect()  # get_rect() should be recalled to get the new rect as image rotates
-        self.updated_rect.centerx = self.rect.centerx
-        self.updated_rect.centery = self.rect.centery
+        self.updated_rect.center = self.rect.center
 
         # update position (moving zombie)
-        self.rect.centerx -= math.cos(math.radians(self.angle)) * self.game_settings.zombie_speed * self.hit_slow_down_factor
-        self.rect.centery -= math.sin(math.radians(self.angle)) * self.game_settings.zombie_speed * self.hit_slow_down_factor
+        self.previous_center = self.rect.center
+        self.rect.centerx -= self.heading[0] * self.game_settings.zombie_speed * self.hit_slow_down_factor - self.separation[0]
+        self.rect.centery -= self.heading[1] * self.game_settings.zombie_speed * self.hit_slow_down_factor - self.separation[1]
 
     def attack_player(self, player):
         """
@@ -151,28 +225,45 @@ class Zombie(Sprite):
         :return:
         """
 
-        # set attack angle, so zombie will show a sweep animation
-        self.attack_angle = 45
+        # play attack sweep animation
+        self.attack_animation.play(self.attack_clip)
 
         # subtract player's health
-        damage = random.randint(1, self.game_settings.zombie_damage)
+        damage = game_random.randint(1, self.game_settings.zombie_damage)
         player.hp -= damage
 
         # update last attack time
-        self.last_attacking_time = pygame.time.get_ticks()
+        self.last_attacking_time = game_clock.get_ticks()
 
         # play random attack sound
-        self.attack_channel.play(self.zombie_attack_sound[random.randint(0, len(self.game_settings.zombie_attack_sound_path) - 1)])
+        self.attack_channel.play(self.zombie_attack_sound[game_random.randint(0, len(self.game_settings.zombie_attack_sound_path) - 1)])
 
-    def blit_zombie(self):
+    def blit_zombie(self, alpha=None):
         """
         Blit the zombie to the screen, and its health bar
+
+        Parameter:
+            alpha: if given, draw the zombie at this fraction of its last move (render interpolation)
+        :return: Rect of the screen drawn, None if the zombie is not on screen
         """
-        self.screen.blit(self.rotated_image, self.updated_rect)
+        image_rect = self.updated_rect
+        bar_x, bar_y = self.rect[0], self.rect[1]
+        if alpha is not None:
+            dx, dy = interpolation_offset(self.previous_center, self.rect.center, alpha)
+            image_rect = self.updated_rect.copy()
+            image_rect.center = (self.rect.centerx + dx, self.rect.centery + dy)
+            bar_x += dx
+            bar_y += dy
+
+        # nothing to draw for zombies outside of the screen (just spawned)
+        if not self.screen.get_clip().colliderect(image_rect):
+            return None
+        drawn = self.screen.blit(self.rotated_image, image_rect)
 
         # draw health bar above zombie: health bar box and health bar
-        pygame.draw.rect(self.screen, (0, 0, 0), (self.rect[0] + 35, self.rect[1] - 5, self.game_settings.zombie_max_health_bar_length, 10), 1)
-        pygame.draw.rect(self.screen, self.game_settings.DARK_GREEN, (self.rect[0] + 36, self.rect[1] - 4, int(self.hp / self.game_settings.zombie_max_health * self.game_settings.zombie_max_health_bar_length) - 1, 8))
+        drawn.union_ip(pygame.draw.rect(self.screen, (0, 0, 0), (bar_x + 35, bar_y - 5, self.game_settings.zombie_max_health_bar_length, 10), 1))
+        pygame.draw.rect(self.screen, self.game_settings.DARK_GREEN, (bar_x + 36, bar_y - 4, int(self.hp / self.game_settings.zombie_max_health * self.game_settings.zombie_max_health_bar_length) - 1, 8))
+        return drawn
 
 
 class DeadZombie(Sprite):
@@ -183,28 +274,58 @@ class DeadZombie(Sprite):
     def __init__(self, zombie):
         # initialiation of base class (Sprite)
         super().__init__()
+        self.death_animation = AnimationCursor()
+        self.reset(zombie)
 
+    def reset(self, zombie):
+        """
+        (Re)initialize the corpse at the place of zombie
+        Called by the constructor, and by DeadZombie.pool when a released corpse is reused
+        """
         # get the rotated angle and position of current zombie
         # get the display screen from current zombie
         self.angle = zombie.angle
-        self.rect = zombie.rect
+        self.rect = zombie.rect.copy()  # copy, the zombie may be reused by the pool
         self.screen = zombie.screen
         self.game_settings = zombie.game_settings
-        self.zombie_death_sheet = zombie.zombie_death_sheet
-        self.death_images = zombie.death_images[:]
+        self.death_animation.play(zombie.death_clip)
+        self.start_tick = timers.now  # the frame shown follows the age of the corpse, in steps
+
+    def drop(self, group):
+        """add the corpse to group, it is removed when its death animation has been played"""
+        group.add(self)
+        self.start_tick = timers.now
+        timers.schedule(self.death_animation.clip.length, self.expire)
+
+        # rotate the next frames of the animation in the time left in the coming frames
+        if self.game_settings.render_enabled:
+            scheduler.add(self.bake_death_frames(self.death_animation.clip, self.angle), PRIORITY_CORPSE, 'corpse')
+
+    def expire(self):
+        """end of the death animation (timing wheel callback)"""
+        self.kill()
+        self.pool.release(self)
+
+    @staticmethod
+    def bake_death_frames(death_clip, angle):
+        """job (job_scheduler): build the rotated frames of the death animation, one per slice"""
+        for frame in death_clip.frames[1:]:
+            rotations.get(frame, 180 - angle)
+            yield
 
     def blit_death_frame(self):
         """
-        Blit one frame of death image from the self.death_images
-        Then delete one frame
-        (The dead_zombie object will be deleted from dead_zombies sprite group is death_images is empty: no need to display any more)
-        :return:
+        Blit the current frame of the death animation
+        (The dead_zombie object will be deleted from dead_zombies sprite group when the animation is finished: no need to display any more)
+        :return: Rect of the screen drawn
         """
-        rotated_image = pygame.transform.rotate(self.death_images[-1], 180 - self.angle)
+        self.death_animation.tick = timers.now - self.start_tick
+        rotated_image = rotations.rotate(self.death_animation.frame(), 180 - self.angle)
         # self.screen.blit(rotated_image, (self.rect[0] - 22, self.rect[1] - 19, self.rect[2] * 2, self.rect[3] * 2))
-        self.screen.blit(rotated_image, self.rect)
         # print('zombie rect (x, y):', self.rect)
+        return self.screen.blit(rotated_image, self.rect)
+
 
-    def update(self):
-        # remove the last frame
-        self.death_images.pop()
+# pools of reusable zombies and corpses
+Zombie.pool = ObjectPool(Zombie)
+DeadZombie.pool = ObjectPool(DeadZombie)
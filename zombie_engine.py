@@ -0,0 +1,276 @@
+import time
+from zombie import Zombie
+from rotation_cache import rotations
+from object_pool import ObjectPool
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, zombies update themselves without it
+    np = None
+
+
+class ZombieEngine:
+    """
+    Optional zombie simulation that keeps the state of all zombies in contiguous numpy arrays
+    (structure of arrays) and moves all of them at once with vectorized math.
+
+    Each registered zombie owns one slot (index) of the arrays. The zombie sprites (EngineZombie)
+    become thin views: their hp, position, angle, ... are read from and written to the arrays,
+    and they are only used for collision tests and rendering.
+    Positions are floats, so slow zombies are no longer stuck by rounding to integer rect coordinates.
+
+    Attributes (self.):
+        :x, y: center of each zombie
+        :previous_x, previous_y: center before the last update, for render interpolation
+        :hp: health point
+        :slow: hit slow down factor, ratio multiplied to speed (restores over time)
+        :last_attack: time of last attack, in ms
+        :angle: angle (degrees) from the player to the zombie, as Zombie.angle
+        :push_x, push_y: push away from the neighbouring zombies, added to each move (set by CrowdSeparation)
+        :count: number of slots in use, the arrays are only valid up to count
+        :zombies: slot -> zombie sprite
+        :attacking: zombies playing their attack sweep, advanced by update()
+    """
+    available = np is not None
+    fields = ('x', 'y', 'previous_x', 'previous_y', 'hp', 'slow', 'last_attack', 'angle', 'push_x', 'push_y')
+
+    def __init__(self, game_settings, capacity=None):
+        self.game_settings = game_settings
+        if capacity is None:
+            capacity = game_settings.zombie_engine_capacity
+
+        for field in self.fields:
+            setattr(self, field, np.zeros(capacity))
+        self.count = 0
+        self.zombies = []
+        self.attacking = set()
+
+    def capacity(self):
+        return len(self.x)
+
+    def allocate(self, x, y, hp, slow=1.0, last_attack=0, angle=0.0):
+        """
+        Reserve a slot and write the state of a zombie in it, the arrays grow when full
+        :return: slot index
+        """
+        if self.count == self.capacity():
+            for field in self.fields:
+                setattr(self, field, np.concatenate((getattr(self, field), np.zeros(self.capacity()))))
+
+        slot = self.count
+        self.x[slot] = self.previous_x[slot] = x
+        self.y[slot] = self.previous_y[slot] = y
+        self.hp[slot] = hp
+        self.slow[slot] = slow
+        self.last_attack[slot] = last_attack
+        self.angle[slot] = angle
+        self.push_x[slot] = self.push_y[slot] = 0.0
+        self.zombies.append(None)
+        self.count += 1
+        return slot
+
+    def add(self, zombie):
+        """register zombie, its current state is moved into the arrays"""
+        state = zombie.__dict__
+        slot = self.allocate(state['_rect'].centerx, state['_rect'].centery, state['_hp'], state['_hit_slow_down_factor'],
+                             state['_last_attacking_time'], state['_angle'] or 0.0)
+        self.zombies[slot] = zombie
+        zombie.slot = slot
+
+    def remove(self, zombie):
+        """
+        Unregister zombie, its state is copied back into the sprite so it stays valid (e.g. for DeadZombie).
+        The last slot is moved into the free one, so the arrays stay contiguous
+        """
+        slot = zombie.slot
+        self.attacking.discard(zombie)
+        state = zombie.__dict__
+        state['_rect'].center = (int(self.x[slot]), int(self.y[slot]))
+        state['_hp'] = float(self.hp[slot])
+        state['_hit_slow_down_factor'] = float(self.slow[slot])
+        state['_last_attacking_time'] = float(self.last_attack[slot])
+        state['_angle'] = float(self.angle[slot])
+        zombie.slot = None
+
+        last = self.count - 1
+        if slot != last:
+            for field in self.fields:
+                array = getattr(self, field)
+                array[slot] = array[last]
+            moved = self.zombies[last]
+            self.zombies[slot] = moved
+            if moved is not None:
+                moved.slot = slot
+        self.zombies.pop()
+        self.count -= 1
+
+    def update(self, player, flow_field=None):
+        """
+        Move every zombie toward the player, same rules as Zombie.update():
+            1. face the player (or the heading given by the flow field) and move by zombie_speed * slow down factor,
+               plus the separation push
+            2. restore the slow down factor
+            3. advance the attack sweep of the zombies attacking
+        """
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        self.previous_x[:n] = x
+        self.previous_y[:n] = y
+        slow = self.slow[:n]
+        angle = self.angle[:n]
+
+        # angle from player to zombie (zombie moves in the opposite direction)
+        radians = np.arctan2(y - player.rect.centery, x - player.rect.centerx)
+        if flow_field is not None and flow_field.obstacle_count:
+            field_angles = flow_field.angles_at(x, y)
+            around = ~np.isnan(field_angles)
+            radians[around] = np.radians(field_angles[around])
+        np.degrees(radians, out=angle)
+
+        step = slow * self.game_settings.zombie_speed
+        x -= np.cos(radians) * step - self.push_x[:n]
+        y -= np.sin(radians) * step - self.push_y[:n]
+
+        # restore slow down factor
+        np.add(slow, self.game_settings.zombie_hit_slow_down_restore_factor, out=slow, where=slow < 1)
+
+        # attack sweep, one frame per step
+        for zombie in list(self.attacking):
+            zombie.attack_animation.advance()
+            if not zombie.attack_animation.playing:
+                self.attacking.discard(zombie)
+
+
+class EngineField:
+    """
+    Attribute of an EngineZombie stored in its engine's array while the zombie is registered,
+    and in the sprite itself (as _name) otherwise
+    """
+
+    def __init__(self, array_name):
+        self.array_name = array_name
+
+    def __set_name__(self, owner, name):
+        self.local_name = '_' + name
+
+    def __get__(self, zombie, owner=None):
+        if zombie is None:
+            return self
+        if zombie.slot is None:
+            return zombie.__dict__[self.local_name]
+        return getattr(zombie.engine, self.array_name)[zombie.slot]
+
+    def __set__(self, zombie, value):
+        if zombie.slot is None:
+            zombie.__dict__[self.local_name] = value
+        else:
+            getattr(zombie.engine, self.array_name)[zombie.slot] = value
+
+
+class EngineZombie(Zombie):
+    """
+    A zombie whose state lives in a ZombieEngine.
+    The zombie joins the engine when it is added to a sprite group (the zombies group),
+    and leaves it when it is removed from its last group.
+    Movement and the attack sweep are done by ZombieEngine.update(), so update() does nothing,
+    the rotated image is only computed when the zombie is drawn.
+    """
+    hp = EngineField('hp')
+    hit_slow_down_factor = EngineField('slow')
+    last_attacking_time = EngineField('last_attack')
+    angle = EngineField('angle')
+
+    def __init__(self, game_settings, screen, player, engine, spawn_position=None):
+        self.engine = engine
+        self.slot = None
+        super().__init__(game_settings, screen, player, spawn_position)
+
+    def reset(self, game_settings, screen, player, engine=None, spawn_position=None):
+        if engine is not None:
+            self.engine = engine
+        super().reset(game_settings, screen, player, spawn_position=spawn_position)
+
+    @property
+    def rect(self):
+        """rect of the zombie, its center follows the engine's position arrays"""
+        rect = self.__dict__['_rect']
+        if self.slot is not None:
+            rect.center = (int(self.engine.x[self.slot]), int(self.engine.y[self.slot]))
+        return rect
+
+    @rect.setter
+    def rect(self, rect):
+        self.__dict__['_rect'] = rect
+        if self.slot is not None:
+            self.engine.x[self.slot], self.engine.y[self.slot] = rect.center
+
+    @property
+    def previous_center(self):
+        """center before the last engine update"""
+        if self.slot is None:
+            return self.rect.center
+        return self.engine.previous_x[self.slot], self.engine.previous_y[self.slot]
+
+    @previous_center.setter
+    def previous_center(self, center):
+        pass  # kept by the engine
+
+    def add_internal(self, group):
+        super().add_internal(group)
+        if self.slot is None:
+            self.engine.add(self)
+
+    def remove_internal(self, group):
+        super().remove_internal(group)
+        if self.slot is not None and not self.groups():
+            self.engine.remove(self)
+
+    def update(self):
+        pass
+
+    def attack_player(self, player):
+        super().attack_player(player)
+        if self.slot is not None:
+            self.engine.attacking.add(self)
+
+    def blit_zombie(self, alpha=None):
+        # zombies outside of the screen (just spawned) are not rotated nor drawn
+        if not self.screen.get_clip().colliderect(self.rect.inflate(self.game_settings.zombie_lod_visible_margin,
+                                                                    self.game_settings.zombie_lod_visible_margin)):
+            return None
+
+        # rotate zombie's image surface, use attack_image if zombie just attacked
+        if self.attack_animation.playing:
+            self.rotated_image, self.updated_rect = rotations.rect(self.attack_image, 180 - self.angle + self.attack_animation.frame(), self.rect.center)
+        else:
+            self.rotated_image, self.updated_rect = rotations.rect(self.image, 180 - self.angle, self.rect.center)
+
+        return super().blit_zombie(alpha)
+
+
+# pool of reusable engine zombies
+EngineZombie.pool = ObjectPool(EngineZombie)
+
+
+if __name__ == '__main__':
+    # time one engine update for increasing numbers of zombies
+    from setting import Settings
+    from pygame import Rect
+
+    class Target:
+        rect = Rect(673, 374, 20, 20)
+
+    game_settings = Settings()
+    rng = np.random.default_rng(0)
+    for zombie_count in (100, 1000, 5000, 20000):
+        engine = ZombieEngine(game_settings, zombie_count)
+        for i in range(zombie_count):
+            engine.allocate(rng.uniform(0, game_settings.screen_width), rng.uniform(0, game_settings.screen_height),
+                            game_settings.zombie_max_health, rng.uniform(0.2, 1))
+
+        repeat = 200
+        start = time.perf_counter()
+        for i in range(repeat):
+            engine.update(Target)
+        print('%6d zombies: %.3f ms per update' % (zombie_count, (time.perf_counter() - start) * 1000 / repeat))
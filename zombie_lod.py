@@ -0,0 +1,76 @@
+class ZombieLOD:
+    """
+    Level of detail of the zombie updates.
+
+    Zombies within near_distance of the player are updated fully every step. The others (far away,
+    or off screen, like the zombies just spawned by random_spawn_generator()) keep their heading and
+    only recompute it (atan2 or flow field, and the rotated image) every far_interval steps.
+    Far zombies are split into far_interval buckets (Zombie.lod_bucket, from their spawn position)
+    refreshed on different steps, so the work is spread evenly instead of all far zombies
+    refreshing on the same step.
+    They still move every step along their last heading (so rendering stays interpolated),
+    and zombies that are not visible are never rotated.
+
+    Attributes (self.):
+        :near_distance: zombies closer to the player than this (pixels) are always fully updated
+        :margin: zombies less than margin pixels outside of the screen are visible (their image overlaps the screen)
+        :far_interval: far zombies refresh their heading every far_interval steps
+        :tick: number of steps since the session started
+        :full, staggered, hidden: zombies fully updated, moved along their last heading,
+            and not visible (not rotated) in the last step
+        :total_full, total_staggered, total_hidden: the same, summed over the session
+    """
+
+    def __init__(self, game_settings, screen):
+        self.near_distance = game_settings.zombie_lod_near_distance
+        self.near_squared = self.near_distance ** 2
+        self.far_interval = game_settings.zombie_lod_far_interval
+        self.screen_rect = screen.get_rect()
+        self.margin = game_settings.zombie_lod_visible_margin
+        self.tick = 0
+        self.player_center = (0, 0)
+        self.full = self.staggered = self.hidden = 0
+        self.total_full = self.total_staggered = self.total_hidden = 0
+
+    def begin_step(self, player):
+        """called once per simulation step, before the zombies are updated"""
+        self.tick += 1
+        self.player_center = player.rect.center
+        self.total_full += self.full
+        self.total_staggered += self.staggered
+        self.total_hidden += self.hidden
+        self.full = self.staggered = self.hidden = 0
+
+    def level(self, zombie):
+        """
+        :return: (refresh, visible): refresh is True if the zombie must recompute its heading this step,
+            visible is True if the zombie is on screen (or close to it) and must be rotated
+        """
+        x, y = zombie.rect.center
+        dx = x - self.player_center[0]
+        dy = y - self.player_center[1]
+        screen_rect = self.screen_rect
+        margin = self.margin
+        visible = (-margin <= x < screen_rect.width + margin) and (-margin <= y < screen_rect.height + margin)
+        if not visible:
+            self.hidden += 1
+
+        if dx * dx + dy * dy < self.near_squared:
+            self.full += 1
+            return True, visible
+        if (self.tick + zombie.lod_bucket) % self.far_interval == 0:
+            self.full += 1
+            return True, visible
+        self.staggered += 1
+        return False, visible
+
+    def stats(self):
+        """:return: dictionary of the updates of the session: full, staggered, hidden, and the fraction of skipped headings"""
+        full = self.total_full + self.full
+        staggered = self.total_staggered + self.staggered
+        return {
+            'full': full,
+            'staggered': staggered,
+            'hidden': self.total_hidden + self.hidden,
+            'staggered_fraction': staggered / (full + staggered) if full + staggered else 0.0,
+        }